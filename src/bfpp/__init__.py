@@ -1,14 +1,18 @@
 
 from .core.compiler import BrainFuckPlusPlusCompiler
-from .core.lexer import preprocess, tokenize
-from .api import CompileOptions, CompileResult, compile_file, compile_string
+from .core.lexer import preprocess, tokenize, tokenize_with_columns
+from .core.parser import Parser
+from .api import CompileOptions, CompileResult, CompileSession, compile_file, compile_string
 
 __all__ = [
     'BrainFuckPlusPlusCompiler',
     'preprocess',
     'tokenize',
+    'tokenize_with_columns',
+    'Parser',
     'CompileOptions',
     'CompileResult',
+    'CompileSession',
     'compile_string',
     'compile_file',
 ]
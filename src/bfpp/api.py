@@ -10,6 +10,8 @@ from .core.compiler import BrainFuckPlusPlusCompiler
 @dataclass(frozen=True)
 class CompileOptions:
     optimize_level: Optional[int] = None
+    shared_routines: bool = False
+    decimal_output: str = 'dabble'
 
 
 @dataclass(frozen=True)
@@ -17,13 +19,51 @@ class CompileResult:
     bf_code: str
     variables: Dict[str, Dict[str, Any]]
     max_ptr: int
+    peak_ptr: int = 0
+
+
+def _result(compiler: BrainFuckPlusPlusCompiler, bf: str) -> CompileResult:
+    return CompileResult(
+        bf_code=bf,
+        variables=dict(compiler.variables),
+        max_ptr=int(compiler.max_ptr),
+        peak_ptr=int(max(compiler.state.peak_ptr, compiler.max_ptr)),
+    )
 
 
 def compile_string(source: str, *, options: Optional[CompileOptions] = None) -> CompileResult:
-    opt_level = None if options is None else options.optimize_level
-    compiler = BrainFuckPlusPlusCompiler(optimize_level=opt_level)
+    options = options or CompileOptions()
+    opt_level = options.optimize_level
+    compiler = BrainFuckPlusPlusCompiler(
+        optimize_level=opt_level,
+        shared_routines=options.shared_routines,
+        decimal_output=options.decimal_output,
+    )
     bf = compiler.compile(source, optimize_level=opt_level)
-    return CompileResult(bf_code=bf, variables=dict(compiler.variables), max_ptr=int(compiler.max_ptr))
+    return _result(compiler, bf)
+
+
+class CompileSession:
+    """
+    Compiles successive versions of one source.
+
+    Each compile reuses the code generated for the top-level statements in
+    front of the first changed line, so small edits recompile quickly.
+    """
+
+    def __init__(self, *, options: Optional[CompileOptions] = None):
+        options = options or CompileOptions()
+        self._opt_level = options.optimize_level
+        self._compiler = BrainFuckPlusPlusCompiler(
+            optimize_level=self._opt_level,
+            shared_routines=options.shared_routines,
+            decimal_output=options.decimal_output,
+        )
+
+    def compile(self, source: str) -> CompileResult:
+        compiler = self._compiler
+        bf = compiler.recompile(source, optimize_level=self._opt_level)
+        return _result(compiler, bf)
 
 
 def compile_file(path: str | Path, *, options: Optional[CompileOptions] = None, encoding: str = "utf-8") -> CompileResult:
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Keyword-delimited blocks: `while/loop ... do` .. `endwhile`,
+# `if ... then` .. [`else`] .. `endif`, and `match` .. `endmatch`.
+KEYWORD_BLOCKS = ('while', 'if', 'match')
+
+
+def _line_roles(tokens: List[str]) -> List[Tuple[str, str]]:
+    # (block kind, 'open' | 'close' | 'else') roles a tokenized line plays
+    cmd = tokens[0].lower()
+    roles = []
+    if cmd in ('while', 'loop') and 'do' in tokens:
+        roles.append(('while', 'open'))
+    elif cmd == 'endwhile':
+        roles.append(('while', 'close'))
+    if cmd == 'if' and 'then' in tokens:
+        roles.append(('if', 'open'))
+    elif cmd == 'endif':
+        roles.append(('if', 'close'))
+    elif cmd == 'else':
+        roles.append(('if', 'else'))
+    match_cmd = cmd.rstrip(':')
+    if match_cmd == 'match':
+        roles.append(('match', 'open'))
+    elif match_cmd == 'endmatch':
+        roles.append(('match', 'close'))
+    return roles
+
+
+@dataclass
+class BlockTable:
+    """
+    Matching block ends for every opener in a list of source lines.
+
+    Built in one pass so control-flow handlers can find the end of their
+    block with a lookup instead of re-tokenizing every following line.
+    Openers without a matching end map to the last line, as the old
+    forward scans did.
+    """
+
+    brace_end: Dict[int, int] = field(default_factory=dict)
+    keyword_end: Dict[str, Dict[int, int]] = field(default_factory=lambda: {k: {} for k in KEYWORD_BLOCKS})
+    # `if ... then` line -> its last `else` line at the same nesting level
+    else_line: Dict[int, int] = field(default_factory=dict)
+
+
+def build_block_table(lines: List[str], tokenize: Callable[[str], List[str]]) -> BlockTable:
+    table = BlockTable()
+    last = len(lines) - 1
+
+    # Brace blocks: braces are matched in the order they appear, so on a
+    # `} else {` line the `}` closes the block above before the `{` opens a
+    # new one. A line opening several blocks ends where its outermost `{`
+    # is closed, which is the last of its braces to be popped.
+    brace_starts: List[int] = []
+    stacks: Dict[str, List[int]] = {k: [] for k in KEYWORD_BLOCKS}
+
+    for i, raw in enumerate(lines):
+        s = raw.strip()
+        for ch in s:
+            if ch == '{':
+                brace_starts.append(i)
+            elif ch == '}' and brace_starts:
+                table.brace_end[brace_starts.pop()] = i
+
+        t = tokenize(s) if s else []
+        if not t:
+            continue
+        for kind, role in _line_roles(t):
+            stack = stacks[kind]
+            if role == 'open':
+                stack.append(i)
+            elif stack and role == 'close':
+                table.keyword_end[kind][stack.pop()] = i
+            elif stack and role == 'else':
+                table.else_line[stack[-1]] = i
+
+    for start in brace_starts:
+        table.brace_end[start] = last
+    for kind, stack in stacks.items():
+        for start in stack:
+            table.keyword_end[kind][start] = last
+    return table
+
+
+def scan_keyword_block(lines: List[str], start: int, kind: str,
+                       tokenize: Callable[[str], List[str]]) -> Tuple[int, Optional[int]]:
+    """
+    End line (and last same-level `else` line for `if`) of a keyword block
+    whose opener sits on line `start` but not at its beginning, e.g. an
+    inline `case` body. Such openers are not in the block table.
+    """
+    depth = 0
+    else_at = None
+    for i in range(start + 1, len(lines)):
+        s = lines[i].strip()
+        t = tokenize(s) if s else []
+        if not t:
+            continue
+        for k, role in _line_roles(t):
+            if k != kind:
+                continue
+            if role == 'open':
+                depth += 1
+            elif role == 'close':
+                if depth == 0:
+                    return i, else_at
+                depth -= 1
+            elif depth == 0:
+                else_at = i
+    return len(lines) - 1, else_at
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from .state import CompilerState
+
+# State that is not restored from a checkpoint: the emitted code and trace are
+# truncated instead of copied, the token and snippet caches stay valid across
+# sources, and compile settings and macros belong to the compile call.
+_UNSAVED_FIELDS = frozenset({
+    'bf_code',
+    'trace',
+    'token_cache',
+    'snippet_cache',
+    'cache_limit',
+    'is_tracing',
+    'optimize_level',
+    'shared_routines',
+    'decimal_output',
+    'macros',
+    'macro_call_sites',
+})
+
+
+@lru_cache(maxsize=None)
+def _saved_fields() -> Tuple[str, ...]:
+    return tuple(f.name for f in fields(CompilerState) if f.name not in _UNSAVED_FIELDS)
+
+
+@dataclass
+class Checkpoint:
+    """
+    Compiler state after a top-level statement.
+
+    `key` is the digest of every source line up to and including the
+    statement's last line, so a checkpoint is reusable exactly when that
+    prefix of the source is unchanged.
+    """
+
+    key: bytes
+    code_len: int
+    trace_len: int
+    saved: Dict[str, Any]
+
+
+def prefix_digests(lines: List[str]) -> List[bytes]:
+    """digests[i] identifies lines[0..i]."""
+    h = hashlib.sha1()
+    digests = []
+    for line in lines:
+        h.update(line.encode('utf-8'))
+        h.update(b'\n')
+        digests.append(h.digest())
+    return digests
+
+
+def save_checkpoint(state: CompilerState, key: bytes) -> Checkpoint:
+    """
+    Snapshot state with one-level copies of its containers.
+
+    Their items are never changed in place once stored: variable records are
+    fixed at declaration, the other entries are ints and tuples, and the
+    loop stacks are empty between top-level statements. Sharing the items
+    makes a snapshot a few dict copies instead of a deep copy of every
+    variable record.
+    """
+    saved = {
+        name: copy.copy(value)
+        for name in _saved_fields()
+        for value in (getattr(state, name),)
+    }
+    return Checkpoint(key, len(state.bf_code), len(state.trace), saved)
+
+
+def restore_checkpoint(state: CompilerState, checkpoint: Checkpoint, bf_code: List[str], trace: List[str]) -> None:
+    """Put state back to checkpoint; bf_code and trace are the lists it was taken from."""
+    for name, value in checkpoint.saved.items():
+        setattr(state, name, copy.copy(value))
+    state.bf_code = bf_code[:checkpoint.code_len]
+    state.trace = trace[:checkpoint.trace_len]
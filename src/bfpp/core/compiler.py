@@ -1,7 +1,11 @@
 import re
 
+from typing import List
+
 from bfpp.core.lexer import preprocess, tokenize
+from bfpp.core.checkpoints import prefix_digests, restore_checkpoint, save_checkpoint
 from bfpp.core.errors import BFPPCompileError, BFPPPreprocessError, make_compile_error
+from bfpp.core.parser import Assign, Break, For, If, Match, Parser, While
 from bfpp.core.state import CompilerState
 from bfpp.ops.ops_memory import MemoryOpsMixin
 from bfpp.ops.ops_runtime import RuntimeOpsMixin
@@ -9,6 +13,10 @@ from bfpp.ops.ops_vars import VarsOpsMixin
 from bfpp.ops.ops_arith import ArithOpsMixin
 from bfpp.ops.ops_io import IOMixin
 from bfpp.ops.ops_control import ControlFlowMixin
+from bfpp.ops.ops_routines import SharedRoutinesMixin
+
+# Subscript contents that _tokenize folds into the preceding name: name[key], name[$idx]
+_SUBSCRIPT_KEY_RE = re.compile(r'\$?[A-Za-z_][A-Za-z0-9_]*')
 
 
 class BrainFuckPlusPlusCompiler(
@@ -18,6 +26,7 @@ class BrainFuckPlusPlusCompiler(
     RuntimeOpsMixin,
     IOMixin,
     ControlFlowMixin,
+    SharedRoutinesMixin,
 ):
     """
     BrainFuck++ Compiler
@@ -35,8 +44,15 @@ class BrainFuckPlusPlusCompiler(
     - Stack-based temporary cell management for intermediate values
     """
 
-    def __init__(self, optimize_level=None):
-        self.state = CompilerState(optimize_level=optimize_level)
+    def __init__(self, optimize_level=None, shared_routines=False, decimal_output='dabble'):
+        if decimal_output not in ('dabble', 'divmod'):
+            raise ValueError(f"Compiler Error: Unknown decimal output algorithm '{decimal_output}'.")
+        self.state = CompilerState(optimize_level=optimize_level, shared_routines=shared_routines,
+                                   decimal_output=decimal_output)
+        # Checkpoints after each top-level statement of the last recompile(),
+        # and what the next compile() may reuse (see recompile)
+        self._checkpoints = []
+        self._reuse = None
 
     @property
     def variables(self):
@@ -102,8 +118,8 @@ class BrainFuckPlusPlusCompiler(
 
         Steps:
         1. Preprocess: Remove comments
-        2. Tokenize: Split into tokens line by line
-        3. Process: Generate BF code for each statement
+        2. Parse: Tokenize each line and build the statement tree
+        3. Emit: Generate BF code for each statement
 
         Args:
             code: BF++ source code string
@@ -126,34 +142,16 @@ class BrainFuckPlusPlusCompiler(
         # Generate dispatcher loop if macros exist
         if self.state.macros:
             self._generate_macro_dispatcher_preamble()
+        elif self.state.shared_routines:
+            self._reserve_dispatcher_cells()
 
-        i = 0
-        while i < len(lines):
-            # Skip macro definition blocks during main compilation
-            if lines[i].strip().startswith('#macro'):
-                while i < len(lines) and not lines[i].strip().startswith('#endmacro'):
-                    i += 1
-                i += 1
-                continue
-            
-            self._last_line = i + 1
-            try:
-                line = lines[i].strip()
-                if not line:
-                    i += 1
-                    continue
-
-                tokens = self._tokenize(line)
-                if tokens:
-                    self.state.add_trace(f"Line {self._last_line}: {' '.join(tokens)}")
-                    i = self._process_statement(tokens, lines, i)
-                i += 1
-            except BFPPCompileError:
-                raise
-            except BFPPPreprocessError:
-                raise
-            except Exception as e:
-                self._raise_compile_error(e, lines)
+        body = self._parse_lines(lines)
+        if self._reuse is None:
+            self._emit_statements(body, lines)
+        else:
+            self._emit_with_checkpoints(body, lines)
+        if self.state.routine_boundaries:
+            self._assemble_dispatcher()
 
         bf = ''.join(self.bf_code)
         level = self.optimize_level if optimize_level is None else optimize_level
@@ -163,6 +161,52 @@ class BrainFuckPlusPlusCompiler(
             bf = optimize_bf(bf, level=int(level), cell_size=256, wrap=True)
         return bf
 
+    def recompile(self, code, optimize_level=None, is_tracing=False):
+        """
+        Compile a new version of the source given to the previous recompile().
+
+        Top-level statements whose lines, and every line before them, are
+        unchanged are not generated again: compilation resumes from the state
+        checkpointed after the last such statement, keeping the BF code emitted
+        up to it. Programs with macros, or compiled with shared routines, are
+        always compiled in full.
+
+        Returns:
+            Generated BrainFuck code string, the same as compile() would return
+        """
+        self._reuse = (self._checkpoints, self.state.bf_code, self.state.trace)
+        previous = self.state
+        self.state = CompilerState(optimize_level=previous.optimize_level,
+                                   shared_routines=previous.shared_routines,
+                                   decimal_output=previous.decimal_output)
+        self.state.token_cache = previous.token_cache
+        self.state.snippet_cache = previous.snippet_cache
+        try:
+            return self.compile(code, optimize_level=optimize_level, is_tracing=is_tracing)
+        finally:
+            self._reuse = None
+
+    def _emit_with_checkpoints(self, nodes, lines):
+        previous, prev_code, prev_trace = self._reuse
+        self._checkpoints = []
+        if self.state.macros or self.state.shared_routines:
+            # Dispatcher code wraps or precedes the statements
+            self._emit_statements(nodes, lines)
+            return
+
+        digests = prefix_digests(lines)
+        start = 0
+        while (start < len(nodes) and start < len(previous)
+               and previous[start].key == digests[nodes[start].span.end_line - 1]):
+            start += 1
+        if start:
+            restore_checkpoint(self.state, previous[start - 1], prev_code, prev_trace)
+            self._checkpoints = previous[:start]
+
+        for node in nodes[start:]:
+            self._emit_statements([node], lines)
+            self._checkpoints.append(save_checkpoint(self.state, digests[node.span.end_line - 1]))
+
     def _collect_macros(self, lines: List[str]):
         """First pass to collect #macro definitions."""
         i = 0
@@ -263,6 +307,7 @@ class BrainFuckPlusPlusCompiler(
             'ptr': self.current_ptr,
             'max_ptr': self.max_ptr,
             'temp_cells_count': len(self.temp_cells),
+            'peak_ptr': max(self.state.peak_ptr, self.max_ptr),
             'vars_count': len(self.variables)
         }
         
@@ -275,6 +320,9 @@ class BrainFuckPlusPlusCompiler(
             metadata=metadata
         ) from e
 
+    def _preprocess(self, code):
+        return preprocess(code)
+
     def _tokenize(self, line):
         """
         Tokenize a line into meaningful units.
@@ -284,7 +332,13 @@ class BrainFuckPlusPlusCompiler(
         - Multi-character operators (==, <=, >=, !=)
         - Single character operators and delimiters
         - Identifiers and numbers
+
+        Results are cached per line, so handlers that look at a line again
+        do not re-tokenize it.
         """
+        cached = self.state.token_cache.get(line)
+        if cached is not None:
+            return list(cached)
         tokens = tokenize(line)
         # Normalize bracketed references:
         #   name [ 3 ] -> name[3]
@@ -299,8 +353,7 @@ class BrainFuckPlusPlusCompiler(
                 and tokens[i + 1] == '['
                 and (
                     tokens[i + 2].lstrip('-').isdigit()
-                    or re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', tokens[i + 2])
-                    or re.match(r'^\$[A-Za-z_][A-Za-z0-9_]*$', tokens[i + 2])
+                    or _SUBSCRIPT_KEY_RE.fullmatch(tokens[i + 2])
                     or (tokens[i + 2].startswith('"') and tokens[i + 2].endswith('"'))
                 )
                 and tokens[i + 3] == ']'
@@ -310,6 +363,7 @@ class BrainFuckPlusPlusCompiler(
                 continue
             out.append(tokens[i])
             i += 1
+        self.state.remember(self.state.token_cache, line, tuple(out))
         return out
 
     def _split_var_ref(self, ref):
@@ -336,22 +390,39 @@ class BrainFuckPlusPlusCompiler(
     def _output_literal(self, token):
         return super()._output_literal(token)
 
+    def _output_byte_string(self, codes):
+        return super()._output_byte_string(codes)
+
     def _output_string_until_null_deterministic(self, pos, size):
         return super()._output_string_until_null_deterministic(pos, size)
 
     def _process_lines_range(self, lines, start_idx, end_idx):
-        i = start_idx
-        while i <= end_idx and i < len(lines):
-            self._last_line = i + 1
+        self._emit_statements(self._parse_lines(lines, start_idx, end_idx), lines)
+
+    def _parse_lines(self, lines, start_idx=None, end_idx=None):
+        """
+        Parse lines start_idx..end_idx (inclusive) into statement nodes.
+
+        Without a range the whole program is parsed, skipping macro definitions.
+        """
+        parser = Parser(lines, self._tokenize)
+        try:
+            if start_idx is None:
+                return parser.parse_program().body
+            return parser.parse_range(start_idx, end_idx)
+        except (BFPPCompileError, BFPPPreprocessError):
+            raise
+        except Exception as e:
+            self._last_line = parser.line + 1
+            self._raise_compile_error(e, lines)
+
+    def _emit_statements(self, nodes, lines):
+        """Generate BF code for a list of parsed statements."""
+        for node in nodes:
+            self._last_line = node.span.line
             try:
-                line = lines[i].strip()
-                if not line:
-                    i += 1
-                    continue
-                tokens = self._tokenize(line)
-                if tokens:
-                    i = self._process_statement(tokens, lines, i)
-                i += 1
+                self.state.add_trace(f"Line {self._last_line}: {' '.join(node.tokens)}")
+                self._emit_statement(node, lines)
             except BFPPCompileError:
                 raise
             except BFPPPreprocessError:
@@ -359,48 +430,35 @@ class BrainFuckPlusPlusCompiler(
             except Exception as e:
                 self._raise_compile_error(e, lines)
 
-    def _split_semicolon_statements(self, tokens):
-        parts = []
-        cur = []
-        depth = 0
-        for t in tokens:
-            if t == '(':
-                depth += 1
-            elif t == ')':
-                depth = max(0, depth - 1)
-            if t == ';' and depth == 0:
-                if cur:
-                    parts.append(cur)
-                cur = []
-                continue
-            cur.append(t)
-        if cur:
-            parts.append(cur)
-        return parts
-
-    def _process_statement(self, tokens, lines, line_idx):
-        """
-        Process a single statement and generate corresponding BF code.
-
-        Returns the new line index after processing.
-        """
-        if not tokens:
-            return line_idx
-
-        if ';' in tokens:
-            for part in self._split_semicolon_statements(tokens):
-                if not part:
-                    continue
-                new_idx = self._process_single_statement(part, lines, line_idx)
-                if new_idx != line_idx:
-                    return new_idx
-            return line_idx
-
-        return self._process_single_statement(tokens, lines, line_idx)
+    def _emit_statement(self, node, lines):
+        # Control flow: bodies may run zero or many times, so no known value
+        # flows into, is recorded inside, or survives out of a block.
+        if isinstance(node, (If, While, For, Match)):
+            self._forget_all_values()
+            self.state.block_depth += 1
+            try:
+                if isinstance(node, If):
+                    self._handle_if_statement(node, lines)
+                elif isinstance(node, Match):
+                    self._handle_match_statement(node, lines)
+                elif isinstance(node, For):
+                    self._handle_for_loop(node, lines)
+                else:
+                    self._handle_while_loop(node, lines)
+            finally:
+                self.state.block_depth -= 1
+                self._forget_all_values()
+        elif isinstance(node, Break):
+            self._handle_break()
+        elif isinstance(node, Assign):
+            self._handle_set(node.tokens[1:], node.value)
+        else:
+            self._process_single_statement(node.tokens)
 
-    def _process_single_statement(self, tokens, lines, line_idx):
+    def _process_single_statement(self, tokens):
+        """Generate BF code for a statement without a block."""
         if not tokens:
-            return line_idx
+            return
 
         cmd = tokens[0].lower()
 
@@ -432,11 +490,14 @@ class BrainFuckPlusPlusCompiler(
         elif cmd == 'input':
             if len(tokens) > 2 and tokens[1] == 'on':
                 self._handle_input(tokens[2:])
+                self._forget_value(tokens[2])
             else:
                 self.bf_code.append(',')
+                self._forget_all_values()
         elif cmd == 'inputint':
             if len(tokens) > 2 and tokens[1] == 'on':
                 self._handle_inputint(tokens[2:])
+                self._forget_value(tokens[2])
             else:
                 raise ValueError("inputint requires: inputint on <intvar>")
         elif cmd == 'inputfloat':
@@ -452,20 +513,7 @@ class BrainFuckPlusPlusCompiler(
         # Memory operations
         elif cmd == 'clear':
             self._generate_clear()
-
-        # Control flow
-        elif cmd in ('loop', 'while'):
-            return self._handle_while_loop(tokens[1:], lines, line_idx)
-        elif cmd == 'if':
-            return self._handle_if_statement(tokens[1:], lines, line_idx)
-        elif cmd == 'match':
-            return self._handle_match_statement(tokens[1:], lines, line_idx)
-        elif cmd == 'for':
-            return self._handle_for_loop(tokens[1:], lines, line_idx)
-        elif cmd == 'break':
-            self._handle_break()
-
-        return line_idx
+            self._forget_all_values()
 
     def _move_to_var(self, var_name):
         """Move pointer to the start of a variable's memory location."""
@@ -486,14 +534,14 @@ class BrainFuckPlusPlusCompiler(
         """
         return super()._handle_declare(tokens)
 
-    def _handle_set(self, tokens):
+    def _handle_set(self, tokens, expr=None):
         """
         Handle variable assignment.
 
         Syntax: set <value> on <var>
         Supports: literals, strings, variables ($var), expressions
         """
-        return super()._handle_set(tokens)
+        return super()._handle_set(tokens, expr=expr)
 
     def _set_string_literal(self, string_token, dest_var):
         """Set a string literal value to a string variable."""
@@ -515,13 +563,9 @@ class BrainFuckPlusPlusCompiler(
 
     # ===== Bitwise Operations =====
 
-    def _handle_expression_assignment(self, expr_tokens, dest_var):
+    def _handle_expression_assignment(self, expr_tokens, dest_var, expr=None):
         """Handle arithmetic and bitwise expression assignment."""
-        return super()._handle_expression_assignment(expr_tokens, dest_var)
-
-    def _parse_expression(self, tokens):
-        """Parse expression tokens into operands and operator."""
-        return super()._parse_expression(tokens)
+        return super()._handle_expression_assignment(expr_tokens, dest_var, expr=expr)
 
     def _load_operand(self, operand, target_pos, size=8):
         """Load a variable or literal into memory position."""
@@ -553,9 +597,11 @@ class BrainFuckPlusPlusCompiler(
         """Perform subtraction (a - b) on multi-byte integers."""
         return super()._perform_sub(pos_a, pos_b, pos_result, size=size)
 
-    def _perform_mul(self, pos_a, pos_b, pos_result, size=8, result_size=None):
+    def _perform_mul(self, pos_a, pos_b, pos_result, size=8, result_size=None, a_bytes=None, b_bytes=None,
+                     b_const=None):
         """Perform multiplication on multi-byte integers."""
-        return super()._perform_mul(pos_a, pos_b, pos_result, size=size, result_size=result_size)
+        return super()._perform_mul(pos_a, pos_b, pos_result, size=size, result_size=result_size,
+                                    a_bytes=a_bytes, b_bytes=b_bytes, b_const=b_const)
 
     def _perform_div(self, pos_a, pos_b, pos_result, size=8):
         """Perform integer division using repeated subtraction."""
@@ -575,10 +621,10 @@ class BrainFuckPlusPlusCompiler(
 
     # ===== Control Flow =====
 
-    def _handle_match_statement(self, tokens, lines, line_idx):
-        return super()._handle_match_statement(tokens, lines, line_idx)
+    def _handle_match_statement(self, node, lines):
+        return super()._handle_match_statement(node, lines)
 
-    def _handle_if_statement(self, tokens, lines, line_idx):
+    def _handle_if_statement(self, node, lines):
         """
         Handle if/else statements.
 
@@ -587,9 +633,9 @@ class BrainFuckPlusPlusCompiler(
         2. If flag set: execute if-block, clear else-flag
         3. If else-flag set: execute else-block
         """
-        return super()._handle_if_statement(tokens, lines, line_idx)
+        return super()._handle_if_statement(node, lines)
 
-    def _handle_while_loop(self, tokens, lines, line_idx):
+    def _handle_while_loop(self, node, lines):
         """
         Handle while loops.
 
@@ -597,16 +643,16 @@ class BrainFuckPlusPlusCompiler(
         1. Evaluate condition
         2. Loop: [execute body, if flag still set re-evaluate condition]
         """
-        return super()._handle_while_loop(tokens, lines, line_idx)
+        return super()._handle_while_loop(node, lines)
 
-    def _handle_for_loop(self, tokens, lines, line_idx):
+    def _handle_for_loop(self, node, lines):
         """
         Handle for loops.
 
         Desugars: for (init; cond; step) {...}
         Into: init; while (cond) {...; step}
         """
-        return super()._handle_for_loop(tokens, lines, line_idx)
+        return super()._handle_for_loop(node, lines)
 
     def _handle_break(self):
         """
@@ -616,16 +662,16 @@ class BrainFuckPlusPlusCompiler(
         """
         return super()._handle_break()
 
-    def _evaluate_condition(self, tokens, flag_pos):
+    def _evaluate_condition(self, cond, flag_pos):
         """
-        Evaluate a condition and set flag (1=true, 0=false).
+        Evaluate a condition's expression tree and set flag (1=true, 0=false).
 
         Supports:
         - Variable truthiness
-        - Comparisons (==, !=)
+        - Comparisons (==, !=, <, >, <=, >=)
         - Negation (!)
         """
-        return super()._evaluate_condition(tokens, flag_pos)
+        return super()._evaluate_condition(cond, flag_pos)
 
     def _generate_if_nonzero(self, pos, body_fn, body_fn_else=None):
         return super()._generate_if_nonzero(pos, body_fn, body_fn_else=body_fn_else)
@@ -645,10 +691,6 @@ class BrainFuckPlusPlusCompiler(
     def _handle_inputfloat(self, tokens):
         return super()._handle_inputfloat(tokens)
 
-    def _process_block(self, lines, start_idx):
-        """Process a code block enclosed in braces."""
-        return super()._process_block(lines, start_idx)
-
     # ===== I/O Operations =====
 
     def _handle_move_to(self, tokens):
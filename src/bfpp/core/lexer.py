@@ -212,37 +212,24 @@ def preprocess(code: str) -> str:
     return _process_macros(code)
 
 
-def tokenize(line: str):
-    tokens = []
-    i = 0
-    while i < len(line):
-        if line[i].isspace():
-            i += 1
-            continue
+_DELIMITERS = r'{}()\[\]<>,;=!&|~+\-*/%'
 
-        m_num = re.match(r'(\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?', line[i:])
-        if m_num:
-            tokens.append(m_num.group(0))
-            i += len(m_num.group(0))
-            continue
+# One alternation covers every character of a line, so a single finditer
+# pass yields the tokens in order. Branch order matters: a number wins over
+# a word, and two-character operators win over their first character.
+_TOKEN_RE = re.compile(
+    r'(?P<ws>\s+)'
+    r'|(?P<num>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)'
+    r'|(?P<str>"[^"]*"?)'
+    r'|(?P<op>==|>=|<=|!=|[' + _DELIMITERS + r'])'
+    r'|(?P<word>[^\s' + _DELIMITERS + r']+)'
+)
 
-        if line[i] == '"':
-            j = i + 1
-            while j < len(line) and line[j] != '"':
-                j += 1
-            tokens.append(line[i:j + 1])
-            i = j + 1
-        elif line[i:i + 2] in {"==", ">=", "<=", "!="}:
-            tokens.append(line[i:i + 2])
-            i += 2
-        elif line[i] in '{}()[]<>,;=!&|~+-*/%':
-            tokens.append(line[i])
-            i += 1
-        else:
-            j = i
-            while j < len(line) and not line[j].isspace() and line[j] not in '{}()[]<>,;=!&|~+-*/%':
-                j += 1
-            tokens.append(line[i:j])
-            i = j
-
-    return tokens
+
+def tokenize_with_columns(line: str) -> List[Tuple[str, int]]:
+    """Tokenize a line, returning (token, column) pairs with 0-based columns."""
+    return [(m.group(), m.start()) for m in _TOKEN_RE.finditer(line) if m.lastgroup != 'ws']
+
+
+def tokenize(line: str) -> List[str]:
+    return [m.group() for m in _TOKEN_RE.finditer(line) if m.lastgroup != 'ws']
@@ -0,0 +1,589 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from .blocks import build_block_table, scan_keyword_block
+
+
+# ===== AST nodes =====
+
+@dataclass(frozen=True)
+class Span:
+    """Source position of a node: 1-based first and last line, 0-based column."""
+
+    line: int
+    column: int
+    end_line: int
+
+
+@dataclass
+class Expr:
+    span: Span
+
+
+@dataclass
+class Literal(Expr):
+    # Number or quoted string token, kept verbatim
+    value: str
+
+
+@dataclass
+class VarRef(Expr):
+    # `x`, `$x`, `a[3]`, `a[$i]` as written
+    name: str
+
+
+@dataclass
+class Unary(Expr):
+    op: str
+    operand: Expr
+
+
+@dataclass
+class Binary(Expr):
+    op: str
+    left: Expr
+    right: Expr
+
+
+@dataclass
+class Stmt:
+    span: Span
+    # Statement tokens as tokenized; for block statements, the header line.
+    tokens: List[str]
+
+
+@dataclass
+class Command(Stmt):
+    """A statement without a block or a dedicated node (inc, print, varout, input, ...)."""
+
+
+@dataclass
+class Declare(Stmt):
+    pass
+
+
+@dataclass
+class Assign(Stmt):
+    target: str
+    # None when the right-hand side is not an expression the parser knows
+    value: Optional[Expr]
+
+
+@dataclass
+class Break(Stmt):
+    pass
+
+
+@dataclass
+class If(Stmt):
+    cond_tokens: List[str]
+    cond: Optional[Expr]
+    then_body: List[Stmt]
+    else_body: Optional[List[Stmt]]
+
+
+@dataclass
+class While(Stmt):
+    cond_tokens: List[str]
+    cond: Optional[Expr]
+    body: List[Stmt]
+
+
+@dataclass
+class For(Stmt):
+    init: List[Stmt]
+    cond_tokens: List[str]
+    cond: Optional[Expr]
+    step: List[Stmt]
+    body: List[Stmt]
+
+
+@dataclass
+class Case:
+    span: Span
+    value_tokens: List[str]
+    body: List[Stmt]
+
+
+@dataclass
+class Match(Stmt):
+    subject: str
+    cases: List[Case]
+    default: Optional[List[Stmt]]
+
+
+@dataclass
+class Program:
+    body: List[Stmt] = field(default_factory=list)
+
+
+def contains_break(body: List[Stmt]) -> bool:
+    """Whether a `break` in body would leave the loop that owns body (nested loops own theirs)."""
+    for node in body:
+        if isinstance(node, Break):
+            return True
+        if isinstance(node, If):
+            if contains_break(node.then_body) or (node.else_body and contains_break(node.else_body)):
+                return True
+        elif isinstance(node, Match):
+            if any(contains_break(c.body) for c in node.cases) or (node.default and contains_break(node.default)):
+                return True
+    return False
+
+
+# ===== Token helpers =====
+
+def extract_parenthesized(tokens: List[str]) -> List[str]:
+    """Tokens inside the first balanced (...) group, or all tokens when there is none."""
+    if '(' not in tokens:
+        return tokens
+
+    start = tokens.index('(')
+    balance = 1
+    end = -1
+
+    for i in range(start + 1, len(tokens)):
+        if tokens[i] == '(':
+            balance += 1
+        elif tokens[i] == ')':
+            balance -= 1
+            if balance == 0:
+                end = i
+                break
+
+    if end == -1:
+        raise ValueError('Mismatched parentheses')
+
+    return tokens[start + 1:end]
+
+
+def split_statements(tokens: List[str]) -> List[List[str]]:
+    """Split a line's tokens on top-level ';'."""
+    parts = []
+    cur = []
+    depth = 0
+    for t in tokens:
+        if t == '(':
+            depth += 1
+        elif t == ')':
+            depth = max(0, depth - 1)
+        if t == ';' and depth == 0:
+            if cur:
+                parts.append(cur)
+            cur = []
+            continue
+        cur.append(t)
+    if cur:
+        parts.append(cur)
+    return parts
+
+
+_BINARY_PRECEDENCE = {
+    '|': 1, '^': 2, '&': 3,
+    '==': 4, '!=': 4,
+    '<': 5, '>': 5, '<=': 5, '>=': 5,
+    '+': 6, '-': 6,
+    '*': 7, '/': 7, '%': 7,
+}
+_UNARY_OPS = ('-', '~', '!')
+
+
+class _ExprParser:
+    def __init__(self, tokens: List[str], span: Span):
+        self.tokens = tokens
+        self.pos = 0
+        self.span = span
+
+    def parse(self) -> Expr:
+        expr = self._binary(1)
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected token in expression: {self.tokens[self.pos]}")
+        return expr
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _binary(self, min_prec: int) -> Expr:
+        left = self._unary()
+        while True:
+            op = self._peek()
+            prec = _BINARY_PRECEDENCE.get(op)
+            if prec is None or prec < min_prec:
+                return left
+            self.pos += 1
+            right = self._binary(prec + 1)
+            left = Binary(self.span, op, left, right)
+
+    def _unary(self) -> Expr:
+        tok = self._peek()
+        if tok is None:
+            raise ValueError('Expression ended early')
+        if tok == '!':
+            # `! a == 5` negates the whole comparison, as conditions always have
+            self.pos += 1
+            return Unary(self.span, tok, self._binary(_BINARY_PRECEDENCE['==']))
+        if tok in _UNARY_OPS:
+            self.pos += 1
+            return Unary(self.span, tok, self._unary())
+        if tok == '(':
+            self.pos += 1
+            inner = self._binary(1)
+            if self._peek() != ')':
+                raise ValueError('Mismatched parentheses')
+            self.pos += 1
+            return inner
+        self.pos += 1
+        if tok[0] in '"\'' or tok[0].isdigit() or (tok[0] == '.' and tok[1:2].isdigit()):
+            return Literal(self.span, tok)
+        if tok in _BINARY_PRECEDENCE or tok in (')', ',', ';'):
+            raise ValueError(f"Unexpected token in expression: {tok}")
+        return VarRef(self.span, tok)
+
+
+def parse_expression(tokens: List[str], span: Span) -> Optional[Expr]:
+    """Expression tree for tokens, or None when they are not an expression the parser knows."""
+    if not tokens:
+        return None
+    try:
+        return _ExprParser(tokens, span).parse()
+    except ValueError:
+        return None
+
+
+def parse_condition(tokens: List[str], span: Span) -> Optional[Expr]:
+    """Expression tree of a condition; None for an empty (always true) one."""
+    if not tokens:
+        return None
+    try:
+        return _ExprParser(tokens, span).parse()
+    except ValueError:
+        raise ValueError(f"Invalid condition: {' '.join(tokens)}") from None
+
+
+def _operand(expr: Expr) -> Optional[str]:
+    if isinstance(expr, Literal):
+        return expr.value
+    if isinstance(expr, VarRef):
+        return expr.name
+    if isinstance(expr, Unary) and expr.op == '-' and isinstance(expr.operand, Literal):
+        return '-' + expr.operand.value
+    return None
+
+
+def flat_operands(expr: Expr) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    (left, op, right) operand tokens of an expression with at most one
+    operator, the shapes code generation handles: `x`, `~x` and `x op y`.
+    A negated number is a single operand, e.g. `-5`.
+    """
+    leaf = _operand(expr)
+    if leaf is not None:
+        return leaf, None, None
+    if isinstance(expr, Unary) and _operand(expr.operand) is not None:
+        return _operand(expr.operand), expr.op, None
+    if isinstance(expr, Binary) and _operand(expr.left) is not None and _operand(expr.right) is not None:
+        return _operand(expr.left), expr.op, _operand(expr.right)
+    raise ValueError("Cannot parse expression: only one operator per expression is supported")
+
+
+# ===== Statement parser =====
+
+class Parser:
+    """
+    Turns preprocessed source lines into a Program.
+
+    Block extents follow the line-oriented rules the compiler has always
+    used: brace blocks end at the first '}' line at their depth, keyword
+    blocks at their matching end keyword, and a statement that opens a
+    block ends the statements of its line.
+    """
+
+    def __init__(self, lines: List[str], tokenize: Callable[[str], List[str]]):
+        self.lines = lines
+        self.tokenize = tokenize
+        self.blocks = build_block_table(lines, tokenize)
+        # Line index being parsed, for error reporting
+        self.line = 0
+
+    def parse_program(self) -> Program:
+        program = Program()
+        lines = self.lines
+        i = 0
+        while i < len(lines):
+            # Macro definition blocks are collected separately
+            if lines[i].strip().startswith('#macro'):
+                while i < len(lines) and not lines[i].strip().startswith('#endmacro'):
+                    i += 1
+                i += 1
+                continue
+            i = self._parse_line(i, program.body) + 1
+        return program
+
+    def parse_range(self, start: int, end: int) -> List[Stmt]:
+        """Statements of lines start..end (inclusive)."""
+        body: List[Stmt] = []
+        i = start
+        while i <= end and i < len(self.lines):
+            i = self._parse_line(i, body) + 1
+        return body
+
+    def _parse_line(self, i: int, out: List[Stmt]) -> int:
+        self.line = i
+        line = self.lines[i].strip()
+        if not line:
+            return i
+        tokens = self.tokenize(line)
+        if not tokens:
+            return i
+        return self.parse_statement(tokens, i, out)
+
+    def parse_statement(self, tokens: List[str], line_idx: int, out: List[Stmt]) -> int:
+        """Append the statements of one line to out; returns the last line they use."""
+        if ';' not in tokens:
+            return self._parse_single(tokens, line_idx, out)
+        col_from = 0
+        for part in split_statements(tokens):
+            new_idx = self._parse_single(part, line_idx, out, col_from)
+            if new_idx != line_idx:
+                return new_idx
+            col_from = out[-1].span.column + 1 if out else col_from
+        return line_idx
+
+    def _span(self, tokens: List[str], line_idx: int, end_idx: int, col_from: int = 0) -> Span:
+        raw = self.lines[line_idx] if line_idx < len(self.lines) else ''
+        col = raw.find(tokens[0], col_from) if tokens else -1
+        if col < 0:
+            col = len(raw) - len(raw.lstrip())
+        return Span(line_idx + 1, col, max(line_idx, end_idx) + 1)
+
+    def _parse_single(self, tokens: List[str], line_idx: int, out: List[Stmt], col_from: int = 0) -> int:
+        cmd = tokens[0].lower()
+        if cmd == 'if':
+            return self._parse_if(tokens, line_idx, out)
+        if cmd in ('loop', 'while'):
+            return self._parse_while(tokens, line_idx, out)
+        if cmd == 'for':
+            return self._parse_for(tokens, line_idx, out)
+        if cmd == 'match':
+            return self._parse_match(tokens, line_idx, out)
+
+        span = self._span(tokens, line_idx, line_idx, col_from)
+        if cmd == 'declare':
+            out.append(Declare(span, tokens))
+        elif cmd == 'set' and 'on' in tokens:
+            on_idx = tokens.index('on')
+            target = tokens[on_idx + 1] if on_idx + 1 < len(tokens) else ''
+            out.append(Assign(span, tokens, target, parse_expression(tokens[1:on_idx], span)))
+        elif cmd == 'break':
+            out.append(Break(span, tokens))
+        else:
+            out.append(Command(span, tokens))
+        return line_idx
+
+    def _parse_block(self, start_idx: int) -> Tuple[List[Stmt], int]:
+        # Statements of a brace block starting at start_idx (an optional lone
+        # '{' line is skipped); returns them and the closing line.
+        body: List[Stmt] = []
+        lines = self.lines
+        i = start_idx
+        if i < len(lines) and lines[i].strip() == '{':
+            i += 1
+
+        depth = 0
+        while i < len(lines):
+            self.line = i
+            line = lines[i].strip()
+            if '}' in line:
+                if depth == 0:
+                    return body, i
+                depth -= 1
+
+            tokens = self.tokenize(line)
+            next_i = self.parse_statement(tokens, i, body) if tokens else i
+            # A statement that consumed the following lines also consumed its own braces
+            if '{' in line and next_i == i:
+                depth += 1
+            i = next_i + 1
+
+        return body, i - 1
+
+    def _keyword_block_end(self, line_idx: int, kind: str) -> Tuple[int, Optional[int]]:
+        ends = self.blocks.keyword_end[kind]
+        if line_idx in ends:
+            return ends[line_idx], self.blocks.else_line.get(line_idx)
+        return scan_keyword_block(self.lines, line_idx, kind, self.tokenize)
+
+    def _parse_if(self, tokens: List[str], line_idx: int, out: List[Stmt]) -> int:
+        head = tokens[1:]
+        cond_tokens = extract_parenthesized(head[:head.index('then')] if 'then' in head else head)
+        cond = parse_condition(cond_tokens, self._span(tokens, line_idx, line_idx))
+        if 'then' in head:
+            end_line, else_line = self._keyword_block_end(line_idx, 'if')
+            then_body = self.parse_range(line_idx + 1, (else_line if else_line is not None else end_line) - 1)
+            else_body = None
+            if else_line is not None:
+                else_body = self.parse_range(else_line + 1, end_line - 1)
+        else:
+            then_body, if_end = self._parse_block(line_idx + 1)
+            else_body = None
+            end_line = if_end
+            if if_end < len(self.lines) and 'else' in self.tokenize(self.lines[if_end].strip()):
+                else_body, end_line = self._parse_block(if_end + 1)
+
+        span = self._span(tokens, line_idx, end_line)
+        out.append(If(span, tokens, cond_tokens, cond, then_body, else_body))
+        return end_line
+
+    def _parse_while(self, tokens: List[str], line_idx: int, out: List[Stmt]) -> int:
+        head = tokens[1:]
+        cond_tokens = extract_parenthesized(head[:head.index('do')] if 'do' in head else head)
+        cond = parse_condition(cond_tokens, self._span(tokens, line_idx, line_idx))
+        if 'do' in head:
+            end_line, _ = self._keyword_block_end(line_idx, 'while')
+            body = self.parse_range(line_idx + 1, end_line - 1)
+        else:
+            body, end_line = self._parse_block(line_idx + 1)
+
+        span = self._span(tokens, line_idx, end_line)
+        out.append(While(span, tokens, cond_tokens, cond, body))
+        return end_line
+
+    def _parse_for(self, tokens: List[str], line_idx: int, out: List[Stmt]) -> int:
+        paren_tokens = extract_parenthesized(tokens[1:])
+        semi_indices = [i for i, t in enumerate(paren_tokens) if t == ';']
+        if len(semi_indices) != 2:
+            raise ValueError('For loop requires (init; condition; step)')
+
+        init_tokens = paren_tokens[:semi_indices[0]]
+        cond_tokens = paren_tokens[semi_indices[0] + 1:semi_indices[1]]
+        step_tokens = paren_tokens[semi_indices[1] + 1:]
+        cond = parse_condition(cond_tokens, self._span(tokens, line_idx, line_idx))
+
+        init: List[Stmt] = []
+        step: List[Stmt] = []
+        if init_tokens:
+            self._parse_single(init_tokens, line_idx, init)
+        if step_tokens:
+            self._parse_single(step_tokens, line_idx, step)
+        body, end_line = self._parse_block(line_idx + 1)
+
+        span = self._span(tokens, line_idx, end_line)
+        out.append(For(span, tokens, init, cond_tokens, cond, step, body))
+        return end_line
+
+    def _parse_match(self, tokens: List[str], line_idx: int, out: List[Stmt]) -> int:
+        # Syntax supported:
+        #   match (<expr>) { case <val>: ... ; default: ... }
+        # or
+        #   match (<expr>)
+        #     case <val>: ...
+        #     default: ...
+        #   endmatch
+        subject_tokens = extract_parenthesized(tokens[1:])
+        if not subject_tokens:
+            raise ValueError('match requires a subject expression in parentheses')
+        if len(subject_tokens) != 1:
+            raise NotImplementedError('match subject currently supports a single token (var or literal)')
+        subject = subject_tokens[0]
+
+        lines = self.lines
+        if '{' in tokens:
+            # Brace form: '{' is on the match line.
+            end_line = self.blocks.brace_end.get(line_idx, len(lines) - 1)
+        else:
+            end_line, _ = self._keyword_block_end(line_idx, 'match')
+        match_body_start = line_idx + 1
+        match_body_end = end_line - 1
+
+        cases: List[Case] = []
+        default = None
+
+        def _strip_trailing_colon(tok: str) -> str:
+            return tok[:-1] if tok.endswith(':') else tok
+
+        def _parse_case_value_tokens(line_tokens):
+            # Supports `case 10:`, `case -10:` and `case - 10:`, with the ':'
+            # optionally attached to the last token.
+            if len(line_tokens) < 2:
+                raise ValueError('case requires a value')
+            raw = [_strip_trailing_colon(t) for t in line_tokens[1:]]
+            raw = [t for t in raw if t != ':']
+            if not raw:
+                raise ValueError('case requires a value')
+            if len(raw) == 1:
+                return [raw[0]]
+            if len(raw) >= 2 and raw[0] == '-' and raw[1].lstrip('-').isdigit():
+                return ['-', raw[1]]
+            return [raw[0]]
+
+        # Only recognize case/default at brace depth 0 inside the match body.
+        i = match_body_start
+        brace_depth = 0
+        while i < len(lines) and i <= match_body_end:
+            self.line = i
+            raw = lines[i].strip()
+            if not raw:
+                i += 1
+                continue
+
+            if '{' in raw:
+                brace_depth += raw.count('{')
+            if '}' in raw:
+                brace_depth -= raw.count('}')
+
+            t = self.tokenize(raw)
+            if not t:
+                i += 1
+                continue
+
+            cmd = t[0].lower().rstrip(':')
+            if brace_depth == 0 and cmd in ('case', 'default'):
+                case_value_tokens = _parse_case_value_tokens(t) if cmd == 'case' else None
+
+                body_start = i + 1
+                inline_tokens = None
+                if ':' in t:
+                    colon_idx = t.index(':')
+                    if colon_idx + 1 < len(t):
+                        inline_tokens = t[colon_idx + 1:]
+
+                body: List[Stmt] = []
+                if inline_tokens:
+                    # Inline statement body on the case line
+                    body_end = i
+                    self.parse_statement(inline_tokens, i, body)
+                else:
+                    # Either a { ... } block or the lines until the next case/default/end
+                    if body_start < len(lines) and lines[body_start].strip() == '{':
+                        body_end = self.blocks.brace_end.get(body_start, len(lines) - 1)
+                    else:
+                        j = body_start
+                        local_depth = 0
+                        while j < len(lines) and j <= match_body_end:
+                            s2 = lines[j].strip()
+                            if '{' in s2:
+                                local_depth += s2.count('{')
+                            if '}' in s2:
+                                local_depth -= s2.count('}')
+                            tt = self.tokenize(s2)
+                            if local_depth == 0 and tt and tt[0].lower().rstrip(':') in ('case', 'default'):
+                                break
+                            j += 1
+                        body_end = j - 1
+                    if body_end >= body_start:
+                        body = self.parse_range(body_start, body_end)
+
+                if cmd == 'case':
+                    cases.append(Case(self._span(t, i, max(i, body_end)), case_value_tokens, body))
+                else:
+                    default = body
+
+                i = i + 1 if body_end < i else body_end + 1
+                continue
+
+            i += 1
+
+        out.append(Match(self._span(tokens, line_idx, end_line), tokens, subject, cases, default))
+        return end_line
@@ -10,6 +10,10 @@ class CompilerState:
     current_ptr: int = 0
     max_ptr: int = 0
     temp_cells: List[Tuple[int, int]] = field(default_factory=list)
+    # Freed temp blocks below `max_ptr` as sorted (pos, size) holes, and the
+    # highest tape position ever allocated or visited (exclusive).
+    free_temps: List[Tuple[int, int]] = field(default_factory=list)
+    peak_ptr: int = 0
     bf_code: List[str] = field(default_factory=list)
     loop_condition_stack: List[int] = field(default_factory=list)
     optimize_level: Optional[int] = None
@@ -22,19 +26,76 @@ class CompilerState:
     # We use a static return flag per call site to implement returns
     macro_call_sites: Dict[str, List[int]] = field(default_factory=dict)
 
+    # Compile-time constant tracking: scalar integer variable -> raw unsigned
+    # value of its cells at the current codegen point. Only straight-line code
+    # at the top level records values; `block_depth` counts the control-flow
+    # bodies being compiled, whose statements may run zero or many times.
+    known_values: Dict[str, int] = field(default_factory=dict)
+    block_depth: int = 0
+
+    # Cells provably zero at the end of `bf_code`, each mapped to the code
+    # length when the fact was recorded (see MemoryOpsMixin._is_known_zero).
+    # `zero_stack` saves the facts of each enclosing loop; `scanned_code_len`
+    # counts the chunks already replayed onto these facts.
+    zero_cells: Dict[int, int] = field(default_factory=dict)
+    zero_stack: List[Dict[int, int]] = field(default_factory=list)
+    scanned_code_len: int = 0
+
+    # Shared routines (see SharedRoutinesMixin): routines by emit method and
+    # parameters, and the (code length, pointer) where each call ended a
+    # segment of the straight-line program.
+    shared_routines: bool = False
+    routines: Dict[tuple, dict] = field(default_factory=dict)
+    routine_boundaries: List[Tuple[int, int]] = field(default_factory=list)
+
+    # Integer varout algorithm: 'dabble' (shift-and-add into decimal digits)
+    # or 'divmod' (repeated division by 10).
+    decimal_output: str = 'dabble'
+
+    # Zero cell that _generate_set_value counts its multiplication loops on
+    # instead of allocating a temp, e.g. an index frame's hole cell.
+    const_scratch: Optional[int] = None
+
+    # Front-end cache: tokens per stripped source line.
+    token_cache: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    # Code of cached arithmetic primitives by operation and relative layout
+    # (see MemoryOpsMixin._emit_snippet).
+    snippet_cache: Dict[tuple, tuple] = field(default_factory=dict)
+    # Both caches outlive a compile in CompileSession, so each drops its
+    # oldest entry once it holds this many (see remember()).
+    cache_limit: int = 4096
+
     def reset(self, *, optimize_level: Optional[int] = None) -> None:
         self.variables.clear()
         self.current_ptr = 0
         self.max_ptr = 0
         self.temp_cells.clear()
+        self.free_temps.clear()
+        self.peak_ptr = 0
         self.bf_code.clear()
         self.loop_condition_stack.clear()
         self.trace.clear()
         self.macros.clear()
         self.macro_call_sites.clear()
+        self.known_values.clear()
+        self.block_depth = 0
+        self.zero_cells.clear()
+        self.zero_stack.clear()
+        self.scanned_code_len = 0
+        self.token_cache.clear()
+        self.snippet_cache.clear()
+        self.routines.clear()
+        self.routine_boundaries.clear()
+        self.const_scratch = None
         if optimize_level is not None:
             self.optimize_level = optimize_level
 
+    def remember(self, cache: dict, key, value) -> None:
+        """Store value in token_cache or snippet_cache, evicting the oldest entry when full."""
+        if len(cache) >= self.cache_limit:
+            del cache[next(iter(cache))]
+        cache[key] = value
+
     def add_trace(self, message: str) -> None:
         if self.is_tracing:
             self.trace.append(message)
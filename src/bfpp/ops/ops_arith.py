@@ -1,24 +1,18 @@
 from __future__ import annotations
 
+from bfpp.core.parser import flat_operands, parse_expression
+from bfpp.ops.ops_memory import cached_snippet
+
+
 class ArithOpsMixin:
+    def _byte_sign_flag(self, pos, flag):
+        """flag = 1 if the byte at pos is >= 128 (negative as int8), else 0."""
+        self._generate_byte_ge_const(pos, 128, flag)
+
     def _sign_extend_8_to_64(self, pos):
         """Compact sign-extend 8-bit to 64-bit."""
         is_neg = self._allocate_temp(1)
-        scr = self._allocate_temp(1)
-        self._generate_clear(is_neg)
-        t = self._allocate_temp(1)
-        self._copy_cell(pos, t, scr)
-        c = self._allocate_temp(1)
-        self._generate_set_value(128, c)
-        self._move_pointer(t)
-        self.bf_code.append('[')
-        self._move_pointer(c)
-        self.bf_code.append('-')
-        self._move_pointer(t)
-        self.bf_code.append('-]')
-        self._generate_if_nonzero(c, lambda: None, body_fn_else=lambda: self._generate_set_value(1, is_neg))
-        for x in [c, t]:
-            self._free_temp(x)
+        self._byte_sign_flag(pos, is_neg)
         
         def _fill():
             for i in range(1, 8):
@@ -27,27 +21,12 @@ class ArithOpsMixin:
         for i in range(1, 8):
             self._generate_clear(pos + i)
         self._generate_if_nonzero(is_neg, _fill)
-        self._free_temp(scr)
         self._free_temp(is_neg)
 
     def _sign_extend_16_to_64(self, pos):
         """Compact sign-extend 16-bit to 64-bit."""
         is_neg = self._allocate_temp(1)
-        scr = self._allocate_temp(1)
-        self._generate_clear(is_neg)
-        t = self._allocate_temp(1)
-        self._copy_cell(pos + 1, t, scr)
-        c = self._allocate_temp(1)
-        self._generate_set_value(128, c)
-        self._move_pointer(t)
-        self.bf_code.append('[')
-        self._move_pointer(c)
-        self.bf_code.append('-')
-        self._move_pointer(t)
-        self.bf_code.append('-]')
-        self._generate_if_nonzero(c, lambda: None, body_fn_else=lambda: self._generate_set_value(1, is_neg))
-        for x in [c, t]:
-            self._free_temp(x)
+        self._byte_sign_flag(pos + 1, is_neg)
         
         def _fill():
             for i in range(2, 8):
@@ -56,34 +35,22 @@ class ArithOpsMixin:
         for i in range(2, 8):
             self._generate_clear(pos + i)
         self._generate_if_nonzero(is_neg, _fill)
-        self._free_temp(scr)
         self._free_temp(is_neg)
 
     def _sign_extend_8_to_16(self, pos):
         """Compact sign-extend 8-bit to 16-bit."""
         is_neg = self._allocate_temp(1)
-        scr = self._allocate_temp(1)
-        self._generate_clear(is_neg)
-        t = self._allocate_temp(1)
-        self._copy_cell(pos, t, scr)
-        c = self._allocate_temp(1)
-        self._generate_set_value(128, c)
-        self._move_pointer(t)
-        self.bf_code.append('[')
-        self._move_pointer(c)
-        self.bf_code.append('-')
-        self._move_pointer(t)
-        self.bf_code.append('-]')
-        self._generate_if_nonzero(c, lambda: None, body_fn_else=lambda: self._generate_set_value(1, is_neg))
-        for x in [c, t]:
-            self._free_temp(x)
+        self._byte_sign_flag(pos, is_neg)
         self._generate_clear(pos + 1)
         self._generate_if_nonzero(is_neg, lambda: self._generate_set_value(255, pos + 1))
-        self._free_temp(scr)
         self._free_temp(is_neg)
 
-    def _handle_expression_assignment(self, expr_tokens, dest_var):
-        """Handle arithmetic and bitwise expression assignment."""
+    def _handle_expression_assignment(self, expr_tokens, dest_var, expr=None):
+        """Handle arithmetic and bitwise expression assignment.
+
+        expr is the parsed right-hand side when the caller has it (an
+        Assign node's value); otherwise expr_tokens are parsed here.
+        """
         dest_info = self._resolve_var(dest_var)
         if dest_info['type'] not in ('int', 'int16', 'int64', 'float', 'float64', 'expfloat'):
             raise NotImplementedError("Expressions only supported for integer and float types")
@@ -171,9 +138,24 @@ class ArithOpsMixin:
                 val = int(operand) * 1000
             _set_int64_const(val, target_pos)
 
-        left, op, right = self._parse_expression(expr_tokens)
+        if expr is None:
+            expr = parse_expression(expr_tokens, None)
+        if expr is None:
+            raise ValueError(f"Cannot parse expression: {' '.join(expr_tokens)}")
+        left, op, right = flat_operands(expr)
         dest_size = dest_info['size']
 
+        # Fold before forgetting dest: it may also be an operand (`set $a + 1 on a`).
+        folded = None
+        if dest_info['type'] in ('int', 'int16', 'int64'):
+            folded = self._fold_int_expression(left, op, right, dest_size)
+        self._forget_value(dest_var)
+        if folded is not None:
+            for idx, b in enumerate(folded.to_bytes(dest_size, 'little')):
+                self._generate_set_value(b, dest_info['pos'] + idx)
+            self._remember_value(dest_var, folded)
+            return
+
         if dest_info['type'] in ('float', 'float64', 'expfloat'):
             if op in ('&', '|', '^', '~', '%'):
                 raise NotImplementedError(f"{dest_info['type']} expressions do not support bitwise or modulo")
@@ -184,7 +166,7 @@ class ArithOpsMixin:
             _load_operand_float_scaled(left, tl)
             
             if op is None:
-                self._copy_block(tl, dest_info['pos'], 8)
+                self._move_block(tl, dest_info['pos'], 8)
             else:
                 _load_operand_float_scaled(right, tr)
                 if op == '+':
@@ -207,7 +189,7 @@ class ArithOpsMixin:
                     _set_int64_const(1000, c1000)
                     sl = self._allocate_temp(16)
                     self._generate_clear_block(sl, 16)
-                    self._perform_mul_signed(tl, c1000, sl, size=8, result_size=16)
+                    self._perform_mul_signed(tl, c1000, sl, size=8, result_size=16, b_bytes=2)
                     self._perform_div_signed(sl, tr, dest_info['pos'], size=8, a_size=16)
                     self._free_temp(sl)
                     self._free_temp(c1000)
@@ -234,7 +216,7 @@ class ArithOpsMixin:
                 tq = self._allocate_temp(8)
                 self._generate_clear_block(tq, 8)
                 self._perform_div_signed(si['pos'], c1000, tq, size=8)
-                self._copy_block(tq, dest_info['pos'], dest_size)
+                self._move_block(tq, dest_info['pos'], dest_size)
                 self._free_temp(tq)
                 self._free_temp(c1000)
                 return
@@ -257,12 +239,32 @@ class ArithOpsMixin:
                 self._copy_block(si['pos'], dest_info['pos'], dest_size)
             return
 
+        # Strength reduction: a literal or known-value operand of * / % selects
+        # a constant-specific routine instead of the generic operand-operand one.
+        const = None
+        if op in ('*', '/', '%'):
+            const = self._known_operand_value(right, dest_size)
+            if const is None and op == '*':
+                const = self._known_operand_value(left, dest_size)
+                if const is not None:
+                    left, right = right, left
+            if const is not None and op != '*' and self._split_byte_divisor(const) is None:
+                const = None
+
         tl = self._allocate_temp(dest_size)
         tr = self._allocate_temp(dest_size)
         self._load_operand(left, tl, size=dest_size)
         
         if op == '~':
             self._perform_bitwise_not(tl, dest_info['pos'], size=dest_size)
+        elif const is not None:
+            if op == '*':
+                self._perform_mul_const(tl, const, dest_info['pos'], size=dest_size,
+                                        a_bytes=self._operand_magnitude_bytes(left, dest_size))
+            elif op == '/':
+                self._perform_divmod_const_signed(tl, const, dest_info['pos'], None, size=dest_size)
+            else:
+                self._perform_divmod_const_signed(tl, const, None, dest_info['pos'], size=dest_size)
         else:
             self._load_operand(right, tr, size=dest_size)
             if op == '+':
@@ -270,7 +272,9 @@ class ArithOpsMixin:
             elif op == '-':
                 self._perform_sub(tl, tr, dest_info['pos'], size=dest_size)
             elif op == '*':
-                self._perform_mul_signed(tl, tr, dest_info['pos'], size=dest_size)
+                self._perform_mul_signed(tl, tr, dest_info['pos'], size=dest_size,
+                                         a_bytes=self._operand_magnitude_bytes(left, dest_size),
+                                         b_bytes=self._operand_magnitude_bytes(right, dest_size))
             elif op == '/':
                 self._perform_div_signed(tl, tr, dest_info['pos'], size=dest_size)
             elif op == '%':
@@ -285,16 +289,48 @@ class ArithOpsMixin:
         self._free_temp(tr)
         self._free_temp(tl)
 
-    def _parse_expression(self, tokens):
-        """Parse expression tokens into operands and operator."""
-        if len(tokens) >= 2 and tokens[0] == '~':
-            return tokens[1], '~', None
-        elif len(tokens) == 3:
-            return tokens[0], tokens[1], tokens[2]
-        elif len(tokens) == 1:
-            return tokens[0], None, None
+    def _fold_int_expression(self, left, op, right, size=8):
+        """
+        Evaluate `left op right` at compile time when both operands are literals or
+        variables with known values. Mirrors the runtime semantics at `size` bytes:
+        two's-complement wrap, truncating signed `/` and `%`. Returns the raw
+        unsigned result, or None when the expression must be emitted as code.
+        """
+        bits = 8 * size
+        mask = (1 << bits) - 1
+        a = self._known_operand_value(left, size)
+        if a is None:
+            return None
+        if op is None:
+            return a & mask
+        if op == '~':
+            return ~a & mask
+        b = self._known_operand_value(right, size)
+        if b is None:
+            return None
+        if op == '+':
+            r = a + b
+        elif op == '-':
+            r = a - b
+        elif op == '*':
+            r = a * b
+        elif op in ('/', '%'):
+            if b == 0:
+                return None
+            q, m = divmod(abs(a), abs(b))
+            if op == '/':
+                r = q if (a < 0) == (b < 0) else -q
+            else:
+                r = -m if a < 0 else m
+        elif op == '&':
+            r = a & b
+        elif op == '|':
+            r = a | b
+        elif op == '^':
+            r = a ^ b
         else:
-            raise ValueError(f"Cannot parse expression: {' '.join(tokens)}")
+            return None
+        return r & mask
 
     def _load_operand(self, operand, target_pos, size=8):
         """Load a variable or literal into memory position."""
@@ -341,6 +377,19 @@ class ArithOpsMixin:
         for i, b in enumerate(byte_values):
             self._generate_set_value(b, target_pos + i)
 
+    def _operand_magnitude_bytes(self, operand, size=8):
+        """How many low bytes |operand| can occupy once loaded with _load_operand at `size`."""
+        if operand.startswith('$') or operand in self.variables:
+            if self._split_runtime_subscript_ref(operand.lstrip('$')) is not None:
+                return size
+            # Sign-extended narrower types: |x| still fits the source width
+            return min(size, self._resolve_var(operand)['size'])
+        try:
+            value = int(operand)
+        except ValueError:
+            return size
+        return min(size, (abs(value).bit_length() + 7) // 8)
+
     def _generate_runtime_range_check_r1(self, pos):
         """Compact runtime range check for float R1."""
         is_neg = self._allocate_temp(1)
@@ -394,18 +443,31 @@ class ArithOpsMixin:
 
     def _perform_bitwise_not(self, pos_in, pos_res, size=8):
         """Perform bytewise NOT (255 - value) on multi-byte integer."""
-        ti = self._allocate_temp(size)
-        self._copy_block(pos_in, ti, size)
+        if pos_res != pos_in and pos_res < pos_in + size and pos_in < pos_res + size:
+            # Partial overlap: work from a copy
+            ti = self._allocate_temp(size)
+            self._copy_block(pos_in, ti, size)
+            self._perform_bitwise_not(ti, pos_res, size=size)
+            self._free_temp(ti)
+            return
+        t = self._allocate_temp(1)
         for i in range(size):
-            self._generate_set_value(255, pos_res + i)
-            self._move_pointer(ti + i)
-            self.bf_code.append('[')
-            self._move_pointer(pos_res + i)
-            self.bf_code.append('-')
-            self._move_pointer(ti + i)
-            self.bf_code.append('-]')
-        self._free_temp(ti)
+            if pos_res == pos_in:
+                # In place: the input byte is dead once moved out
+                self._move_cell(pos_in + i, t)
+                self._generate_set_value(255, pos_res + i)
+                self._move_pointer(t)
+                self.bf_code.append('[-')
+                self._move_pointer(pos_res + i)
+                self.bf_code.append('-')
+                self._move_pointer(t)
+                self.bf_code.append(']')
+            else:
+                self._generate_set_value(255, pos_res + i)
+                self._sub_cell(pos_in + i, pos_res + i, t)
+        self._free_temp(t)
 
+    @cached_snippet('pos_a', 'pos_b', 'result_lt', 'result_gt', 'result_eq')
     def _compare_bytes_unsigned(self, pos_a, pos_b, result_lt, result_gt, result_eq):
         """Safe and robust O(256) unsigned byte comparison."""
         self._generate_clear(result_lt)
@@ -444,12 +506,13 @@ class ArithOpsMixin:
 
     def _bitwise_byte_operation(self, op, pos_a, pos_b, pos_result):
         """Compact bitwise operation using BF-side loop."""
-        self._generate_clear(pos_result)
         ta = self._allocate_temp(1)
         tb = self._allocate_temp(1)
         s = self._allocate_temp(1)
         self._copy_cell(pos_a, ta, s)
         self._copy_cell(pos_b, tb, s)
+        # Cleared only after both inputs are copied: pos_result may alias pos_a
+        self._generate_clear(pos_result)
         
         p = self._allocate_temp(1)
         cnt = self._allocate_temp(1)
@@ -471,12 +534,16 @@ class ArithOpsMixin:
         self._move_pointer(ba)
         self.bf_code.append('[ - ')
         self._move_pointer(ta)
-        self.bf_code.append('+ ]')
+        self.bf_code.append('+ ')
+        self._move_pointer(ba)
+        self.bf_code.append(']')
         
         self._move_pointer(bb)
         self.bf_code.append('[ - ')
         self._move_pointer(tb)
-        self.bf_code.append('+ ]')
+        self.bf_code.append('+ ')
+        self._move_pointer(bb)
+        self.bf_code.append(']')
         
         rbit = self._allocate_temp(1)
         self._generate_clear(rbit)
@@ -512,83 +579,142 @@ class ArithOpsMixin:
         for x in [cnt, p, s, tb, ta]:
             self._free_temp(x)
 
+    @cached_snippet('pos_a', 'pos_b', 'pos_res')
     def _perform_add(self, pos_a, pos_b, pos_res, size=8):
-        """Robust multi-byte addition using O(256) wrap detection."""
-        ta = self._allocate_temp(size)
-        tb = self._allocate_temp(size)
-        tr = self._allocate_temp(size)
-        carry = self._allocate_temp(1)
-        
-        self._copy_block(pos_a, ta, size)
-        self._copy_block(pos_b, tb, size)
-        self._generate_clear_block(tr, size)
+        """Multi-byte addition: add each byte, then detect the wrap once via a single carry flag."""
+        def _overlaps(pos):
+            return pos < pos_res + size and pos_res < pos + size
+
+        # Operands are read non-destructively, so a separate result buffer is
+        # only needed when the result aliases one of them.
+        tr = self._allocate_temp(size, near=pos_res) if _overlaps(pos_a) or _overlaps(pos_b) else None
+        dst = pos_res if tr is None else tr
+        # Work cells sit next to the result bytes they update
+        carry = self._allocate_temp(1, near=dst)
+        nc = self._allocate_temp(1, near=dst)
+        # room counts down from 255 - a[i]; (room, 1, 0) must stay adjacent for _add_unit_with_wrap
+        room = self._allocate_temp(3, near=dst)
+        scr = self._allocate_temp(1, near=dst)
+
         self._generate_clear(carry)
-        
+
         for i in range(size):
-            target = tr + i
-            scr = self._allocate_temp(1)
-            self._copy_cell(ta + i, target, scr)
-            self._free_temp(scr)
-            
-            # Current carry bit for this byte
-            nc = self._allocate_temp(1)
-            self._generate_clear(nc)
-            
-            def _on_carry():
-                self._generate_if_byte_equals(target, 255, lambda: self._generate_set_value(1, nc))
+            target = dst + i
+            self._generate_clear(target)
+
+            if i == size - 1:
+                # No carry out of the top byte: plain adds suffice
+                self._add_cell(pos_a + i, target, scr)
+                self._move_pointer(carry)
+                self.bf_code.append('[')
                 self._move_pointer(target)
                 self.bf_code.append('+')
-                
-            self._generate_if_nonzero(carry, _on_carry)
-            
-            tv = self._allocate_temp(1)
-            s2 = self._allocate_temp(1)
-            self._copy_cell(tb + i, tv, s2)
-            self._free_temp(s2)
-            
-            self._move_pointer(tv)
-            self.bf_code.append('[ - ')
-            self._generate_if_byte_equals(target, 255, lambda: self._generate_set_value(1, nc))
+                self._move_pointer(carry)
+                self.bf_code.append('-]')
+                self._add_cell(pos_b + i, target, scr)
+                break
+
+            self._generate_clear(nc)
+            self._move_pointer(room)
+            self.bf_code.append('[-]-')
+            self._generate_set_value(1, room + 1)
+            self._generate_clear(room + 2)
+
+            # target = a[i], room = 255 - a[i]
+            self._generate_clear(scr)
+            self._move_pointer(pos_a + i)
+            self.bf_code.append('[')
             self._move_pointer(target)
             self.bf_code.append('+')
-            self._move_pointer(tv)
+            self._move_pointer(room)
+            self.bf_code.append('-')
+            self._move_pointer(scr)
+            self.bf_code.append('+')
+            self._move_pointer(pos_a + i)
+            self.bf_code.append('-]')
+            self._move_pointer(scr)
+            self.bf_code.append('[')
+            self._move_pointer(pos_a + i)
+            self.bf_code.append('+')
+            self._move_pointer(scr)
+            self.bf_code.append('-]')
+
+            # Incoming carry, then b[i], one unit at a time
+            self._move_pointer(carry)
+            self.bf_code.append('[-')
+            self._add_unit_with_wrap(target, room, lambda: self._generate_set_value(1, nc))
+            self._move_pointer(carry)
             self.bf_code.append(']')
-            self._free_temp(tv)
-            
-            # Carry bit for next byte is in nc
-            self._generate_clear(carry)
+
+            self._move_pointer(pos_b + i)
+            self.bf_code.append('[-')
+            self._move_pointer(scr)
+            self.bf_code.append('+')
+            self._add_unit_with_wrap(target, room, lambda: self._generate_set_value(1, nc))
+            self._move_pointer(pos_b + i)
+            self.bf_code.append(']')
+            self._move_pointer(scr)
+            self.bf_code.append('[')
+            self._move_pointer(pos_b + i)
+            self.bf_code.append('+')
+            self._move_pointer(scr)
+            self.bf_code.append('-]')
+
+            # carry = nc
             self._move_pointer(nc)
-            self.bf_code.append('[ - ')
+            self.bf_code.append('[')
             self._move_pointer(carry)
-            self.bf_code.append('+ ')
+            self.bf_code.append('+')
             self._move_pointer(nc)
-            self.bf_code.append(']')
-            self._free_temp(nc)
-            
-        self._copy_block(tr, pos_res, size)
-        for x in [carry, tr, tb, ta]:
+            self.bf_code.append('-]')
+
+        if tr is not None:
+            self._move_block(tr, pos_res, size)
+        for x in [scr, room, nc, carry]:
             self._free_temp(x)
+        if tr is not None:
+            self._free_temp(tr)
 
+    def _add_unit_with_wrap(self, target, room, on_wrap):
+        """
+        target += 1, running on_wrap() when target wraps from 255 to 0.
+
+        room holds how many increments are left before the wrap (255 - target)
+        and is followed by two cells holding 1 and 0. The zero test on room is
+        O(1): the pointer ends on room+1 or room, picks the matching branch,
+        and converges on room. On a wrap room restarts at 255. target may be
+        None when only the countdown itself is needed.
+        """
+        if target is not None:
+            self._move_pointer(target)
+            self.bf_code.append('+')
+        self._move_pointer(room)
+        # room != 0: room -= 1, stop on room+1 (now 0); room == 0: stay on room
+        self.bf_code.append('[->-]>[<-')
+        self.current_ptr = room
+        on_wrap()
+        self._move_pointer(room)
+        # Both paths end on room+2 (0); restore room+1 to 1 and return to room
+        self.bf_code.append('>->]<+<')
+        self.current_ptr = room
+
+    @cached_snippet('pos_a', 'pos_b', 'pos_res')
     def _perform_sub(self, pos_a, pos_b, pos_res, size=8):
         """Robust multi-byte subtraction using O(256) borrow detection."""
-        ta = self._allocate_temp(size)
-        tb = self._allocate_temp(size)
-        tr = self._allocate_temp(size)
-        borrow = self._allocate_temp(1)
+        tr = self._allocate_temp(size, near=pos_res)
+        borrow = self._allocate_temp(1, near=tr)
         
-        self._copy_block(pos_a, ta, size)
-        self._copy_block(pos_b, tb, size)
         self._generate_clear_block(tr, size)
         self._generate_clear(borrow)
         
         for i in range(size):
             target = tr + i
-            scr = self._allocate_temp(1)
-            self._copy_cell(ta + i, target, scr)
+            scr = self._allocate_temp(1, near=target)
+            self._copy_cell(pos_a + i, target, scr)
             self._free_temp(scr)
             
             # Current borrow bit for this byte
-            nb = self._allocate_temp(1)
+            nb = self._allocate_temp(1, near=target)
             self._generate_clear(nb)
             
             def _on_borrow():
@@ -598,9 +724,9 @@ class ArithOpsMixin:
                 
             self._generate_if_nonzero(borrow, _on_borrow)
             
-            tv = self._allocate_temp(1)
-            s2 = self._allocate_temp(1)
-            self._copy_cell(tb + i, tv, s2)
+            tv = self._allocate_temp(1, near=target)
+            s2 = self._allocate_temp(1, near=target)
+            self._copy_cell(pos_b + i, tv, s2)
             self._free_temp(s2)
             
             self._move_pointer(tv)
@@ -622,10 +748,11 @@ class ArithOpsMixin:
             self.bf_code.append(']')
             self._free_temp(nb)
             
-        self._copy_block(tr, pos_res, size)
-        for x in [borrow, tr, tb, ta]:
+        self._move_block(tr, pos_res, size)
+        for x in [borrow, tr]:
             self._free_temp(x)
 
+    @cached_snippet('pos_a', 'pos_b', 'result_lt', 'result_gt', 'result_eq')
     def _compare_multi_byte_unsigned(self, pos_a, pos_b, result_lt, result_gt, result_eq, size=8):
         """Compare two multi-byte unsigned integers."""
         self._generate_clear(result_lt)
@@ -645,6 +772,7 @@ class ArithOpsMixin:
         for x in [eq, gt, lt]:
             self._free_temp(x)
 
+    @cached_snippet('pos')
     def _shift_left_multi_byte(self, pos, size=8):
         """Compact multi-byte left shift."""
         carry = self._allocate_temp(1)
@@ -654,17 +782,7 @@ class ArithOpsMixin:
 
             # nc = 1 if target >= 128 else 0
             nc = self._allocate_temp(1)
-            self._generate_clear(nc)
-            const128 = self._allocate_temp(1)
-            self._generate_set_value(128, const128)
-            lt = self._allocate_temp(1)
-            gt = self._allocate_temp(1)
-            eq = self._allocate_temp(1)
-            self._compare_bytes_unsigned(target, const128, lt, gt, eq)
-            self._generate_if_nonzero(gt, lambda: self._generate_set_value(1, nc))
-            self._generate_if_nonzero(eq, lambda: self._generate_set_value(1, nc))
-            for x in [eq, gt, lt, const128]:
-                self._free_temp(x)
+            self._byte_sign_flag(target, nc)
 
             # target = (target * 2) + carry
             scr = self._allocate_temp(1)
@@ -709,6 +827,7 @@ class ArithOpsMixin:
                 self._free_temp(x)
         self._free_temp(carry)
 
+    @cached_snippet('pos', 'result_pos')
     def _get_bit_multi_byte(self, pos, bit_idx, result_pos, size=8):
         """Compact bit extraction using BF-side shift loop."""
         byte_idx, bit_in_byte = bit_idx // 8, bit_idx % 8
@@ -729,7 +848,9 @@ class ArithOpsMixin:
             self._move_pointer(q)
             self.bf_code.append('[ - ')
             self._move_pointer(tb)
-            self.bf_code.append('+ ]')
+            self.bf_code.append('+ ')
+            self._move_pointer(q)
+            self.bf_code.append(']')
             for x in [r, q]:
                 self._free_temp(x)
             self._move_pointer(cnt)
@@ -738,10 +859,11 @@ class ArithOpsMixin:
         q = self._allocate_temp(1)
         r = self._allocate_temp(1)
         self._divmod2_cell(tb, q, r)
-        self._copy_cell(r, result_pos, s)
+        self._move_cell(r, result_pos)
         for x in [r, q, s, tb]:
             self._free_temp(x)
 
+    @cached_snippet('pos', 'value_pos')
     def _set_bit_multi_byte(self, pos, bit_idx, value_pos, size=8):
         """Compact bit setting."""
         byte_idx, bit_in_byte = bit_idx // 8, bit_idx % 8
@@ -785,7 +907,7 @@ class ArithOpsMixin:
         q = self._allocate_temp(size)
         r = self._allocate_temp(size)
         self._perform_divmod_multi_byte(pos_a, pos_b, q, r, size=size)
-        self._copy_block(q, pos_result, size)
+        self._move_block(q, pos_result, size)
         for x in [r, q]:
             self._free_temp(x)
 
@@ -794,12 +916,17 @@ class ArithOpsMixin:
         q = self._allocate_temp(size)
         r = self._allocate_temp(size)
         self._perform_divmod_multi_byte(pos_a, pos_b, q, r, size=size)
-        self._copy_block(r, pos_result, size)
+        self._move_block(r, pos_result, size)
         for x in [r, q]:
             self._free_temp(x)
 
-    def _perform_mul_signed(self, pos_a, pos_b, pos_result, size=8, result_size=None):
-        """Perform signed multiplication on multi-byte integers."""
+    def _perform_mul_signed(self, pos_a, pos_b, pos_result, size=8, result_size=None, a_bytes=None, b_bytes=None):
+        """
+        Perform signed multiplication on multi-byte integers.
+
+        a_bytes / b_bytes bound the byte width of each operand's magnitude when
+        it is known at compile time (see _perform_mul).
+        """
         if result_size is None:
             result_size = size
         sa = self._allocate_temp(1)
@@ -809,39 +936,319 @@ class ArithOpsMixin:
         self._get_sign_and_abs(pos_a, sa, ma, size=size)
         self._get_sign_and_abs(pos_b, sb, mb, size=size)
         rm = self._allocate_temp(result_size)
-        self._perform_mul(ma, mb, rm, size=size, result_size=result_size)
+        self._perform_mul(ma, mb, rm, size=size, result_size=result_size, a_bytes=a_bytes, b_bytes=b_bytes)
         rs = self._allocate_temp(1)
         self._bitwise_byte_operation('xor', sa, sb, rs)
         self._apply_sign(rm, rs, pos_result, size=result_size)
         for x in [rs, rm, mb, ma, sb, sa]:
             self._free_temp(x)
 
-    def _perform_mul(self, pos_a, pos_b, pos_result, size=8, result_size=None):
-        """Russian Peasant multiplication with optimized multi-byte loop."""
+    def _perform_mul(self, pos_a, pos_b, pos_result, size=8, result_size=None, a_bytes=None, b_bytes=None,
+                     b_const=None):
+        """
+        Byte-wise schoolbook multiplication: result[i+j..] += a[i] * b[j].
+
+        Each partial product is a native nested cell loop; every unit added to
+        result byte k goes through _add_unit_with_wrap so carries ripple into
+        the higher bytes as they happen. a_bytes / b_bytes give how many low
+        bytes of each operand may be non-zero; byte pairs above that are not
+        emitted at all. With a non-negative compile-time b_const, pos_b is
+        ignored: its bytes become literal loop counts and zero bytes emit nothing.
+        """
         if result_size is None:
             result_size = size
-        ta = self._allocate_temp(result_size)
-        tb = self._allocate_temp(size)
-        tr = self._allocate_temp(result_size)
-        self._generate_clear_block(ta, result_size)
-        self._copy_block(pos_a, ta, size)
-        self._copy_block(pos_b, tb, size)
-        self._generate_clear_block(tr, result_size)
-        for bit in range(size * 8):
-            lsb = self._allocate_temp(1)
-            q = self._allocate_temp(1)
-            r = self._allocate_temp(1)
-            self._copy_cell(tb, lsb, r)
-            self._generate_clear(q)
-            self._generate_clear(r)
-            self._divmod2_cell(lsb, q, r)
-            self._generate_if_nonzero(r, lambda: self._perform_add(tr, ta, tr, size=result_size))
-            self._shift_left_multi_byte(ta, size=result_size)
-            self._shift_right_multi_byte(tb, size=size)
-            for x in [r, q, lsb]:
-                self._free_temp(x)
-        self._copy_block(tr, pos_result, result_size)
-        for x in [tr, tb, ta]:
+        const_bytes = None
+        if b_const is not None:
+            const_bytes = b_const.to_bytes(max(1, (b_const.bit_length() + 7) // 8), 'little')
+            b_bytes = len(const_bytes)
+        a_bytes = size if a_bytes is None else max(0, min(size, a_bytes))
+        b_bytes = size if b_bytes is None else max(0, min(size, b_bytes))
+
+        # Everything touched in the inner loop is kept close together: a local
+        # copy of b, the restore scratch, and the accumulator, where byte k sits
+        # at acc + 4k followed by its (room, 1, 0) triple so the wrap test and
+        # the ripple into byte k+1 stay local.
+        nb = min(b_bytes, result_size)
+        x = self._allocate_temp(1)
+        bc = self._allocate_temp(max(1, nb))
+        scr = self._allocate_temp(1)
+        acc = self._allocate_temp(4 * result_size - 3)
+
+        if const_bytes is None:
+            for j in range(nb):
+                self._copy_cell(pos_b + j, bc + j, scr)
+
+        for k in range(result_size):
+            self._generate_clear(acc + 4 * k)
+            if k < result_size - 1:
+                self._move_pointer(acc + 4 * k + 1)
+                self.bf_code.append('[-]-')
+                self._generate_set_value(1, acc + 4 * k + 2)
+                self._generate_clear(acc + 4 * k + 3)
+
+        def _inc(k):
+            if k == result_size - 1:
+                self._move_pointer(acc + 4 * k)
+                self.bf_code.append('+')
+                return
+            self._add_unit_with_wrap(acc + 4 * k, acc + 4 * k + 1, lambda: _inc(k + 1))
+
+        for i in range(min(a_bytes, result_size)):
+            # x = a[i]; for each unit of x, add every b[j] into result[i+j]
+            self._copy_cell(pos_a + i, x, scr)
+            self._move_pointer(x)
+            self.bf_code.append('[-')
+            for j in range(min(nb, result_size - i)):
+                if const_bytes is not None:
+                    if const_bytes[j]:
+                        self._generate_set_value(const_bytes[j], scr)
+                        self._move_pointer(scr)
+                        self.bf_code.append('[-')
+                        _inc(i + j)
+                        self._move_pointer(scr)
+                        self.bf_code.append(']')
+                    continue
+                self._generate_clear(scr)
+                self._move_pointer(bc + j)
+                self.bf_code.append('[-')
+                self._move_pointer(scr)
+                self.bf_code.append('+')
+                _inc(i + j)
+                self._move_pointer(bc + j)
+                self.bf_code.append(']')
+                self._move_pointer(scr)
+                self.bf_code.append('[')
+                self._move_pointer(bc + j)
+                self.bf_code.append('+')
+                self._move_pointer(scr)
+                self.bf_code.append('-]')
+            self._move_pointer(x)
+            self.bf_code.append(']')
+
+        # Operands were only read, so the result can be moved out even if it aliases them
+        for k in range(result_size):
+            self._generate_clear(pos_result + k)
+            self._move_pointer(acc + 4 * k)
+            self.bf_code.append('[')
+            self._move_pointer(pos_result + k)
+            self.bf_code.append('+')
+            self._move_pointer(acc + 4 * k)
+            self.bf_code.append('-]')
+
+        for t in [acc, scr, bc, x]:
+            self._free_temp(t)
+
+    def _init_countdown(self, room, start):
+        """Set up a (room, 1, 0) triple for _add_unit_with_wrap with room = start."""
+        self._generate_set_value(start, room)
+        self._generate_set_value(1, room + 1)
+        self._generate_clear(room + 2)
+
+    def _take_countdown(self, room, start, pos_out):
+        """pos_out = start - room (units counted so far); room is reset to start."""
+        self._generate_set_value(start, pos_out)
+        self._move_pointer(room)
+        self.bf_code.append('[-')
+        self._move_pointer(pos_out)
+        self.bf_code.append('-')
+        self._move_pointer(room)
+        self.bf_code.append(']')
+        self.bf_code.append('+' * start)
+
+    @staticmethod
+    def _split_byte_divisor(value):
+        """Split |value| into (d, shift) with |value| == d * 256**shift and d < 256, or None."""
+        mag = abs(int(value))
+        if mag == 0:
+            return None
+        shift = 0
+        while mag % 256 == 0:
+            mag //= 256
+            shift += 1
+        if mag > 255:
+            return None
+        return mag, shift
+
+    def _perform_mul_const(self, pos_a, value, pos_result, size=8, a_bytes=None):
+        """
+        pos_result = pos_a * value for a compile-time value, wrapped to `size` bytes.
+
+        A power-of-two multiplier is a shift of the raw two's-complement bytes.
+        Any other multiplier runs the schoolbook loops on |a| with the constant's
+        bytes as literal loop counts, so b is never loaded or sign-split.
+        """
+        mag = abs(int(value)) & ((1 << (8 * size)) - 1)
+        if mag == 0:
+            self._generate_clear_block(pos_result, size)
+            return
+
+        t = self._allocate_temp(size)
+        sign = self._allocate_temp(1)
+        if mag & (mag - 1) == 0:
+            src = self._allocate_temp(size)
+            self._copy_block(pos_a, src, size)
+            self._shift_left_bits_const(src, mag.bit_length() - 1, t, size=size)
+            self._free_temp(src)
+            self._generate_set_value(1 if value < 0 else 0, sign)
+            self._apply_sign(t, sign, pos_result, size=size)
+        else:
+            ma = self._allocate_temp(size)
+            self._get_sign_and_abs(pos_a, sign, ma, size=size)
+            self._perform_mul(ma, None, t, size=size, a_bytes=a_bytes, b_const=mag)
+            self._free_temp(ma)
+            if value < 0:
+                flipped = self._allocate_temp(1)
+                self._generate_set_value(1, flipped)
+                self._generate_if_nonzero(sign, lambda: self._generate_clear(flipped))
+                self._apply_sign(t, flipped, pos_result, size=size)
+                self._free_temp(flipped)
+            else:
+                self._apply_sign(t, sign, pos_result, size=size)
+        self._free_temp(sign)
+        self._free_temp(t)
+
+    def _shift_left_bits_const(self, pos_src, bits, pos_dst, size=8):
+        """
+        pos_dst = pos_src << bits, wrapped to `size` bytes. pos_src is consumed.
+
+        Whole bytes are plain moves. For the remaining r bits each byte is
+        split by one counting pass into x = hi * 2**(8-r) + lo: lo << r lands in
+        the same byte and hi in the next one. The two parts occupy disjoint
+        bits, so they are added without any carry handling.
+        """
+        byte_shift, r = divmod(bits, 8)
+        self._generate_clear_block(pos_dst, size)
+        if r == 0:
+            for i in range(size - byte_shift):
+                self._add_into_destructive(pos_src + i, pos_dst + i + byte_shift)
+        else:
+            d = 1 << (8 - r)
+            room = self._allocate_temp(3)
+            lo = self._allocate_temp(1)
+            self._init_countdown(room, d - 1)
+            for i in range(size - byte_shift):
+                out = pos_dst + i + byte_shift
+
+                def _on_wrap(hi=(out + 1 if out + 1 < pos_dst + size else None)):
+                    if hi is not None:
+                        self._move_pointer(hi)
+                        self.bf_code.append('+')
+                    self._move_pointer(room)
+                    self.bf_code.append('+' * d)
+
+                self._move_pointer(pos_src + i)
+                self.bf_code.append('[-')
+                self._add_unit_with_wrap(None, room, _on_wrap)
+                self._move_pointer(pos_src + i)
+                self.bf_code.append(']')
+
+                self._take_countdown(room, d - 1, lo)
+                self._move_pointer(lo)
+                self.bf_code.append('[-')
+                self._move_pointer(out)
+                self.bf_code.append('+' * (1 << r))
+                self._move_pointer(lo)
+                self.bf_code.append(']')
+            self._generate_clear(room)
+            self._generate_clear(room + 1)
+            self._free_temp(lo)
+            self._free_temp(room)
+        for i in range(size - byte_shift, size):
+            self._generate_clear(pos_src + i)
+
+    def _divmod_const_unsigned(self, pos_a, divisor, pos_q, pos_r, size=8):
+        """
+        pos_q = a // divisor, pos_r = a % divisor for a compile-time divisor
+        accepted by _split_byte_divisor. pos_a is consumed.
+
+        Whole zero bytes of the divisor are byte moves. The remaining d < 256
+        is one top-down pass of long division by a single byte: every unit of
+        a[i] counts down a (room, 1, 0) triple holding d - 1 - rem, and each
+        wrap adds one to q[i]. The remainder carried into the next byte is
+        worth rem * 256 = rem * (256 // d) * d + rem * (256 % d), so it adds
+        rem * (256 // d) to that quotient byte directly and feeds only
+        rem * (256 % d) further units.
+        """
+        d, shift = self._split_byte_divisor(divisor)
+        self._generate_clear_block(pos_q, size)
+        self._generate_clear_block(pos_r, size)
+        for i in range(min(shift, size)):
+            self._add_into_destructive(pos_a + i, pos_r + i)
+        if shift >= size:
+            return
+        if d == 1:
+            for i in range(shift, size):
+                self._add_into_destructive(pos_a + i, pos_q + i - shift)
+            return
+
+        carry_q, carry_units = divmod(256, d)
+        room = self._allocate_temp(3)
+        cnt = self._allocate_temp(1)
+        units = self._allocate_temp(1)
+        self._init_countdown(room, d - 1)
+        for i in reversed(range(shift, size)):
+            qi = pos_q + i - shift
+
+            def _on_wrap(qi=qi):
+                self._move_pointer(qi)
+                self.bf_code.append('+')
+                self._move_pointer(room)
+                self.bf_code.append('+' * d)
+
+            def _feed_unit():
+                self._add_unit_with_wrap(None, room, _on_wrap)
+
+            if i < size - 1:
+                self._take_countdown(room, d - 1, cnt)
+                self._move_pointer(cnt)
+                self.bf_code.append('[-')
+                self._move_pointer(qi)
+                self.bf_code.append('+' * carry_q)
+                if carry_units:
+                    self._generate_set_value(carry_units, units)
+                    self._move_pointer(units)
+                    self.bf_code.append('[-')
+                    _feed_unit()
+                    self._move_pointer(units)
+                    self.bf_code.append(']')
+                self._move_pointer(cnt)
+                self.bf_code.append(']')
+
+            self._move_pointer(pos_a + i)
+            self.bf_code.append('[-')
+            _feed_unit()
+            self._move_pointer(pos_a + i)
+            self.bf_code.append(']')
+
+        self._take_countdown(room, d - 1, pos_r + shift)
+        self._generate_clear(room)
+        self._generate_clear(room + 1)
+        for x in [units, cnt, room]:
+            self._free_temp(x)
+
+    def _perform_divmod_const_signed(self, pos_a, divisor, pos_q, pos_r, size=8):
+        """
+        Signed truncating divmod by a compile-time divisor accepted by
+        _split_byte_divisor. Either pos_q or pos_r may be None.
+        """
+        sa = self._allocate_temp(1)
+        ma = self._allocate_temp(size)
+        qm = self._allocate_temp(size)
+        rm = self._allocate_temp(size)
+        self._get_sign_and_abs(pos_a, sa, ma, size=size)
+        self._divmod_const_unsigned(ma, divisor, qm, rm, size=size)
+        if pos_r is not None:
+            self._apply_sign(rm, sa, pos_r, size=size)
+        if pos_q is not None:
+            if divisor < 0:
+                qs = self._allocate_temp(1)
+                self._generate_set_value(1, qs)
+                self._generate_if_nonzero(sa, lambda: self._generate_clear(qs))
+                self._apply_sign(qm, qs, pos_q, size=size)
+                self._free_temp(qs)
+            else:
+                self._apply_sign(qm, sa, pos_q, size=size)
+        for x in [rm, qm, ma, sa]:
             self._free_temp(x)
 
     def _perform_div_signed(self, pos_a, pos_b, pos_res, size=8, a_size=None):
@@ -851,7 +1258,7 @@ class ArithOpsMixin:
         q = self._allocate_temp(a_size)
         r = self._allocate_temp(size)
         self._perform_divmod_signed(pos_a, pos_b, q, r, size=size, a_size=a_size)
-        self._copy_block(q, pos_res, a_size)
+        self._move_block(q, pos_res, a_size)
         for x in [r, q]:
             self._free_temp(x)
 
@@ -860,7 +1267,7 @@ class ArithOpsMixin:
         q = self._allocate_temp(size)
         r = self._allocate_temp(size)
         self._perform_divmod_signed(pos_a, pos_b, q, r, size=size)
-        self._copy_block(r, pos_res, size)
+        self._move_block(r, pos_res, size)
         for x in [r, q]:
             self._free_temp(x)
 
@@ -888,34 +1295,44 @@ class ArithOpsMixin:
         """Standard bit-by-bit long division using BF-side shift loop."""
         if a_size is None:
             a_size = size
+        if self._can_call_shared_routine('_divmod_multi_byte_body', (size, a_size)):
+            self._call_shared_routine(
+                '_divmod_multi_byte_body', (size, a_size),
+                [(pos_a, a_size), (pos_b, size)], [(pos_q, a_size), (pos_r, size)],
+            )
+            return
+        self._divmod_multi_byte_body(pos_a, pos_b, pos_q, pos_r, size, a_size)
+
+    @cached_snippet('pos_a', 'pos_b', 'pos_q', 'pos_r')
+    def _divmod_multi_byte_body(self, pos_a, pos_b, pos_q, pos_r, size, a_size):
         self._generate_clear_block(pos_q, a_size)
         self._generate_clear_block(pos_r, size)
         
-        izb = self._allocate_temp(1)
+        izb = self._allocate_temp(1, near=pos_b)
         self._generate_set_value(1, izb)
         for i in range(size):
             self._generate_if_nonzero(pos_b + i, lambda: self._generate_clear(izb))
             
-        nzb = self._allocate_temp(1)
+        nzb = self._allocate_temp(1, near=izb)
         self._generate_set_value(1, nzb)
         self._generate_if_nonzero(izb, lambda: self._generate_clear(nzb))
         
         def _div_logic():
-            ta = self._allocate_temp(a_size)
+            ta = self._allocate_temp(a_size, near=pos_a)
             self._copy_block(pos_a, ta, a_size)
             for bit in reversed(range(a_size * 8)):
                 self._shift_left_multi_byte(pos_r, size)
-                bv = self._allocate_temp(1)
+                bv = self._allocate_temp(1, near=pos_r)
                 self._get_bit_multi_byte(ta, bit, bv, size=a_size)
                 self._generate_if_nonzero(bv, lambda: (self._move_pointer(pos_r), self.bf_code.append('+')))
                 self._free_temp(bv)
                 
-                lt = self._allocate_temp(1)
-                gt = self._allocate_temp(1)
-                eq = self._allocate_temp(1)
+                lt = self._allocate_temp(1, near=pos_r)
+                gt = self._allocate_temp(1, near=pos_r)
+                eq = self._allocate_temp(1, near=pos_r)
                 self._compare_multi_byte_unsigned(pos_r, pos_b, lt, gt, eq, size=size)
                 
-                not_lt = self._allocate_temp(1)
+                not_lt = self._allocate_temp(1, near=pos_r)
                 self._generate_set_value(1, not_lt)
                 self._generate_if_nonzero(lt, lambda: self._generate_clear(not_lt))
                 
@@ -940,29 +1357,16 @@ class ArithOpsMixin:
         self._generate_clear(sign_pos)
         self._copy_block(pos, abs_pos, size)
         
-        t128 = self._allocate_temp(1)
-        lt = self._allocate_temp(1)
-        gt = self._allocate_temp(1)
-        eq = self._allocate_temp(1)
-        
-        self._generate_set_value(128, t128)
-        self._compare_bytes_unsigned(pos + size - 1, t128, lt, gt, eq)
-        
         ge128 = self._allocate_temp(1)
-        self._generate_set_value(1, ge128)
-        self._generate_if_nonzero(lt, lambda: self._generate_clear(ge128))
+        self._byte_sign_flag(pos + size - 1, ge128)
         
         def _to_abs():
             self._generate_set_value(1, sign_pos)
-            tn = self._allocate_temp(size)
-            self._perform_bitwise_not(abs_pos, tn, size=size)
-            self._copy_block(tn, abs_pos, size)
-            self._free_temp(tn)
+            self._perform_bitwise_not(abs_pos, abs_pos, size=size)
             self._increment_multi_byte(abs_pos, size=size)
             
         self._generate_if_nonzero(ge128, _to_abs)
-        for x in [ge128, eq, gt, lt, t128]:
-            self._free_temp(x)
+        self._free_temp(ge128)
 
     def _apply_sign(self, mag_pos, sign_pos, res_pos, size=8):
         """Apply sign to magnitude to get signed result."""
@@ -1101,86 +1505,14 @@ class ArithOpsMixin:
             self._generate_if_nonzero(borrow, _step)
         self._free_temp(borrow)
 
+    @cached_snippet('pos_in', 'pos_quotient', 'rem_pos')
     def _divmod10_multi_byte(self, pos_in, pos_quotient, rem_pos, size=8):
-        """Standard long division by 10 for multi-byte output."""
-        self._generate_clear_block(pos_quotient, size)
-        self._generate_clear(rem_pos)
-        
-        # Working buffer
+        """Long division by 10 for multi-byte output; rem_pos is a single byte."""
         temp_val = self._allocate_temp(size)
+        r = self._allocate_temp(size)
         self._copy_block(pos_in, temp_val, size)
-        
-        for i in reversed(range(size)):
-            # 1. Carry from previous byte
-            if i < size - 1:
-                # new_val = rem * 256 + current_byte
-                # new_val // 10 = (rem * 25) + (current_byte + rem * 6) // 10
-                # new_val % 10 = (current_byte + rem * 6) % 10
-                r_val = self._allocate_temp(1)
-                s = self._allocate_temp(1)
-                self._copy_cell(rem_pos, r_val, s)
-                self._free_temp(s)
-                
-                self._move_pointer(r_val)
-                self.bf_code.append('[ - ')
-                for _ in range(25):
-                    self._move_pointer(pos_quotient + i)
-                    self.bf_code.append('+')
-                for _ in range(6):
-                    self._move_pointer(temp_val + i)
-                    self.bf_code.append('+')
-                self._move_pointer(r_val)
-                self.bf_code.append(']')
-                self._free_temp(r_val)
-                self._generate_clear(rem_pos)
-
-            # 2. Single-byte divmod 10 on the accumulated value
-            # while temp_val[i] >= 10: temp_val[i] -= 10, pos_quotient[i]++
-            # then rem_pos = temp_val[i]
-            t1 = self._allocate_temp(1)
-            t2 = self._allocate_temp(1)
-            
-            self._move_pointer(temp_val + i)
-            self.bf_code.append('[')
-            
-            # Check if value >= 10
-            self._generate_clear(t1)
-            self._generate_clear(t2)
-            
-            # Use a more direct check for >= 10 to be efficient
-            # if val >= 10: val -= 10, quot++
-            # else: rem = val, val = 0 (break)
-            is_ge_10 = self._allocate_temp(1)
-            lt, gt, eq = self._allocate_temp(1), self._allocate_temp(1), self._allocate_temp(1)
-            c9 = self._allocate_temp(1)
-            self._generate_set_value(9, c9)
-            self._compare_bytes_unsigned(temp_val + i, c9, lt, gt, eq)
-            
-            self._generate_clear(is_ge_10)
-            self._generate_if_nonzero(gt, lambda: self._generate_set_value(1, is_ge_10))
-            self._generate_if_nonzero(eq, lambda: None)
-            
-            def _on_ge():
-                self._move_pointer(temp_val + i)
-                self.bf_code.append('----------')
-                self._move_pointer(pos_quotient + i)
-                self.bf_code.append('+')
-                
-            def _on_lt():
-                sc = self._allocate_temp(1)
-                self._copy_cell(temp_val + i, rem_pos, sc)
-                self._free_temp(sc)
-                self._generate_clear(temp_val + i)
-                
-            self._generate_if_nonzero(is_ge_10, _on_ge, body_fn_else=_on_lt)
-            
-            for x in [c9, eq, gt, lt, is_ge_10]:
-                self._free_temp(x)
-                
-            self._move_pointer(temp_val + i)
-            self.bf_code.append(']')
-            
-            self._free_temp(t2)
-            self._free_temp(t1)
-            
+        self._divmod_const_unsigned(temp_val, 10, pos_quotient, r, size=size)
+        self._generate_clear(rem_pos)
+        self._add_into_destructive(r, rem_pos)
+        self._free_temp(r)
         self._free_temp(temp_val)
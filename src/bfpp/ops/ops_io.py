@@ -1,5 +1,74 @@
 from __future__ import annotations
 
+import functools
+
+# Most working cells a literal printer seeds, and the loop counts it tries
+_LITERAL_MAX_CELLS = 4
+_LITERAL_FACTORS = range(4, 17)
+
+
+def _delta_cost(a, b):
+    d = (b - a) % 256
+    return min(d, 256 - d)
+
+
+def _walk_literal(codes, seeds, start):
+    """
+    Greedy cell choice for printing `codes` from cells holding `seeds`.
+
+    Each character goes to the cell that is cheapest to reach and adjust
+    from the pointer's position. Returns the (cell, code) steps and their
+    cost in BF instructions.
+    """
+    values = list(seeds)
+    at = start
+    cost = 0
+    steps = []
+    for code in codes:
+        best = min(range(len(values)), key=lambda i: abs(at - i) + _delta_cost(values[i], code))
+        cost += abs(at - best) + _delta_cost(values[best], code) + 1
+        values[best] = code
+        at = best
+        steps.append((best, code))
+    return steps, cost
+
+
+def _cluster(codes, k):
+    """1-D k-means centers of `codes`, started from quantiles."""
+    ordered = sorted(codes)
+    centers = [ordered[(2 * i + 1) * len(ordered) // (2 * k)] for i in range(k)]
+    for _ in range(5):
+        groups = [[] for _ in centers]
+        for code in ordered:
+            groups[min(range(k), key=lambda i: abs(code - centers[i]))].append(code)
+        centers = [sum(g) // len(g) if g else c for g, c in zip(groups, centers)]
+    return centers
+
+
+@functools.lru_cache(maxsize=1024)
+def plan_literal_cells(codes):
+    """
+    Choose working cells for printing the byte values `codes`.
+
+    Returns (factor, multipliers): the printer seeds cell i with
+    factor * multipliers[i] in one loop, then moves between the cells
+    emitting +/- deltas. A single unseeded cell, (0, (0,)), is the plain
+    delta encoding; seeded plans win when the characters cluster around a
+    few values, as letters, digits and punctuation do.
+    """
+    best_plan = (0, (0,))
+    best_cost = _walk_literal(codes, [0], 0)[1]
+    for k in range(1, min(_LITERAL_MAX_CELLS, len(set(codes))) + 1):
+        centers = _cluster(codes, k)
+        for factor in _LITERAL_FACTORS:
+            mults = tuple(min(255 // factor, round(c / factor)) for c in centers)
+            # Loop counter, brackets and decrement, the seeds, moves there and back
+            seed_cost = factor + 3 + sum(mults) + 2 * k
+            cost = seed_cost + _walk_literal(codes, [factor * m for m in mults], k)[1]
+            if cost < best_cost:
+                best_plan, best_cost = (factor, mults), cost
+    return best_plan
+
 
 class IOMixin:
     # ===== Literal / string output helpers =====
@@ -44,18 +113,46 @@ class IOMixin:
 
     def _output_literal(self, token):
         # Output a literal token (string or numeric byte) to stdout.
-        temp = self._allocate_temp()
         if token.startswith('"') and token.endswith('"'):
-            s = self._decode_string_escapes(token[1:-1])
-            for ch in s:
-                self._generate_set_value(ord(ch), temp)
-                self.bf_code.append('.')
-                self._generate_clear(temp)
+            codes = tuple(ord(ch) % 256 for ch in self._decode_string_escapes(token[1:-1]))
         else:
-            self._generate_set_value(int(token), temp)
+            codes = (int(token) % 256,)
+        self._output_byte_string(codes)
+
+    def _output_byte_string(self, codes):
+        # Working cells seeded by one multiplication loop (see
+        # plan_literal_cells); each character is a +/- delta from the value
+        # its cell printed last.
+        if not codes:
+            return
+        factor, mults = plan_literal_cells(codes)
+        k = len(mults)
+        seeded = factor > 0
+        cells = self._allocate_temp(k + 1 if seeded else k)
+        for i in range(k + 1 if seeded else k):
+            self._generate_clear(cells + i)
+        if seeded:
+            counter = cells + k
+            self._generate_set_value(factor, counter)
+            self.bf_code.append('[')
+            for i in range(k):
+                self._move_pointer(cells + i)
+                self.bf_code.append('+' * mults[i])
+            self._move_pointer(counter)
+            self.bf_code.append('-]')
+
+        values = [factor * m for m in mults]
+        steps, _ = _walk_literal(codes, values, k if seeded else 0)
+        for i, code in steps:
+            self._move_pointer(cells + i)
+            d = (code - values[i]) % 256
+            self.bf_code.append('+' * d if d <= 128 else '-' * (256 - d))
             self.bf_code.append('.')
-            self._generate_clear(temp)
-        self._free_temp(temp)
+            values[i] = code
+
+        for i in range(k):
+            self._generate_clear(cells + i)
+        self._free_temp(cells)
 
     def _output_string_until_null_deterministic(self, pos, size):
         # Deterministic pointer-safe string output (max length = size-1)
@@ -105,6 +202,15 @@ class IOMixin:
         self._free_temp(gate)
         self._free_temp(stop)
 
+    def _output_string_in_frame(self, pos):
+        # String element reached through an index frame: the cell before it is
+        # the frame's last payload cell, which is zero there, so a scan can
+        # print up to the null and walk back without temps. The last cell of a
+        # string is always its null.
+        self._move_pointer(pos)
+        self.bf_code.append('[.>]<[<]')
+        self._rebase_pointer(pos - 1)
+
     # ===== Input =====
 
     def _input_string_at_pos(self, pos, size):
@@ -134,6 +240,45 @@ class IOMixin:
         self._generate_clear(pos + size - 1)
         self._free_temp(stop)
 
+    def _input_string_in_frame(self, pos, size, frame):
+        # _input_string_at_pos for a string element reached through an index
+        # frame, which must not touch cells outside the collection: the frame's
+        # step counter and first four payload cells are zero there and serve as
+        # the temps.
+        stop, gate, scratch, char_tmp, flag = frame + 1, frame + 3, frame + 4, frame + 5, frame + 6
+        self._generate_set_value(1, stop)
+
+        def _if_char_is(i, value, body_fn):
+            self._copy_cell(pos + i, char_tmp, scratch)
+            self._move_pointer(char_tmp)
+            self.bf_code.append('-' * value)
+            self._generate_set_value(1, flag)
+            self._move_pointer(char_tmp)
+            self.bf_code.append('[')
+            self._generate_clear(flag)
+            self._generate_clear(char_tmp)
+            self.bf_code.append(']')
+            self._move_pointer(flag)
+            self.bf_code.append('[')
+            body_fn()
+            self._generate_clear(flag)
+            self.bf_code.append(']')
+
+        for i in range(size - 1):
+            self._copy_cell(stop, gate, scratch)
+            self._move_pointer(gate)
+            self.bf_code.append('[')
+            self._move_pointer(pos + i)
+            self.bf_code.append(',')
+            # A newline is not stored; it then reads as the end of input
+            _if_char_is(i, 10, lambda i=i: self._generate_clear(pos + i))
+            _if_char_is(i, 0, lambda: self._generate_clear(stop))
+            self._generate_clear(gate)
+            self.bf_code.append(']')
+
+        self._generate_clear(pos + size - 1)
+        self._generate_clear(stop)
+
     def _handle_input(self, tokens):
         if not tokens:
             raise ValueError("input on requires a variable reference")
@@ -146,6 +291,21 @@ class IOMixin:
             if not (base_info.get('is_array') or base_info.get('is_dict')):
                 raise ValueError("Runtime subscript target must be array or dict")
 
+            if base_info['type'] == 'string':
+                elem_size = base_info['elem_size']
+                if base_info.get('frame') is not None and elem_size >= 4:
+                    def _slot_in_string(pos, slot):
+                        self._input_string_in_frame(pos, elem_size, base_info['frame'])
+
+                    self._apply_runtime_subscript_in_frame(base_info, idx_var, _slot_in_string)
+                    return
+
+                def _elem_in(pos):
+                    self._input_string_at_pos(pos, elem_size)
+
+                self._apply_runtime_subscript_buffered(base_info, idx_var, _elem_in, load=False)
+                return
+
             def _slot_in(pos, slot):
                 if base_info['type'] in ('byte', 'char'):
                     self._move_pointer(pos)
@@ -156,14 +316,12 @@ class IOMixin:
                         self._generate_clear(pos + j)
                     self._move_pointer(pos)
                     self.bf_code.append(',')
-                elif base_info['type'] == 'string':
-                    self._input_string_at_pos(pos, base_info['elem_size'])
                 else:
                     raise NotImplementedError(
                         f"input on not implemented for runtime collection type {base_info['type']}"
                     )
 
-            self._apply_runtime_subscript_op(base_info, idx_var, _slot_in)
+            self._apply_runtime_subscript_in_frame(base_info, idx_var, _slot_in)
             return
 
         var_info = self._resolve_var(var_ref)
@@ -205,8 +363,6 @@ class IOMixin:
         stop = self._allocate_temp()       # loop flag
         digit = self._allocate_temp()      # 0..9
         is_digit = self._allocate_temp()   # 1 when digit matched
-        tmp = self._allocate_temp()        # general temp
-        scratch = self._allocate_temp()    # general temp
 
         self._generate_clear(sign)
         self._generate_clear(value)
@@ -249,26 +405,16 @@ class IOMixin:
                 self._generate_if_byte_equals(c, asc, _set_d)
 
             def _apply_digit():
-                # value = value * 10 + digit
+                # value = value * 10 + digit; digit is re-read every round
                 orig = self._allocate_temp()
-                t2 = self._allocate_temp()
-                self._generate_clear(t2)
-                self._copy_cell(value, orig, t2)
-
-                self._generate_clear(value)
-                counter = self._allocate_temp()
-                self._generate_set_value(10, counter)
-                self._move_pointer(counter)
-                self.bf_code.append('[')
-                self.bf_code.append('-')
-                self._add_cell(orig, value, tmp)
-                self._move_pointer(counter)
+                self._move_cell(value, orig)
+                self._move_pointer(orig)
+                self.bf_code.append('[-')
+                self._move_pointer(value)
+                self.bf_code.append('+' * 10)
+                self._move_pointer(orig)
                 self.bf_code.append(']')
-                self._free_temp(counter)
-
-                self._add_cell(digit, value, tmp)
-
-                self._free_temp(t2)
+                self._add_into_destructive(digit, value)
                 self._free_temp(orig)
 
             self._generate_if_nonzero(is_digit, _apply_digit)
@@ -287,20 +433,15 @@ class IOMixin:
         # Store into destination int (little-endian). Clear whole int first.
         for i in range(elem_size):
             self._generate_clear(dest + i)
-        self._add_cell(value, dest, tmp)
+        self._add_into_destructive(value, dest)
 
         # Apply sign (two's complement) if needed.
         def _apply_sign():
-            tmp_block = self._allocate_temp(elem_size)
-            self._copy_block(dest, tmp_block, elem_size)
-            self._perform_bitwise_not(tmp_block, dest, size=elem_size)
-            self._free_temp(tmp_block)
+            self._perform_bitwise_not(dest, dest, size=elem_size)
             self._increment_multi_byte(dest, size=elem_size)
 
         self._generate_if_nonzero(sign, _apply_sign)
 
-        self._free_temp(scratch)
-        self._free_temp(tmp)
         self._free_temp(is_digit)
         self._free_temp(digit)
         self._free_temp(stop)
@@ -328,8 +469,6 @@ class IOMixin:
         frac3 = self._allocate_temp()
         digit = self._allocate_temp()
         is_digit = self._allocate_temp()
-        tmp = self._allocate_temp()
-        scratch = self._allocate_temp()
 
         low = self._allocate_temp()
         high = self._allocate_temp()
@@ -383,21 +522,14 @@ class IOMixin:
 
             def _apply_digit():
                 orig = self._allocate_temp()
-                t2 = self._allocate_temp()
-                self._generate_clear(t2)
-                self._copy_cell(int_part, orig, t2)
-                self._generate_clear(int_part)
-                counter = self._allocate_temp()
-                self._generate_set_value(10, counter)
-                self._move_pointer(counter)
-                self.bf_code.append('[')
-                self.bf_code.append('-')
-                self._add_cell(orig, int_part, tmp)
-                self._move_pointer(counter)
+                self._move_cell(int_part, orig)
+                self._move_pointer(orig)
+                self.bf_code.append('[-')
+                self._move_pointer(int_part)
+                self.bf_code.append('+' * 10)
+                self._move_pointer(orig)
                 self.bf_code.append(']')
-                self._free_temp(counter)
-                self._add_cell(digit, int_part, tmp)
-                self._free_temp(t2)
+                self._add_into_destructive(digit, int_part)
                 self._free_temp(orig)
 
             self._generate_if_nonzero(is_digit, _apply_digit)
@@ -432,7 +564,7 @@ class IOMixin:
                     self._generate_if_byte_equals(c, asc, _set_d)
 
                 def _store():
-                    self._copy_cell(digit, dst, scratch)
+                    self._move_cell(digit, dst)
 
                 self._generate_if_nonzero(is_digit, _store)
 
@@ -468,30 +600,22 @@ class IOMixin:
             self._move_pointer(high)
             self.bf_code.append('+++')
 
-        # Add int_part * 1000
-        counter_int = self._allocate_temp()
-        self._generate_clear(scratch)
-        self._copy_cell(int_part, counter_int, scratch)
-        self._move_pointer(counter_int)
+        # Add int_part * 1000, counting int_part itself down
+        self._move_pointer(int_part)
         self.bf_code.append('[')
         self.bf_code.append('-')
         _add_1000()
-        self._move_pointer(counter_int)
+        self._move_pointer(int_part)
         self.bf_code.append(']')
-        self._free_temp(counter_int)
 
-        # Add frac1*100 + frac2*10 + frac3
+        # Add frac1*100 + frac2*10 + frac3, consuming the digits
         def _add_digit_times(dst_digit, base):
-            cnt = self._allocate_temp()
-            self._generate_clear(scratch)
-            self._copy_cell(dst_digit, cnt, scratch)
-            self._move_pointer(cnt)
+            self._move_pointer(dst_digit)
             self.bf_code.append('[')
             self.bf_code.append('-')
             _add_const_n(base)
-            self._move_pointer(cnt)
+            self._move_pointer(dst_digit)
             self.bf_code.append(']')
-            self._free_temp(cnt)
 
         _add_digit_times(frac1, 100)
         _add_digit_times(frac2, 10)
@@ -501,14 +625,11 @@ class IOMixin:
         for i in range(8):
             self._generate_clear(dest + i)
 
-        self._copy_cell(low, dest + 0, scratch)
-        self._copy_cell(high, dest + 1, scratch)
+        self._move_cell(low, dest + 0)
+        self._move_cell(high, dest + 1)
 
         def _apply_sign():
-            tmp_block = self._allocate_temp(8)
-            self._copy_block(dest, tmp_block, 8)
-            self._perform_bitwise_not(tmp_block, dest)
-            self._free_temp(tmp_block)
+            self._perform_bitwise_not(dest, dest)
             self._increment_multi_byte(dest)
 
         self._generate_if_nonzero(sign, _apply_sign)
@@ -519,8 +640,6 @@ class IOMixin:
 
         self._free_temp(high)
         self._free_temp(low)
-        self._free_temp(scratch)
-        self._free_temp(tmp)
         self._free_temp(is_digit)
         self._free_temp(digit)
         self._free_temp(frac3)
@@ -541,14 +660,7 @@ class IOMixin:
     def _handle_print_string(self, tokens):
         if tokens and tokens[0].startswith('"'):
             string_val = self._decode_string_escapes(tokens[0].strip('"'))
-            temp = self._allocate_temp()
-
-            for char in string_val:
-                self._generate_set_value(ord(char), temp)
-                self.bf_code.append('.')
-                self._generate_clear(temp)
-
-            self._free_temp(temp)
+            self._output_byte_string(tuple(ord(ch) % 256 for ch in string_val))
 
     def _handle_varout(self, tokens):
         if not tokens:
@@ -577,24 +689,34 @@ class IOMixin:
             if not (base_info.get('is_array') or base_info.get('is_dict')):
                 raise ValueError("Runtime subscript target must be array or dict")
 
-            def _slot_out(pos, slot):
-                if base_info['type'] in ('byte', 'char'):
+            if base_info['type'] in ('byte', 'char'):
+                def _slot_out(pos, slot):
                     self._move_pointer(pos)
                     self.bf_code.append('.')
-                elif base_info['type'] in ('int', 'int16', 'int64'):
-                    self._output_int_as_decimal(pos, size=base_info['elem_size'])
-                elif base_info['type'] in ('float', 'float64'):
-                    self._output_float_as_decimal_1000(pos)
-                elif base_info['type'] == 'expfloat':
-                    self._output_float_as_decimal_1000(pos)
-                elif base_info['type'] == 'string':
-                    self._output_string_until_null_deterministic(pos, base_info['elem_size'])
-                else:
-                    raise NotImplementedError(
-                        f"varout not implemented for runtime collection type {base_info['type']}"
-                    )
 
-            self._apply_runtime_subscript_op(base_info, idx_var, _slot_out)
+                self._apply_runtime_subscript_in_frame(base_info, idx_var, _slot_out)
+            elif base_info['type'] == 'string':
+                def _slot_out_string(pos, slot):
+                    if slot is None:
+                        self._output_string_in_frame(pos)
+                    else:
+                        self._output_string_until_null_deterministic(pos, base_info['elem_size'])
+
+                self._apply_runtime_subscript_in_frame(base_info, idx_var, _slot_out_string)
+            else:
+                def _elem_out(pos):
+                    if base_info['type'] in ('int', 'int16', 'int64'):
+                        self._output_int_as_decimal(pos, size=base_info['elem_size'])
+                    elif base_info['type'] in ('float', 'float64'):
+                        self._output_float_as_decimal_1000(pos)
+                    elif base_info['type'] == 'expfloat':
+                        self._output_float_as_decimal_1000(pos)
+                    else:
+                        raise NotImplementedError(
+                            f"varout not implemented for runtime collection type {base_info['type']}"
+                        )
+
+                self._apply_runtime_subscript_buffered(base_info, idx_var, _elem_out, store=False)
             if end_token is not None:
                 self._output_literal(end_token)
             return
@@ -696,22 +818,14 @@ class IOMixin:
         is_neg = self._allocate_temp(1)
         self._generate_clear(is_neg)
 
-        flag_ge128 = self._allocate_temp(1)
-        self._generate_clear(flag_ge128)
-        for v in range(128, 256):
-            self._generate_if_byte_equals(msb, v, lambda: self._generate_set_value(1, flag_ge128))
-        self._generate_if_nonzero(flag_ge128, lambda: self._generate_set_value(1, is_neg))
-        self._free_temp(flag_ge128)
+        self._byte_sign_flag(msb, is_neg)
 
         mag = self._allocate_temp(size)
         self._copy_block(pos, mag, size)
 
         def _apply_abs():
             self._output_literal('"-"')
-            tmp_not = self._allocate_temp(size)
-            self._perform_bitwise_not(mag, tmp_not, size=size)
-            self._copy_block(tmp_not, mag, size)
-            self._free_temp(tmp_not)
+            self._perform_bitwise_not(mag, mag, size=size)
             self._increment_multi_byte(mag, size=size)
 
         self._generate_if_nonzero(is_neg, _apply_abs)
@@ -734,13 +848,8 @@ class IOMixin:
         # remainder < 1000, output as 3 digits with leading zeros
         low = self._allocate_temp(1)
         high = self._allocate_temp(1)
-        scr = self._allocate_temp(1)
-        self._generate_clear(scr)
-        self._generate_clear(low)
-        self._generate_clear(high)
-        self._copy_cell(remainder + 0, low, scr)
-        self._copy_cell(remainder + 1, high, scr)
-        self._free_temp(scr)
+        self._move_cell(remainder + 0, low)
+        self._move_cell(remainder + 1, high)
 
         # Reuse the existing float printer's fractional logic by temporarily placing
         # (high, low) as the remainder and running the digit extraction.
@@ -752,36 +861,21 @@ class IOMixin:
         self._generate_clear(tens)
         self._generate_clear(ones)
 
-        def _low_ge_n_flag(n: int, out_flag):
-            self._generate_clear(out_flag)
-            for vv in range(n, 256):
-                self._generate_if_byte_equals(low, vv, lambda: self._generate_set_value(1, out_flag))
-
         def _emit_digit(dpos):
+            # Each digit is printed once, so it is consumed
             out = self._allocate_temp(1)
-            tmpd = self._allocate_temp(1)
-            scr2 = self._allocate_temp(1)
             self._generate_set_value(48, out)
-            self._generate_clear(scr2)
-            self._copy_cell(dpos, tmpd, scr2)
-            self._move_pointer(tmpd)
-            self.bf_code.append('[')
-            self._move_pointer(out)
-            self.bf_code.append('+')
-            self._move_pointer(tmpd)
-            self.bf_code.append('-]')
+            self._add_into_destructive(dpos, out)
             self._move_pointer(out)
             self.bf_code.append('.')
             self._generate_clear(out)
-            self._free_temp(scr2)
-            self._free_temp(tmpd)
             self._free_temp(out)
 
         ge100 = self._allocate_temp(1)
         self._generate_clear(ge100)
         self._generate_if_nonzero(high, lambda: self._generate_set_value(1, ge100))
         low_ge100 = self._allocate_temp(1)
-        _low_ge_n_flag(100, low_ge100)
+        self._generate_byte_ge_const(low, 100, low_ge100)
         inv_high = self._allocate_temp(1)
         self._generate_set_value(1, inv_high)
         self._generate_if_nonzero(high, lambda: self._generate_clear(inv_high))
@@ -794,7 +888,7 @@ class IOMixin:
         self._move_pointer(hundreds)
         self.bf_code.append('+')
         low_ge100 = self._allocate_temp(1)
-        _low_ge_n_flag(100, low_ge100)
+        self._generate_byte_ge_const(low, 100, low_ge100)
         def _sub100_ge():
             self._move_pointer(low)
             self.bf_code.append('-' * 100)
@@ -819,7 +913,7 @@ class IOMixin:
         self._generate_clear(ge100)
         self._generate_if_nonzero(high, lambda: self._generate_set_value(1, ge100))
         low_ge100 = self._allocate_temp(1)
-        _low_ge_n_flag(100, low_ge100)
+        self._generate_byte_ge_const(low, 100, low_ge100)
         inv_high2 = self._allocate_temp(1)
         self._generate_set_value(1, inv_high2)
         self._generate_if_nonzero(high, lambda: self._generate_clear(inv_high2))
@@ -831,7 +925,7 @@ class IOMixin:
         self._free_temp(ge100)
 
         ge10 = self._allocate_temp(1)
-        _low_ge_n_flag(10, ge10)
+        self._generate_byte_ge_const(low, 10, ge10)
         self._move_pointer(ge10)
         self.bf_code.append('[')
         self._move_pointer(tens)
@@ -839,15 +933,12 @@ class IOMixin:
         self._move_pointer(low)
         self.bf_code.append('-' * 10)
         self._generate_clear(ge10)
-        _low_ge_n_flag(10, ge10)
+        self._generate_byte_ge_const(low, 10, ge10)
         self._move_pointer(ge10)
         self.bf_code.append(']')
         self._free_temp(ge10)
 
-        scr3 = self._allocate_temp(1)
-        self._generate_clear(scr3)
-        self._copy_cell(low, ones, scr3)
-        self._free_temp(scr3)
+        self._move_cell(low, ones)
 
         _emit_digit(hundreds)
         _emit_digit(tens)
@@ -865,18 +956,23 @@ class IOMixin:
         self._free_temp(is_neg)
 
     def _output_int_as_decimal(self, pos, size=8):
-        """Robust multi-byte decimal output using long division by 10."""
+        """Multi-byte signed decimal output with the algorithm chosen by `decimal_output`."""
+        if self.state.decimal_output == 'dabble':
+            emit = '_output_int_as_decimal_dabble'
+        else:
+            emit = '_output_int_as_decimal_body'
+        if self._can_call_shared_routine(emit, (size,)):
+            self._call_shared_routine(emit, (size,), [(pos, size)], [])
+            return
+        getattr(self, emit)(pos, size)
+
+    def _output_int_as_decimal_body(self, pos, size):
+        """Decimal output by repeated division by 10."""
         msb = pos + (size - 1)
         is_neg = self._allocate_temp(1)
         self._generate_clear(is_neg)
         # Check sign bit of MSB (little-endian signed int)
-        # For simplicity, we check if MSB >= 128
-        flag_ge128 = self._allocate_temp(1)
-        self._generate_clear(flag_ge128)
-        for v in range(128, 256):
-            self._generate_if_byte_equals(msb, v, lambda: self._generate_set_value(1, flag_ge128))
-        self._generate_if_nonzero(flag_ge128, lambda: self._generate_set_value(1, is_neg))
-        self._free_temp(flag_ge128)
+        self._byte_sign_flag(msb, is_neg)
         
         # Working copy for magnitude
         mag = self._allocate_temp(size)
@@ -885,10 +981,7 @@ class IOMixin:
         def _apply_abs():
             self._output_literal('"-"')
             # Two's complement: NOT + INC
-            tmp_not = self._allocate_temp(size)
-            self._perform_bitwise_not(mag, tmp_not, size=size)
-            self._copy_block(tmp_not, mag, size)
-            self._free_temp(tmp_not)
+            self._perform_bitwise_not(mag, mag, size=size)
             self._increment_multi_byte(mag, size=size)
             
         self._generate_if_nonzero(is_neg, _apply_abs)
@@ -908,17 +1001,17 @@ class IOMixin:
         self._move_pointer(loop_flag)
         self.bf_code.append('[')
         
-        # quotient = mag // 10, rem = mag % 10
+        # quotient = mag // 10, rem = mag % 10; mag is replaced below, so the
+        # division may consume it
         quotient = self._allocate_temp(size)
-        rem = self._allocate_temp(1)
-        self._divmod10_multi_byte(mag, quotient, rem, size=size)
+        rem = self._allocate_temp(size)
+        self._divmod_const_unsigned(mag, 10, quotient, rem, size=size)
         
         # Save remainder digit
         # We need to store rem at digits[num_digits]
         def _store_digit(pos_in_digits, slot_idx):
-            scr = self._allocate_temp(1)
-            self._copy_cell(rem, pos_in_digits, scr)
-            self._free_temp(scr)
+            # Only the matching slot runs, and the slot is still zero
+            self._add_into_destructive(rem, pos_in_digits)
             
         self._apply_runtime_subscript_op_pos({'pos': digits, 'length': 20, 'elem_size': 1}, num_digits, _store_digit)
         
@@ -927,7 +1020,7 @@ class IOMixin:
         self.bf_code.append('+')
         
         # mag = quotient
-        self._copy_block(quotient, mag, size)
+        self._move_block(quotient, mag, size)
         
         # Check if mag is zero
         mag_is_nonzero = self._allocate_temp(1)
@@ -968,12 +1061,8 @@ class IOMixin:
         self._generate_if_nonzero(is_zero, lambda: self._output_literal('"0"'))
         self._free_temp(is_zero)
         
-        # for i from num_digits-1 down to 0
-        idx = self._allocate_temp(1)
-        idx_scr = self._allocate_temp(1)
-        self._copy_cell(num_digits, idx, idx_scr)
-        self._free_temp(idx_scr)
-        
+        # for i from num_digits-1 down to 0, counting num_digits itself down
+        idx = num_digits
         self._move_pointer(idx)
         self.bf_code.append('[')
         self.bf_code.append('-')
@@ -982,9 +1071,7 @@ class IOMixin:
             # output *pos_in_digits + 48
             temp_out = self._allocate_temp(1)
             self._generate_set_value(48, temp_out)
-            scr = self._allocate_temp(1)
-            self._add_cell(pos_in_digits, temp_out, scr)
-            self._free_temp(scr)
+            self._add_into_destructive(pos_in_digits, temp_out)
             self._move_pointer(temp_out)
             self.bf_code.append('.')
             self._generate_clear(temp_out)
@@ -995,12 +1082,143 @@ class IOMixin:
         self._move_pointer(idx)
         self.bf_code.append(']')
         
-        self._free_temp(idx)
         self._free_temp(num_digits)
         self._free_temp(digits)
         self._free_temp(mag)
         self._free_temp(is_neg)
 
+    def _output_int_as_decimal_dabble(self, pos, size):
+        """
+        Decimal output by shift-and-add (double dabble) into unpacked digits.
+
+        The magnitude is fed into a little-endian digit vector one byte at a
+        time, most significant first: digits = (digits + byte) * 256, as four
+        passes of digit = 4 * digit + carry, and a final pass with factor 1
+        adds the last byte. Bytes are split into tens and ones first, which
+        enter through the carries of digits 0 and 1, so no digit overflows. A
+        pass counts each digit's units through a (room, 1, 0) triple of period
+        10, so no digit is ever compared. Scaling is skipped until the first
+        non-zero byte, which keeps small values cheap.
+        """
+        sign = self._allocate_temp(1)
+        mag = self._allocate_temp(size)
+        self._get_sign_and_abs(pos, sign, mag, size=size)
+        self._generate_if_nonzero(sign, lambda: self._output_literal('"-"'))
+
+        n_digits = len(str(2 ** (8 * size - 1)))
+        digits = self._allocate_temp(n_digits)
+        self._generate_clear_block(digits, n_digits)
+        units = self._allocate_temp(1)
+        digit = self._allocate_temp(1)
+        room = self._allocate_temp(3)
+        self._init_countdown(room, 9)
+        carry = self._allocate_temp(1)
+        tens = self._allocate_temp(1)
+        ones = self._allocate_temp(1)
+        started = self._allocate_temp(1)
+        rounds = self._allocate_temp(2)
+        for x in [units, digit, carry, tens, ones, started]:
+            self._generate_clear(x)
+
+        def _add_pending(src, factor):
+            self._move_pointer(src)
+            self.bf_code.append('[-')
+            self._move_pointer(carry)
+            self.bf_code.append('+' * factor)
+            self._move_pointer(src)
+            self.bf_code.append(']')
+
+        def _pass(factor):
+            # digit = factor * (digit + pending) + carry, normalized; the
+            # pending ones and tens of the last byte enter through the carry
+            # of digits 0 and 1
+            _add_pending(ones, factor)
+
+            def _on_wrap():
+                self._move_pointer(digit)
+                self.bf_code.append('-' * 10)
+                self._move_pointer(carry)
+                self.bf_code.append('+')
+                self._move_pointer(room)
+                self.bf_code.append('+' * 10)
+
+            for i in range(n_digits):
+                d = digits + i
+
+                self._move_pointer(d)
+                self.bf_code.append('[-')
+                self._move_pointer(units)
+                self.bf_code.append('+' * factor)
+                self._move_pointer(d)
+                self.bf_code.append(']')
+                self._add_into_destructive(carry, units)
+                # Count the units into `digit` next to the triple, then move it back
+                self._move_pointer(units)
+                self.bf_code.append('[-')
+                self._add_unit_with_wrap(digit, room, _on_wrap)
+                self._move_pointer(units)
+                self.bf_code.append(']')
+                self._generate_set_value(9, room)
+                self._add_into_destructive(digit, d)
+                if i == 0:
+                    _add_pending(tens, factor)
+
+        def _scale():
+            self._generate_set_value(4, rounds)
+            self._move_pointer(rounds)
+            self.bf_code.append('[')
+            _pass(4)
+            self._move_pointer(rounds)
+            self.bf_code.append('-]')
+
+        # Split every byte into (tens, ones) up front, most significant first;
+        # the loop then takes the front pair and shifts the rest down
+        pairs = self._allocate_temp(2 * size)
+        for k in range(size):
+            self._divmod_const_unsigned(mag + size - 1 - k, 10, pairs + 2 * k, pairs + 2 * k + 1, size=1)
+
+        def _take_pair():
+            self._add_into_destructive(pairs, tens)
+            self._add_into_destructive(pairs + 1, ones)
+            for j in range(2, 2 * size):
+                self._add_into_destructive(pairs + j, pairs + j - 2)
+            for x in [tens, ones]:
+                self._generate_if_nonzero(x, lambda: self._generate_set_value(1, started))
+
+        if size > 1:
+            self._generate_set_value(size - 1, rounds + 1)
+            self._move_pointer(rounds + 1)
+            self.bf_code.append('[')
+            _take_pair()
+            self._generate_if_nonzero(started, _scale)
+            self._move_pointer(rounds + 1)
+            self.bf_code.append('-]')
+        _take_pair()
+        self._generate_if_nonzero(started, lambda: _pass(1))
+
+        # Print from the most significant non-zero digit; digit 0 always prints
+        self._generate_clear(started)
+        for i in reversed(range(n_digits)):
+            d = digits + i
+
+            def _print_digit(d=d):
+                self._move_pointer(d)
+                self.bf_code.append('+' * 48 + '.')
+
+            if i:
+                self._generate_if_nonzero(d, lambda: self._generate_set_value(1, started))
+                self._generate_if_nonzero(started, _print_digit)
+            else:
+                _print_digit()
+
+        self._generate_clear_block(digits, n_digits)
+        self._generate_clear(room)
+        self._generate_clear(room + 1)
+        self._generate_clear(started)
+        self._generate_clear(sign)
+        for x in [pairs, rounds, started, ones, tens, carry, room, digit, units, digits, mag, sign]:
+            self._free_temp(x)
+
     def _output_float_as_decimal_1000(self, pos):
         # R1 printer for scaled values (scale=1000) that fit in low 16 bits.
         msb = pos + 7
@@ -1012,10 +1230,7 @@ class IOMixin:
         self._copy_block(pos, abs_block, 8)
 
         def _abs_in_place():
-            tmp_block = self._allocate_temp(8)
-            self._copy_block(abs_block, tmp_block, 8)
-            self._perform_bitwise_not(tmp_block, abs_block)
-            self._free_temp(tmp_block)
+            self._perform_bitwise_not(abs_block, abs_block)
             self._increment_multi_byte(abs_block)
 
         self._generate_if_nonzero(is_neg, lambda: (self._output_literal('"-"'), _abs_in_place()))
@@ -1023,33 +1238,21 @@ class IOMixin:
         low = self._allocate_temp()
         high = self._allocate_temp()
         scratch = self._allocate_temp()
-        self._generate_clear(scratch)
-        self._generate_clear(low)
-        self._generate_clear(high)
-        self._copy_cell(abs_block + 0, low, scratch)
-        self._copy_cell(abs_block + 1, high, scratch)
-
-        def _low_ge_n_flag(n: int, out_flag):
-            self._generate_clear(out_flag)
-            for v in range(n, 256):
-                self._generate_if_byte_equals(low, v, lambda: self._generate_set_value(1, out_flag))
+        self._move_cell(abs_block + 0, low)
+        self._move_cell(abs_block + 1, high)
 
         def _ge1000_flag(out_flag):
             # value >= 1000 <=> high >= 4 OR (high==3 AND low>=232)
             self._generate_clear(out_flag)
             high_ge4 = self._allocate_temp()
-            self._generate_set_value(1, high_ge4)
-            for v in (0, 1, 2, 3):
-                self._generate_if_byte_equals(high, v, lambda: self._generate_clear(high_ge4))
+            self._generate_byte_ge_const(high, 4, high_ge4)
             self._generate_if_nonzero(high_ge4, lambda: self._generate_set_value(1, out_flag))
 
             high_eq3 = self._allocate_temp()
             self._generate_clear(high_eq3)
             self._generate_if_byte_equals(high, 3, lambda: self._generate_set_value(1, high_eq3))
             low_ge232 = self._allocate_temp()
-            self._generate_clear(low_ge232)
-            for v in range(232, 256):
-                self._generate_if_byte_equals(low, v, lambda: self._generate_set_value(1, low_ge232))
+            self._generate_byte_ge_const(low, 232, low_ge232)
             self._generate_if_nonzero(high_eq3, lambda: self._generate_if_nonzero(low_ge232, lambda: self._generate_set_value(1, out_flag)))
 
             self._free_temp(low_ge232)
@@ -1058,9 +1261,7 @@ class IOMixin:
 
         def _sub_1000():
             low_ge232 = self._allocate_temp()
-            self._generate_clear(low_ge232)
-            for v in range(232, 256):
-                self._generate_if_byte_equals(low, v, lambda: self._generate_set_value(1, low_ge232))
+            self._generate_byte_ge_const(low, 232, low_ge232)
 
             def _sub_ge():
                 cnt = self._allocate_temp()
@@ -1113,7 +1314,7 @@ class IOMixin:
         tmp_int = self._allocate_temp(8)
         for i in range(8):
             self._generate_clear(tmp_int + i)
-        self._copy_cell(int_part, tmp_int, scratch)
+        self._move_cell(int_part, tmp_int)
         self._output_int_as_decimal(tmp_int)
         self._free_temp(tmp_int)
 
@@ -1128,23 +1329,13 @@ class IOMixin:
         self._generate_clear(ones)
 
         def _emit_digit(dpos):
+            # Each digit is printed once, so it is consumed
             out = self._allocate_temp()
-            tmpd = self._allocate_temp()
-            scr2 = self._allocate_temp()
             self._generate_set_value(48, out)
-            self._generate_clear(scr2)
-            self._copy_cell(dpos, tmpd, scr2)
-            self._move_pointer(tmpd)
-            self.bf_code.append('[')
-            self._move_pointer(out)
-            self.bf_code.append('+')
-            self._move_pointer(tmpd)
-            self.bf_code.append('-]')
+            self._add_into_destructive(dpos, out)
             self._move_pointer(out)
             self.bf_code.append('.')
             self._generate_clear(out)
-            self._free_temp(scr2)
-            self._free_temp(tmpd)
             self._free_temp(out)
 
         # hundreds: while rem >= 100
@@ -1152,7 +1343,7 @@ class IOMixin:
         self._generate_clear(ge100)
         self._generate_if_nonzero(high, lambda: self._generate_set_value(1, ge100))
         low_ge100 = self._allocate_temp()
-        _low_ge_n_flag(100, low_ge100)
+        self._generate_byte_ge_const(low, 100, low_ge100)
         inv_high = self._allocate_temp()
         self._generate_set_value(1, inv_high)
         self._generate_if_nonzero(high, lambda: self._generate_clear(inv_high))
@@ -1166,7 +1357,7 @@ class IOMixin:
         self.bf_code.append('+')
         # subtract 100 from 16-bit
         low_ge100 = self._allocate_temp()
-        _low_ge_n_flag(100, low_ge100)
+        self._generate_byte_ge_const(low, 100, low_ge100)
         def _sub100_ge():
             self._move_pointer(low)
             self.bf_code.append('-' * 100)
@@ -1191,7 +1382,7 @@ class IOMixin:
         self._generate_clear(ge100)
         self._generate_if_nonzero(high, lambda: self._generate_set_value(1, ge100))
         low_ge100 = self._allocate_temp()
-        _low_ge_n_flag(100, low_ge100)
+        self._generate_byte_ge_const(low, 100, low_ge100)
         inv_high2 = self._allocate_temp()
         self._generate_set_value(1, inv_high2)
         self._generate_if_nonzero(high, lambda: self._generate_clear(inv_high2))
@@ -1204,7 +1395,7 @@ class IOMixin:
 
         # tens: while low >= 10 (high should be 0 now)
         ge10 = self._allocate_temp()
-        _low_ge_n_flag(10, ge10)
+        self._generate_byte_ge_const(low, 10, ge10)
         self._move_pointer(ge10)
         self.bf_code.append('[')
         self._move_pointer(tens)
@@ -1212,13 +1403,12 @@ class IOMixin:
         self._move_pointer(low)
         self.bf_code.append('-' * 10)
         self._generate_clear(ge10)
-        _low_ge_n_flag(10, ge10)
+        self._generate_byte_ge_const(low, 10, ge10)
         self._move_pointer(ge10)
         self.bf_code.append(']')
         self._free_temp(ge10)
 
-        self._generate_clear(scratch)
-        self._copy_cell(low, ones, scratch)
+        self._move_cell(low, ones)
 
         _emit_digit(hundreds)
         _emit_digit(tens)
@@ -1,52 +1,374 @@
 from __future__ import annotations
 
+import functools
+import inspect
+
+
+def cached_snippet(*pos_params):
+    """
+    Memoize a codegen primitive on the tape layout it runs against.
+
+    BF pointer moves are relative, so a primitive emits the same code
+    whenever its operands, the pointer, the temp allocator and the zero
+    facts sit at the same offsets from the pointer. `pos_params` names the
+    tape-position arguments; all other arguments are compared as they are.
+    """
+    def wrap(fn):
+        sig = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def inner(self, *args, **kwargs):
+            bound = sig.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            positions = tuple(bound.arguments[name] for name in pos_params)
+            params = tuple(v for k, v in bound.arguments.items() if k != 'self' and k not in pos_params)
+            return self._emit_snippet((fn.__name__, params), positions, lambda: fn(self, *args, **kwargs))
+        return inner
+    return wrap
+
+
+@functools.lru_cache(maxsize=None)
+def constant_generators():
+    """
+    Shortest multiplication loop for every byte value.
+
+    Entry v is (cost, factor, step, rest): a zero scratch cell counts
+    `factor` down while the target moves by `step` per round (negative steps
+    count down and wrap), then the target moves by `rest`. cost counts the
+    `+`/`-` instructions of all three parts.
+    """
+    best = [(abs(v if v <= 128 else v - 256), 0, 0, v if v <= 128 else v - 256) for v in range(256)]
+    for factor in range(2, 17):
+        for step in range(1, 256 // factor + 1):
+            for sign in (1, -1):
+                base = (sign * factor * step) % 256
+                for rest in range(-step, step + 1):
+                    v = (base + rest) % 256
+                    cost = factor + step + abs(rest)
+                    if cost < best[v][0]:
+                        best[v] = (cost, factor, sign * step, rest)
+    return tuple(best)
+
 
 class MemoryOpsMixin:
-    def _allocate_temp(self, size=1):
-        pos = self.max_ptr
-        self.max_ptr += size
-        self.temp_cells.append((pos, size))
-        return pos
+    def _allocate_temp(self, size=1, near=None):
+        """Reserve `size` contiguous temp cells and return the first position.
+
+        Holes left by earlier frees are reused when one fits; among the
+        candidates (holes and the bump position at `max_ptr`) the block
+        closest to `near` wins, defaulting to the current pointer so the
+        following moves stay short. Cells past the peak tape usage have never
+        been written and are recorded as known zero when allocated outside
+        any loop.
+        """
+        if near is None:
+            near = self.current_ptr
+        best_pos = self.max_ptr
+        best_dist = abs(best_pos - near)
+        best_hole = None
+        for idx, (hole_pos, hole_size) in enumerate(self.state.free_temps):
+            if hole_size < size:
+                continue
+            pos = min(max(near, hole_pos), hole_pos + hole_size - size)
+            dist = abs(pos - near)
+            if dist <= best_dist:
+                best_pos, best_dist, best_hole = pos, dist, idx
+
+        if best_hole is None:
+            self.max_ptr += size
+        else:
+            hole_pos, hole_size = self.state.free_temps.pop(best_hole)
+            remainder = []
+            if best_pos > hole_pos:
+                remainder.append((hole_pos, best_pos - hole_pos))
+            if best_pos + size < hole_pos + hole_size:
+                remainder.append((best_pos + size, hole_pos + hole_size - best_pos - size))
+            self.state.free_temps[best_hole:best_hole] = remainder
+
+        self.temp_cells.append((best_pos, size))
+        fresh_from = max(best_pos, self.state.peak_ptr)
+        if fresh_from < best_pos + size and self._code_bracket_depth() == 0:
+            stamp = len(self.bf_code)
+            for cell in range(fresh_from, best_pos + size):
+                self.state.zero_cells[cell] = stamp
+        self.state.peak_ptr = max(self.state.peak_ptr, best_pos + size)
+        return best_pos
 
     def _free_temp(self, pos):
+        """Release the temp block starting at `pos`.
+
+        Blocks may be freed in any order. Freeing the block at the top of the
+        tape shrinks `max_ptr` (together with any holes directly below it);
+        anything else becomes a hole for later allocations to reuse.
+        """
         if not self.temp_cells:
             raise ValueError("Compiler Error: No temporary cells to free.")
-        last_pos, size = self.temp_cells.pop()
-        if pos != last_pos:
-            raise ValueError(
-                f"Compiler Error: Invalid temp cell free order. Expected {last_pos}, got {pos}."
-            )
-        self.max_ptr -= size
+        for idx in range(len(self.temp_cells) - 1, -1, -1):
+            if self.temp_cells[idx][0] == pos:
+                break
+        else:
+            raise ValueError(f"Compiler Error: Temp cell {pos} is not allocated.")
+        _, size = self.temp_cells.pop(idx)
+
+        holes = self.state.free_temps
+        if pos + size == self.max_ptr:
+            self.max_ptr = pos
+            while holes and holes[-1][0] + holes[-1][1] == self.max_ptr:
+                self.max_ptr = holes.pop()[0]
+            return
+
+        # Keep holes sorted by position and merge neighbours.
+        idx = 0
+        while idx < len(holes) and holes[idx][0] < pos:
+            idx += 1
+        holes.insert(idx, (pos, size))
+        if idx + 1 < len(holes) and pos + size == holes[idx + 1][0]:
+            holes[idx] = (pos, size + holes.pop(idx + 1)[1])
+        if idx > 0 and holes[idx - 1][0] + holes[idx - 1][1] == pos:
+            prev_pos, prev_size = holes[idx - 1]
+            holes[idx - 1] = (prev_pos, prev_size + holes.pop(idx)[1])
+
+    def _code_bracket_depth(self):
+        """Loop nesting depth at the end of the emitted code."""
+        self._sync_zero_cells()
+        return len(self.state.zero_stack)
+
+    def _sync_zero_cells(self):
+        """Replay loop brackets emitted since the last call onto the zero facts.
+
+        Entering a loop starts from no facts, since the body may run after
+        earlier iterations changed anything. A loop exits either without
+        running or from the end of its body, so only facts true at both
+        points survive `]`, and the cell under the pointer is zero there.
+        A plain `[-]` only touches the current cell and is handled directly.
+
+        Chunks are attributed to the current pointer, which only holds for
+        a leading `_move_pointer` move (it syncs before emitting). Any other
+        chunk that moves the pointer may write any cell, so it drops every
+        fact, including those saved for the loops it opens.
+        """
+        st = self.state
+        code = st.bf_code
+        if st.scanned_code_len > len(code):
+            st.scanned_code_len = 0
+            st.zero_stack.clear()
+            st.zero_cells.clear()
+        ptr = st.current_ptr
+        first = st.scanned_code_len
+        for i in range(first, len(code)):
+            chunk = code[i]
+            if chunk == '[-]':
+                st.zero_cells[ptr] = i + 1
+                continue
+            if '<' in chunk or '>' in chunk:
+                if i == first and not chunk.strip('<>'):
+                    continue
+                for ch in chunk:
+                    if ch == '[':
+                        st.zero_stack.append({})
+                    elif ch == ']' and st.zero_stack:
+                        st.zero_stack.pop()
+                st.zero_cells = {}
+                continue
+            if '[' not in chunk and ']' not in chunk:
+                continue
+            for ch in chunk:
+                if ch == '[':
+                    st.zero_cells.pop(ptr, None)
+                    st.zero_stack.append(st.zero_cells)
+                    st.zero_cells = {}
+                elif ch == ']':
+                    body = st.zero_cells
+                    body.pop(ptr, None)
+                    outer = st.zero_stack.pop() if st.zero_stack else {}
+                    st.zero_cells = {cell: stamp for cell, stamp in outer.items() if cell in body}
+            if chunk.endswith(']'):
+                st.zero_cells[ptr] = i + 1
+        st.scanned_code_len = len(code)
+
+    def _is_known_zero(self, pos):
+        """True when cell `pos` is provably zero at the end of the emitted code.
+
+        A fact about the cell under the pointer only holds if nothing was
+        emitted since it was recorded, as raw `+`/`-`/`,` act on that cell.
+        Outside loops, cells past the peak tape usage were never touched.
+        """
+        self._sync_zero_cells()
+        stamp = self.state.zero_cells.get(pos)
+        if stamp is None:
+            return pos >= self.state.peak_ptr and not self.state.zero_stack
+        return pos != self.current_ptr or stamp == len(self.bf_code)
+
+    def _mark_zero(self, pos):
+        """Record that cell `pos` (under the pointer) was just zeroed."""
+        self._sync_zero_cells()
+        self.state.zero_cells[pos] = len(self.bf_code)
+
+    def _snippet_layout(self, positions):
+        # Everything a cached primitive's output depends on, relative to the pointer
+        st = self.state
+        anchor = st.current_ptr
+        return (
+            tuple(None if p is None else p - anchor for p in positions),
+            st.max_ptr - anchor,
+            st.peak_ptr - anchor,
+            tuple((p - anchor, n) for p, n in st.free_temps),
+            bool(st.zero_stack),
+            frozenset(c - anchor for c in st.zero_cells),
+            st.zero_cells.get(anchor) == len(st.bf_code),
+            None if st.const_scratch is None else st.const_scratch - anchor,
+        )
+
+    def _emit_snippet(self, op, positions, emit_fn):
+        """
+        Emit emit_fn()'s code, or replay what it emitted for an earlier call
+        with the same layout (see cached_snippet).
+
+        A cache entry holds the emitted chunks and the state afterwards
+        relative to the pointer on entry: pointer, allocator bounds, free
+        holes, and zero facts. A fact's stamp is relative to the entry code
+        length, or None for a fact kept from before the call.
+        """
+        st = self.state
+        self._sync_zero_cells()
+        key = (op, self._snippet_layout(positions))
+        anchor = st.current_ptr
+        start = len(st.bf_code)
+        entry = st.snippet_cache.get(key)
+        if entry is not None:
+            chunks, ptr, max_ptr, peak_ptr, holes, zeros = entry
+            st.bf_code.extend(chunks)
+            st.current_ptr = anchor + ptr
+            st.max_ptr = anchor + max_ptr
+            st.peak_ptr = anchor + peak_ptr
+            st.free_temps = [(anchor + p, n) for p, n in holes]
+            before = st.zero_cells
+            st.zero_cells = {
+                anchor + c: before[anchor + c] if stamp is None else start + stamp
+                for c, stamp in zeros
+            }
+            st.scanned_code_len = len(st.bf_code)
+            return None
+
+        temps = list(st.temp_cells)
+        depth = len(st.zero_stack)
+        calls = len(st.routine_boundaries)
+        result = emit_fn()
+        self._sync_zero_cells()
+        # Only primitives that return nothing, release their temps and make
+        # no shared routine calls can be replayed
+        if (result is None and st.temp_cells == temps and len(st.zero_stack) == depth
+                and len(st.routine_boundaries) == calls):
+            st.remember(st.snippet_cache, key, (
+                st.bf_code[start:],
+                st.current_ptr - anchor,
+                st.max_ptr - anchor,
+                st.peak_ptr - anchor,
+                tuple((p - anchor, n) for p, n in st.free_temps),
+                tuple((c - anchor, None if stamp < start else stamp - start)
+                      for c, stamp in st.zero_cells.items()),
+            ))
+        return result
 
     def _move_pointer(self, target_pos):
         diff = target_pos - self.current_ptr
+        if diff == 0:
+            return
+        self._sync_zero_cells()
+        facts = self.state.zero_cells
+        stamp = facts.get(self.current_ptr)
+        if stamp is not None and stamp != len(self.bf_code):
+            # Written while the pointer was here.
+            del facts[self.current_ptr]
         if diff > 0:
             self.bf_code.append('>' * diff)
-        elif diff < 0:
+        else:
             self.bf_code.append('<' * (-diff))
         self.current_ptr = target_pos
+        if target_pos in facts:
+            facts[target_pos] = len(self.bf_code)
+        if target_pos >= self.state.peak_ptr:
+            self.state.peak_ptr = target_pos + 1
+
+    def _rebase_pointer(self, pos):
+        """Treat the cell under the pointer as `pos` without emitting code.
+
+        Used after code that shifted a block of the tape along with the
+        pointer, so later positions are relative to the moved block. Zero
+        facts belong to the old frame of reference and are dropped.
+        """
+        self._sync_zero_cells()
+        self.current_ptr = pos
+        self.state.zero_cells.clear()
 
     def _generate_clear(self, pos=None):
+        target = self.current_ptr if pos is None else pos
+        known_zero = self._is_known_zero(target)
         if pos is not None:
             self._move_pointer(pos)
-        self.bf_code.append('[-]')
+        if not known_zero:
+            self.bf_code.append('[-]')
+        self._mark_zero(target)
 
     def _generate_set_value(self, value, pos=None):
-        if pos is not None:
-            self._move_pointer(pos)
-        self._generate_clear()
+        """Clear cell `pos` (default: under the pointer) and set it to `value`.
+
+        Values close to 0 or 256 are counted up or down directly; larger ones
+        use the cell's shortest multiplication loop (constant_generators) when
+        it beats that. The loop counts down a zero scratch cell and leaves it
+        zero: a known-zero neighbour of the target, `state.const_scratch`
+        where temps cannot be allocated, or a fresh temp.
+        """
+        target = self.current_ptr if pos is None else pos
+        self._generate_clear(target)
         value = int(value)
-        if value > 0:
-            self.bf_code.append('+' * value)
+        if value <= 0:
+            return
+        value %= 256
+        direct = min(value, 256 - value)
+        _, factor, step, rest = constant_generators()[value]
+        loop_cost = factor + abs(step) + abs(rest) + 3
+
+        scratch = None
+        owned = False
+        # Four moves of at least one cell
+        if factor and loop_cost + 4 < direct:
+            scratch = next((c for c in (target + 1, target - 1) if self._is_known_zero(c)), self.state.const_scratch)
+            if scratch is None:
+                scratch = self._allocate_temp(near=target)
+                owned = True
+            clear_cost = 0 if self._is_known_zero(scratch) else 3
+            if loop_cost + 4 * abs(scratch - target) + clear_cost >= direct:
+                if owned:
+                    self._free_temp(scratch)
+                scratch = None
+        if scratch is None:
+            self.bf_code.append('+' * value if value <= 128 else '-' * (256 - value))
+            return
+
+        self._generate_clear(scratch)
+        self._sync_zero_cells()
+        # The loop only touches target and scratch, so other facts survive it
+        kept = {cell: stamp for cell, stamp in self.state.zero_cells.items() if cell != target}
+        self.bf_code.append('+' * factor + '[')
+        self._move_pointer(target)
+        self.bf_code.append('+' * step if step > 0 else '-' * -step)
+        self._move_pointer(scratch)
+        self.bf_code.append('-]')
+        self._sync_zero_cells()
+        self.state.zero_cells = kept
+        self._mark_zero(scratch)
+        self._move_pointer(target)
+        if rest:
+            self.bf_code.append('+' * rest if rest > 0 else '-' * -rest)
+        if owned:
+            self._free_temp(scratch)
 
     def _copy_cell(self, src_pos, dest_pos, temp_pos):
         if src_pos == dest_pos:
             return
-        self._move_pointer(dest_pos)
-        self._generate_clear()
-
-        self._move_pointer(temp_pos)
-        self._generate_clear()
+        self._generate_clear(dest_pos)
+        self._generate_clear(temp_pos)
 
         self._move_pointer(src_pos)
         self.bf_code.append('[')
@@ -132,3 +454,31 @@ class MemoryOpsMixin:
         for i in range(size):
             self._copy_cell(src_pos + i, dest_pos + i, scratch)
         self._free_temp(scratch)
+
+    def _add_into_destructive(self, src_pos, dest_pos):
+        """dest += src (byte), leaving src at zero. Needs no temp."""
+        if src_pos == dest_pos:
+            raise ValueError("Compiler Error: Cannot add a cell into itself destructively.")
+        if self._is_known_zero(src_pos):
+            return
+        self._move_pointer(src_pos)
+        self.bf_code.append('[-')
+        self._move_pointer(dest_pos)
+        self.bf_code.append('+')
+        self._move_pointer(src_pos)
+        self.bf_code.append(']')
+
+    def _move_cell(self, src_pos, dest_pos):
+        """dest = src (byte), leaving src at zero. Use when src is dead afterwards."""
+        if src_pos == dest_pos:
+            return
+        self._generate_clear(dest_pos)
+        self._add_into_destructive(src_pos, dest_pos)
+
+    def _move_block(self, src_pos, dest_pos, size):
+        """Move `size` bytes from src to dest, leaving src zeroed. Overlap-safe."""
+        if src_pos == dest_pos:
+            return
+        order = range(size) if dest_pos < src_pos else reversed(range(size))
+        for i in order:
+            self._move_cell(src_pos + i, dest_pos + i)
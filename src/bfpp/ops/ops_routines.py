@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+# States are stored as two base-16 digits so the dispatcher's decision tree
+# walks at most 16 values per digit
+_STATE_BASE = 16
+# Run flag, state digits and return state digits, reserved ahead of all variables
+_DISPATCH_CELLS = ('__dispatch_run', '__dispatch_hi', '__dispatch_lo', '__return_hi', '__return_lo')
+
+
+class SharedRoutinesMixin:
+    """
+    Heavy primitives emitted once and called through a dispatcher.
+
+    With `shared_routines` on, a top-level call of a heavy primitive copies
+    its inputs into the routine's fixed argument cells and ends the current
+    code segment. At the end of compilation the segments and routine bodies
+    are wrapped in one loop over a run flag:
+
+        run = 1; state = 1
+        run[ switch state: 1: segment 1 (ends with state = R, ret = 2)
+                           2: segment 2 ...
+                           R: routine body; state = ret ]
+
+    The state is switched on with a decision tree over its two digits (see
+    _generate_byte_switch), so a hop costs the same however many segments
+    there are. Segments count up from 1 and routines down from 255. Every
+    segment runs exactly once and in order, so code generated for the
+    straight-line program stays valid inside the dispatcher; the last one
+    clears the run flag.
+    """
+
+    def _reserve_dispatcher_cells(self):
+        # Reserved ahead of all variables so no segment uses them as scratch
+        # before the first call,
+        for name in _DISPATCH_CELLS:
+            self.state.variables[name] = {
+                'pos': self.max_ptr,
+                'type': 'byte',
+                'size': 1,
+                'is_array': False
+            }
+            self.max_ptr += 1
+        # and three working cells for the dispatcher's decision tree, kept
+        # next to the state so reading it takes short moves.
+        self.max_ptr += 3
+        # The run flag and state are non-zero while segments run
+        self.state.peak_ptr = max(self.state.peak_ptr, self.max_ptr)
+
+    def _dispatch_cell(self, name):
+        return self.state.variables[name]['pos']
+
+    def _set_dispatch_state(self, value, hi, lo):
+        self._generate_set_value(value // _STATE_BASE, hi)
+        self._generate_set_value(value % _STATE_BASE, lo)
+
+    def _can_call_shared_routine(self, emit, params):
+        st = self.state
+        if not st.shared_routines or st.macros or self._code_bracket_depth() != 0:
+            return False
+        routines = len(st.routines) + ((emit,) + tuple(params) not in st.routines)
+        # Segments after this call, plus routines, must fit in states 1..255
+        return len(st.routine_boundaries) + 2 + routines <= 255
+
+    def _call_shared_routine(self, emit, params, inputs, outputs):
+        """
+        Run `getattr(self, emit)(*input cells, *output cells, *params)` as a
+        shared routine. inputs and outputs are (pos, size) blocks.
+
+        The routine clears its input cells and leaves its results in its
+        output cells, which the next segment moves to `outputs`.
+        """
+        st = self.state
+        key = (emit,) + tuple(params)
+        routine = st.routines.get(key)
+        if routine is None:
+            routine = {
+                'emit': emit,
+                'params': tuple(params),
+                'state': 255 - len(st.routines),
+                'inputs': [(self._reserve_routine_cells(size), size) for _, size in inputs],
+                'outputs': [(self._reserve_routine_cells(size), size) for _, size in outputs],
+            }
+            st.routines[key] = routine
+
+        hi, lo, ret_hi, ret_lo = (self._dispatch_cell(name) for name in _DISPATCH_CELLS[1:])
+        for (pos, size), (cell, _) in zip(inputs, routine['inputs']):
+            self._copy_block(pos, cell, size)
+        self._set_dispatch_state(len(st.routine_boundaries) + 2, ret_hi, ret_lo)
+        self._set_dispatch_state(routine['state'], hi, lo)
+
+        self._sync_zero_cells()
+        st.routine_boundaries.append((len(self.bf_code), self.current_ptr))
+
+        # The next segment starts after the routine returned: inputs and the
+        # return state are zero, the state and the outputs are not.
+        stamp = len(self.bf_code)
+        for cell, size in routine['inputs']:
+            for i in range(size):
+                st.zero_cells[cell + i] = stamp
+        for cell, size in routine['outputs']:
+            for i in range(size):
+                st.zero_cells.pop(cell + i, None)
+        for cell in (hi, lo):
+            st.zero_cells.pop(cell, None)
+        for cell in (ret_hi, ret_lo):
+            st.zero_cells[cell] = stamp
+
+        for (pos, size), (cell, _) in zip(outputs, routine['outputs']):
+            self._move_block(cell, pos, size)
+
+    def _reserve_routine_cells(self, size):
+        pos = self.max_ptr
+        self.max_ptr += size
+        for i in range(size):
+            self._generate_clear(pos + i)
+        return pos
+
+    def _assemble_dispatcher(self):
+        """Wrap the emitted segments and the shared routine bodies in the dispatcher loop."""
+        st = self.state
+        code = st.bf_code
+        bounds = [(0, 0)] + st.routine_boundaries + [(len(code), st.current_ptr)]
+        segments = [
+            (code[start:end], start_ptr, end_ptr)
+            for (start, start_ptr), (end, end_ptr) in zip(bounds, bounds[1:])
+        ]
+        run, hi, lo, ret_hi, ret_lo = (self._dispatch_cell(name) for name in _DISPATCH_CELLS)
+
+        # Routine and dispatcher temps go above everything the program uses
+        st.bf_code = []
+        st.current_ptr = 0
+        st.max_ptr = max(st.max_ptr, st.peak_ptr)
+        # The switch takes its working cells from the hole next to the state
+        work = run + len(_DISPATCH_CELLS)
+        st.free_temps = [(work, 3)]
+        st.zero_cells = {cell: 0 for cell in (run, hi, lo, work, work + 1, work + 2)}
+        st.zero_stack = []
+        st.scanned_code_len = 0
+
+        def _digits(state):
+            return (state // _STATE_BASE, state % _STATE_BASE)
+
+        leaves = []
+        for state, (chunks, start_ptr, end_ptr) in enumerate(segments, 1):
+            def _segment(chunks=chunks, start_ptr=start_ptr, end_ptr=end_ptr, last=state == len(segments)):
+                self._move_pointer(start_ptr)
+                self.bf_code.extend(chunks)
+                self.current_ptr = end_ptr
+                st.zero_cells = {}
+                st.scanned_code_len = len(self.bf_code)
+                if last:
+                    self._generate_clear(run)
+
+            leaves.append((_digits(state), _segment))
+
+        for routine in st.routines.values():
+            def _routine(routine=routine):
+                cells = [cell for cell, _ in routine['inputs'] + routine['outputs']]
+                getattr(self, routine['emit'])(*cells, *routine['params'])
+                for cell, size in routine['inputs']:
+                    self._generate_clear_block(cell, size)
+                self._generate_clear(hi)
+                self._generate_clear(lo)
+                self._add_into_destructive(ret_hi, hi)
+                self._add_into_destructive(ret_lo, lo)
+
+            leaves.append((_digits(routine['state']), _routine))
+
+        self._generate_set_value(1, run)
+        self._set_dispatch_state(1, hi, lo)
+        self._move_pointer(run)
+        self.bf_code.append('[')
+        self._generate_byte_switch([hi, lo], leaves)
+        self._move_pointer(run)
+        self.bf_code.append(']')
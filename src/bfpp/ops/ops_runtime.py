@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import math
+
 
 class RuntimeOpsMixin:
     def _generate_if_byte_equals(self, byte_pos, const_value, body_fn, body_fn_else=None):
@@ -52,6 +54,113 @@ class RuntimeOpsMixin:
         self._free_temp(temp_a)
         self._free_temp(is_equal)
 
+    def _generate_byte_ge_const(self, pos, n, flag):
+        """
+        flag = 1 if the byte at pos is >= n, else 0 (non-destructive).
+
+        One loop moves the byte into a temp while a (room, 1, 0) countdown
+        started at n - 1 counts its units; the n-th unit wraps it and sets the
+        flag. Moving the byte back adds its units to room again, which leaves
+        room at n - 1 whichever way the test went.
+        """
+        self._generate_clear(flag)
+        if n <= 0:
+            self._generate_set_value(1, flag)
+            return
+        if n > 255:
+            return
+
+        def _on_wrap():
+            self._move_pointer(flag)
+            self.bf_code.append('+')
+
+        room = self._allocate_temp(3)
+        held = self._allocate_temp(1)
+        self._init_countdown(room, n - 1)
+        self._generate_clear(held)
+        self._move_pointer(pos)
+        self.bf_code.append('[-')
+        self._move_pointer(held)
+        self.bf_code.append('+')
+        self._add_unit_with_wrap(None, room, _on_wrap)
+        self._move_pointer(pos)
+        self.bf_code.append(']')
+        self._move_pointer(held)
+        self.bf_code.append('[-')
+        self._move_pointer(pos)
+        self.bf_code.append('+')
+        self._move_pointer(room)
+        self.bf_code.append('+')
+        self._move_pointer(held)
+        self.bf_code.append(']')
+        self._generate_clear(room)
+        self._generate_clear(room + 1)
+        self._free_temp(held)
+        self._free_temp(room)
+
+    def _generate_byte_switch(self, cells, leaves):
+        """
+        Run the body of the leaf whose value bytes equal the bytes at `cells`
+        (non-destructive); nothing runs when no leaf matches.
+
+        leaves is a list of (value_bytes, body_fn) with distinct values. The
+        decision tree reads cells in order. Each level copies one cell into
+        `rest` and walks the sorted byte values of the remaining leaves as a
+        decrement chain:
+
+          rest -= v1; flag = 1
+          rest[ rest -= v2 - v1; flag = 1; rest[ ... ]; flag = 0; rest = 0 ]
+          flag[ - next level or leaf body ]
+
+        Each cell is read once per level however many leaves there are.
+        Every path leaves rest and flag at zero, so one pair serves the
+        whole tree.
+        """
+        rest = self._allocate_temp()
+        flag = self._allocate_temp()
+        scratch = self._allocate_temp()
+        self._generate_clear(rest)
+        self._generate_clear(flag)
+        self._generate_clear(scratch)
+
+        def _emit_level(group, depth):
+            if depth == len(cells):
+                # group holds exactly one leaf: its value is fully matched
+                group[0][1]()
+                return
+
+            branches = {}
+            for value_bytes, body_fn in group:
+                branches.setdefault(value_bytes[depth], []).append((value_bytes, body_fn))
+            values = sorted(branches)
+            self._copy_cell(cells[depth], rest, scratch)
+
+            def _chain(i, prev):
+                delta = values[i] - prev
+                self._move_pointer(rest)
+                self.bf_code.append('-' * delta if delta <= 128 else '+' * (256 - delta))
+                self._generate_set_value(1, flag)
+                self._move_pointer(rest)
+                self.bf_code.append('[')
+                if i + 1 < len(values):
+                    _chain(i + 1, values[i])
+                self._generate_clear(flag)
+                self._generate_clear(rest)
+                self.bf_code.append(']')
+
+                self._move_pointer(flag)
+                self.bf_code.append('[-')
+                _emit_level(branches[values[i]], depth + 1)
+                self._move_pointer(flag)
+                self.bf_code.append(']')
+
+            _chain(0, 0)
+
+        if leaves:
+            _emit_level(leaves, 0)
+        for x in [scratch, flag, rest]:
+            self._free_temp(x)
+
     def _generate_if_nonzero(self, pos, body_fn, body_fn_else=None):
         # Executes body_fn() if *pos != 0 (non-destructive).
         # Optional body_fn_else() if *pos == 0.
@@ -88,13 +197,7 @@ class RuntimeOpsMixin:
         self._free_temp(tmp)
 
     def _apply_runtime_subscript_op(self, base_info, index_var_name, per_slot_fn):
-        if index_var_name not in self.variables:
-            raise ValueError(f"Unknown index variable: {index_var_name}")
-        idx_info = self.variables[index_var_name]
-        if idx_info['size'] != 1:
-            raise NotImplementedError("Runtime subscripts require a 1-byte index variable")
-
-        self._apply_runtime_subscript_op_pos(base_info, idx_info['pos'], per_slot_fn)
+        self._apply_runtime_subscript_op_pos(base_info, self._runtime_index_pos(index_var_name), per_slot_fn)
 
     def _apply_runtime_subscript_op_pos(self, base_info, idx_pos, per_slot_fn):
         length = base_info.get('length', 1)
@@ -111,13 +214,223 @@ class RuntimeOpsMixin:
 
     def _load_runtime_subscript_into_buffer(self, base_info, idx_var, target_pos, size):
         # Clears target buffer then copies the selected element into it.
+        idx_pos = self._runtime_index_pos(idx_var)
         for i in range(size):
             self._generate_clear(target_pos + i)
 
+        if base_info.get('frame') is not None and size == base_info['elem_size']:
+            self._walk_index_frame(base_info, idx_pos, self._index_frame_load(base_info), carry_out=target_pos)
+            return
+
         def _slot_copy(pos, slot):
             self._copy_block(pos, target_pos, size)
 
-        if isinstance(idx_var, str):
-            self._apply_runtime_subscript_op(base_info, idx_var, _slot_copy)
+        self._apply_runtime_subscript_op_pos(base_info, idx_pos, _slot_copy)
+
+    def _index_frame_load(self, base_info):
+        size = base_info['elem_size']
+
+        def _load(elem_pos, payload):
+            # The frame's hole cell is zero and free to use as the copy temp
+            for i in range(size):
+                self._copy_cell(elem_pos + i, payload + i, base_info['frame'])
+
+        return _load
+
+    def _index_frame_store(self, size):
+        def _store(elem_pos, payload):
+            self._move_block(payload, elem_pos, size)
+
+        return _store
+
+    def _store_runtime_subscript_from_buffer(self, base_info, idx_var, src_pos):
+        """Move an element-sized buffer into the selected element, leaving src zeroed."""
+        idx_pos = self._runtime_index_pos(idx_var)
+        size = base_info['elem_size']
+        if base_info.get('frame') is not None:
+            self._walk_index_frame(base_info, idx_pos, self._index_frame_store(size), carry_in=src_pos)
+            return
+
+        def _slot_store(pos, slot):
+            self._copy_block(src_pos, pos, size)
+
+        self._apply_runtime_subscript_op_pos(base_info, idx_pos, _slot_store)
+        self._generate_clear_block(src_pos, size)
+
+    def _apply_runtime_subscript_in_frame(self, base_info, idx_var, slot_fn):
+        """
+        Run slot_fn(pos, slot) on the element selected at runtime.
+
+        With an index frame the element is visited by walking there, so slot
+        is None and slot_fn may only touch the element's own cells: no temps,
+        no other variables. Without a frame this is the per-slot fan-out.
+        """
+        idx_pos = self._runtime_index_pos(idx_var)
+        if base_info.get('frame') is not None:
+            def _at_slot(elem_pos, payload):
+                # Constants are loaded through the frame's hole cell
+                self.state.const_scratch = base_info['frame']
+                try:
+                    slot_fn(elem_pos, None)
+                finally:
+                    self.state.const_scratch = None
+
+            self._walk_index_frame(base_info, idx_pos, _at_slot)
+            return
+        self._apply_runtime_subscript_op_pos(base_info, idx_pos, slot_fn)
+
+    def _apply_runtime_subscript_buffered(self, base_info, idx_var, buf_fn, load=True, store=True):
+        """
+        Run buf_fn(pos) on the element selected at runtime, for operations
+        that need temps. With an index frame the element is loaded into a
+        temp buffer (load) and written back afterwards (store); nothing runs
+        for an out-of-range index, as with the fan-out.
+        """
+        if base_info.get('frame') is None:
+            self._apply_runtime_subscript_op(base_info, idx_var, lambda pos, slot: buf_fn(pos))
+            return
+
+        idx_pos = self._runtime_index_pos(idx_var)
+        size = base_info['elem_size']
+        buf = self._allocate_temp(size)
+        self._generate_clear_block(buf, size)
+
+        def _body():
+            if load:
+                self._walk_index_frame(
+                    base_info, idx_pos, self._index_frame_load(base_info), carry_out=buf, check_range=False
+                )
+            buf_fn(buf)
+            if store:
+                self._walk_index_frame(
+                    base_info, idx_pos, self._index_frame_store(size), carry_in=buf, check_range=False
+                )
+
+        self._generate_if_index_in_range(base_info, idx_pos, _body)
+        if not store:
+            self._generate_clear_block(buf, size)
+        self._free_temp(buf)
+
+    def _generate_if_index_in_range(self, base_info, idx_pos, body_fn):
+        """Run body_fn() only when the byte at idx_pos is below the collection length."""
+        length = base_info.get('length', 1)
+        if length >= 256:
+            body_fn()
+            return
+
+        # in_range = idx < length, counted down on a (room, 1, 0) triple
+        in_range = self._allocate_temp(1)
+        room = self._allocate_temp(3)
+        cnt = self._allocate_temp(1)
+        scratch = self._allocate_temp(1)
+        self._generate_set_value(1, in_range)
+        self._init_countdown(room, length - 1)
+        self._copy_cell(idx_pos, cnt, scratch)
+        self._move_pointer(cnt)
+        self.bf_code.append('[-')
+        self._add_unit_with_wrap(None, room, lambda: self._generate_clear(in_range))
+        self._move_pointer(cnt)
+        self.bf_code.append(']')
+        self._generate_clear(room)
+        self._generate_clear(room + 1)
+        self._generate_if_nonzero(in_range, body_fn)
+        self._generate_clear(in_range)
+        for x in [scratch, cnt, room, in_range]:
+            self._free_temp(x)
+
+    def _runtime_index_pos(self, idx_var):
+        if not isinstance(idx_var, str):
+            return idx_var
+        if idx_var not in self.variables:
+            raise ValueError(f"Unknown index variable: {idx_var}")
+        idx_info = self.variables[idx_var]
+        if idx_info['size'] != 1:
+            raise NotImplementedError("Runtime subscripts require a 1-byte index variable")
+        return idx_info['pos']
+
+    # ===== Index frames =====
+    #
+    # Every array and dict is preceded by a small frame of cells that are zero
+    # while idle: a hole, the outward step counter, the return step counter
+    # and an element-sized payload. To reach element k the frame rotates past
+    # one element per step (the element moves down by the frame width, the
+    # frame moves up by one element) carrying the counters and payload, so
+    # the emitted code is the same for every index and the run time grows
+    # with k instead of with the collection length. While walking, positions
+    # are tracked relative to the frame, which always appears to sit in front
+    # of element 0; the element reached is therefore at the collection's base.
+
+    @staticmethod
+    def _index_frame_width(elem_size):
+        """Frame width for a collection; coprime with elem_size so one rotation is a single cycle."""
+        width = elem_size + 3
+        while math.gcd(width, elem_size) != 1:
+            width += 1
+        return width
+
+    def _rotate_index_frame(self, frame, width, elem_size, outward):
+        """Swap the frame at `frame` with the element after it (outward) or before it."""
+        span = width + elem_size
+        if outward:
+            start, step, hole = frame, width, 0
         else:
-            self._apply_runtime_subscript_op_pos(base_info, idx_var, _slot_copy)
+            start, step, hole = frame - elem_size, elem_size, elem_size
+        # Follow the rotation cycle from the hole, moving each cell into the
+        # slot vacated before it.
+        empty = hole
+        while True:
+            src = (empty + step) % span
+            if src == hole:
+                break
+            self._add_into_destructive(start + src, start + empty)
+            empty = src
+
+    def _walk_index_frame(self, base_info, idx_pos, at_slot_fn, carry_in=None, carry_out=None,
+                          check_range=True):
+        """
+        Walk a collection's index frame to the element selected by idx_pos,
+        run at_slot_fn(elem_pos, payload_pos) there and walk back.
+
+        carry_in is moved into the payload before leaving and carry_out
+        receives the payload after returning. Out-of-range indexes leave the
+        collection untouched (carry_out then receives zeros); check_range=False
+        is for callers that already checked.
+        """
+        elem_size = base_info['elem_size']
+        length = base_info.get('length', 1)
+        frame = base_info['frame']
+        width = base_info['pos'] - frame
+        hole, count, back, payload = frame, frame + 1, frame + 2, frame + 3
+
+        if carry_in is not None:
+            self._move_block(carry_in, payload, elem_size)
+
+        def _walk():
+            self._copy_cell(idx_pos, count, hole)
+            self._move_pointer(count)
+            self.bf_code.append('[-')
+            self._move_pointer(back)
+            self.bf_code.append('+')
+            self._rotate_index_frame(frame, width, elem_size, outward=True)
+            self._move_pointer(count + elem_size)
+            self._rebase_pointer(count)
+            self.bf_code.append(']')
+
+            at_slot_fn(base_info['pos'], payload)
+
+            self._move_pointer(back)
+            self.bf_code.append('[-')
+            self._rotate_index_frame(frame, width, elem_size, outward=False)
+            self._move_pointer(back - elem_size)
+            self._rebase_pointer(back)
+            self.bf_code.append(']')
+
+        if check_range and length < 256:
+            self._generate_if_index_in_range(base_info, idx_pos, _walk)
+            if carry_in is not None:
+                self._generate_clear_block(payload, elem_size)
+        else:
+            _walk()
+
+        if carry_out is not None:
+            self._move_block(payload, carry_out, elem_size)
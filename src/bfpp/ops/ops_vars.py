@@ -9,6 +9,8 @@ class VarsOpsMixin:
     _FLOAT_SCALE = 1000
     _FLOAT_R1_MIN = -32.768
     _FLOAT_R1_MAX = 32.767
+    # Shorter collections keep the per-slot fan-out for runtime subscripts
+    _INDEX_FRAME_MIN_LENGTH = 4
 
     def _parse_float_literal_scaled(self, token: str) -> int:
         try:
@@ -77,6 +79,7 @@ class VarsOpsMixin:
                 'is_dict': info.get('is_dict', False),
                 'elem_size': info.get('elem_size', info['size']),
                 'length': info.get('length', 1),
+                'frame': info.get('frame'),
             }
 
         if info.get('is_array', False):
@@ -118,6 +121,17 @@ class VarsOpsMixin:
 
         raise ValueError(f"Variable '{base}' does not support subscript access")
 
+    def _reserve_index_frame(self, elem_size, length):
+        # Index frame in front of a collection, used for runtime subscripts.
+        if length < self._INDEX_FRAME_MIN_LENGTH:
+            return None
+        frame = self.max_ptr
+        width = self._index_frame_width(elem_size)
+        self.max_ptr += width
+        for i in range(width):
+            self._generate_clear(frame + i)
+        return frame
+
     def _collection_element_ref(self, base_name, index):
         return f"{base_name}[{index}]"
 
@@ -129,6 +143,8 @@ class VarsOpsMixin:
         if not dest_info.get('is_array') and not dest_info.get('is_dict'):
             raise ValueError("Not a collection")
 
+        # Cleared up front, each cell's constant loop can count on the next
+        self._generate_clear_block(dest_info['pos'], length * elem_size)
         if dest_info['type'] in ('int', 'float', 'float64', 'expfloat'):
             byte_values = int(value).to_bytes(8, 'little', signed=True)
             for idx in range(length):
@@ -156,6 +172,52 @@ class VarsOpsMixin:
         for idx in range(length):
             self._set_string_value_at_pos(string_token, dest_info['pos'] + idx * elem_size, elem_size)
 
+    # ===== Compile-time value tracking =====
+
+    _TRACKED_VALUE_TYPES = ('byte', 'char', 'int', 'int16', 'int64')
+
+    def _remember_value(self, ref, value):
+        """Record that scalar integer `ref` now holds `value` (wrapped to its width)."""
+        info = self.variables.get(ref)
+        if (self.state.block_depth or self.state.macros or info is None
+                or info.get('is_array') or info.get('is_dict')
+                or info['type'] not in self._TRACKED_VALUE_TYPES):
+            self.state.known_values.pop(ref, None)
+            return
+        self.state.known_values[ref] = int(value) & ((1 << (8 * info['size'])) - 1)
+
+    def _forget_value(self, ref):
+        """Drop any compile-time knowledge about `ref` after an opaque write."""
+        self.state.known_values.pop(ref[1:] if ref.startswith('$') else ref, None)
+
+    def _forget_all_values(self):
+        """Drop all compile-time knowledge (control flow or a raw tape write)."""
+        self.state.known_values.clear()
+
+    def _known_operand_value(self, operand, size=8):
+        """
+        Signed value `operand` would have once loaded with _load_operand at `size`
+        bytes, or None when it is not known at compile time.
+        """
+        bits = 8 * size
+        if operand.startswith('$') or operand in self.variables:
+            name = operand[1:] if operand.startswith('$') else operand
+            raw = self.state.known_values.get(name)
+            if raw is None:
+                return None
+            # Sign-extend from the variable's width, then widen/truncate to `size`
+            var_bits = 8 * self.variables[name]['size']
+            value = raw - (1 << var_bits) if raw >> (var_bits - 1) else raw
+            value &= (1 << bits) - 1
+            return value - (1 << bits) if value >> (bits - 1) else value
+        try:
+            value = int(operand)
+        except ValueError:
+            return None
+        if not -(1 << (bits - 1)) <= value < (1 << (bits - 1)):
+            return None
+        return value
+
     def _move_to_var(self, var_name):
         """Move pointer to the start of a variable's memory location."""
         var_info = self._resolve_var(var_name)
@@ -231,6 +293,7 @@ class VarsOpsMixin:
 
             length = len(keys)
             size = elem_size * length
+            frame = self._reserve_index_frame(elem_size, length)
             var_pos = self.max_ptr
             self.variables[var_name] = {
                 'pos': var_pos,
@@ -241,6 +304,7 @@ class VarsOpsMixin:
                 'elem_size': elem_size,
                 'length': length,
                 'key_map': {k: i for i, k in enumerate(keys)},
+                'frame': frame,
             }
             self.max_ptr += size
             for i in range(size):
@@ -284,6 +348,7 @@ class VarsOpsMixin:
                 length = 1
                 size = elem_size
 
+            frame = self._reserve_index_frame(elem_size, length) if is_array else None
             var_pos = self.max_ptr
             self.variables[var_name] = {
                 'pos': var_pos,
@@ -293,6 +358,7 @@ class VarsOpsMixin:
                 'is_dict': False,
                 'elem_size': elem_size,
                 'length': length,
+                'frame': frame,
             }
             self.max_ptr += size
             for i in range(size):
@@ -314,6 +380,7 @@ class VarsOpsMixin:
         size = elem_size * (length if is_array else 1)
 
         # Allocate variable
+        frame = self._reserve_index_frame(elem_size, length) if is_array else None
         var_pos = self.max_ptr
         self.variables[var_name] = {
             'pos': var_pos,
@@ -322,19 +389,22 @@ class VarsOpsMixin:
             'is_array': is_array,
             'elem_size': elem_size,
             'length': (length if is_array else 1),
+            'frame': frame,
         }
         self.max_ptr += size
 
         # Initialize to zero
         for i in range(size):
             self._generate_clear(var_pos + i)
+        self._remember_value(var_name, 0)
 
-    def _handle_set(self, tokens):
+    def _handle_set(self, tokens, expr=None):
         """
         Handle variable assignment.
 
         Syntax: set <value> on <var>
         Supports: literals, strings, variables ($var), expressions
+        expr is the value's expression tree from the parser, when known.
         """
         if 'on' not in tokens:
             raise ValueError("`set` requires `on <var>` clause")
@@ -356,7 +426,7 @@ class VarsOpsMixin:
                 def _slot_set_string(pos, slot):
                     self._set_string_value_at_pos(expr_tokens[0], pos, base_info['elem_size'])
 
-                self._apply_runtime_subscript_op(base_info, idx_var, _slot_set_string)
+                self._apply_runtime_subscript_in_frame(base_info, idx_var, _slot_set_string)
                 return
 
             if base_info['type'] == 'string':
@@ -376,7 +446,7 @@ class VarsOpsMixin:
                 else:
                     self._generate_set_value(int(value), pos=pos)
 
-            self._apply_runtime_subscript_op(base_info, idx_var, _slot_set_num)
+            self._apply_runtime_subscript_in_frame(base_info, idx_var, _slot_set_num)
             return
 
         dest_info = self._resolve_var(dest_ref)
@@ -417,12 +487,13 @@ class VarsOpsMixin:
                 self._set_collection_numeric_literal(lit, dest_info)
             else:
                 self._set_numeric_literal(lit, dest_ref)
+                self._remember_value(dest_ref, lit)
 
         # Expression or variable copy
         elif expr_tokens[0].startswith('$') or any(op in expr_tokens for op in ['+', '-', '*', '/', '%', '&', '|', '^', '~']):
             if dest_info.get('is_array') or dest_info.get('is_dict'):
                 raise NotImplementedError("Cannot assign expression to whole array/dict; use an element like a[0] or m[key]")
-            self._handle_expression_assignment(expr_tokens, dest_ref)
+            self._handle_expression_assignment(expr_tokens, dest_ref, expr)
 
         # Numeric literal
         else:
@@ -444,6 +515,7 @@ class VarsOpsMixin:
                 self._set_collection_numeric_literal(lit, dest_info)
             else:
                 self._set_numeric_literal(lit, dest_ref)
+                self._remember_value(dest_ref, lit)
 
     def _set_string_literal(self, string_token, dest_var):
         """Set a string literal value to a string variable."""
@@ -456,8 +528,7 @@ class VarsOpsMixin:
         self._move_to_var(dest_var)
         for char in string_val:
             self._generate_set_value(ord(char))
-            self.bf_code.append('>')
-            self.current_ptr += 1
+            self._move_pointer(self.current_ptr + 1)
         self._generate_set_value(0)  # Null terminator
         # Move pointer back to start of string
         self._move_to_var(dest_var)
@@ -495,26 +566,33 @@ class VarsOpsMixin:
                 if not (base_info.get('is_array') or base_info.get('is_dict')):
                     raise ValueError("Runtime subscript target must be array or dict")
 
-                def _slot_incdec(pos, slot):
-                    if base_info['type'] in ('int', 'int16', 'int64'):
+                if base_info['type'] in ('int', 'int16', 'int64'):
+                    def _elem_incdec(pos):
                         elem_size = base_info['elem_size']
                         if operation == 'inc':
                             self._increment_multi_byte(pos, size=elem_size)
                         else:
                             self._decrement_multi_byte(pos, size=elem_size)
+
+                    self._apply_runtime_subscript_buffered(base_info, idx_var, _elem_incdec)
+                    return
+
+                def _slot_incdec(pos, slot):
+                    self._move_pointer(pos)
+                    if operation == 'inc':
+                        self.bf_code.append('+')
                     else:
-                        self._move_pointer(pos)
-                        if operation == 'inc':
-                            self.bf_code.append('+')
-                        else:
-                            self.bf_code.append('-')
+                        self.bf_code.append('-')
 
-                self._apply_runtime_subscript_op(base_info, idx_var, _slot_incdec)
+                self._apply_runtime_subscript_in_frame(base_info, idx_var, _slot_incdec)
                 return
 
             self._move_to_var(var_name)
 
         if var_name is not None:
+            known = self.state.known_values.get(var_name)
+            if known is not None:
+                self._remember_value(var_name, known + (1 if operation == 'inc' else -1))
             var_info = self._resolve_var(var_name)
             if var_info['type'] in ('int', 'int16', 'int64'):
                 elem_size = var_info['size']
@@ -523,6 +601,9 @@ class VarsOpsMixin:
                 else:
                     self._decrement_multi_byte(var_info['pos'], size=elem_size)
                 return
+        else:
+            # Raw +/- on whatever cell the pointer is at
+            self._forget_all_values()
 
         if operation == 'inc':
             self.bf_code.append('+')
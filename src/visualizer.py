@@ -4,8 +4,11 @@ import numpy as np
 from numba import jit, njit
 from PIL import Image, ImageDraw, ImageFont
 import io
-from concurrent.futures import ThreadPoolExecutor
+import os
 import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 # Attempt to import cv2, provide a message if it's not found for the export feature.
 try:
@@ -29,7 +32,8 @@ from matplotlib.figure import Figure
 
 # Optimized JIT loop with better performance characteristics
 @njit(cache=True, fastmath=True)
-def jit_loop_optimized(program_arr, memory, pc, pointer, bracket_map_arr, max_steps=50000):
+def jit_loop_optimized(program_arr, memory, pc, pointer, bracket_map_arr,
+                       break_mask, watch_addrs, watch_values, resume_pc=-1, max_steps=50000):
     """
     Highly optimized JIT-compiled BrainFuck execution loop.
 
@@ -38,16 +42,30 @@ def jit_loop_optimized(program_arr, memory, pc, pointer, bracket_map_arr, max_st
     - Added fastmath=True for numerical operations
     - Optimized memory wrapping logic
     - Better branch prediction hints through code organization
+
+    Debugging:
+    - break_mask: uint8 per program position; stops before executing a marked
+      instruction (except at resume_pc on the first step, so a stopped
+      breakpoint can be resumed). Empty when there are no breakpoints, which
+      skips the per-step test
+    - watch_addrs / watch_values: stops after a write to a watched cell whose
+      new value equals the watch value, or on any write when it is -1
     """
     stop_reason = 0
     mem_len = len(memory)
     prog_len = len(program_arr)
+    n_watch = len(watch_addrs)
+    has_breaks = len(break_mask) > 0
     steps = 0
 
     # Pre-calculate memory bounds to avoid repeated calculations
     mem_mask = mem_len - 1 if (mem_len & (mem_len - 1)) == 0 else -1
 
     while pc < prog_len and steps < max_steps:
+        if has_breaks and break_mask[pc] != 0 and not (steps == 0 and pc == resume_pc):
+            stop_reason = 6  # Breakpoint
+            break
+
         command = program_arr[pc]
 
         # Group related operations for better branch prediction
@@ -61,10 +79,22 @@ def jit_loop_optimized(program_arr, memory, pc, pointer, bracket_map_arr, max_st
                 pointer = (pointer - 1) & mem_mask
             else:
                 pointer = (pointer - 1) % mem_len
-        elif command == 43:  # '+'
-            memory[pointer] = (memory[pointer] + 1) & 255  # Faster than modulo
-        elif command == 45:  # '-'
-            memory[pointer] = (memory[pointer] - 1) & 255
+        elif command == 43 or command == 45:  # '+' / '-'
+            if command == 43:
+                memory[pointer] = (memory[pointer] + 1) & 255  # Faster than modulo
+            else:
+                memory[pointer] = (memory[pointer] - 1) & 255
+            if n_watch > 0:
+                hit = False
+                for w in range(n_watch):
+                    if watch_addrs[w] == pointer and (watch_values[w] < 0 or watch_values[w] == memory[pointer]):
+                        hit = True
+                        break
+                if hit:
+                    pc += 1
+                    steps += 1
+                    stop_reason = 7  # Watchpoint
+                    break
         elif command == 46:  # '.'
             stop_reason = 1  # Stop for output
             break
@@ -81,7 +111,9 @@ def jit_loop_optimized(program_arr, memory, pc, pointer, bracket_map_arr, max_st
         pc += 1
         steps += 1
 
-    if pc >= prog_len:
+    if stop_reason >= 6:
+        pass
+    elif pc >= prog_len:
         stop_reason = 3  # End of program
     elif steps >= max_steps:
         stop_reason = 4  # Max steps reached
@@ -136,6 +168,309 @@ def jit_execute_bulk(program_arr, memory, pc, pointer, bracket_map_arr, target_s
     return pc, pointer, steps
 
 
+def load_export_fonts():
+    """Load the (normal, large, small) fonts used for video frames."""
+    try:
+        return (ImageFont.truetype("courier.ttf", 11),
+                ImageFont.truetype("courier.ttf", 13),
+                ImageFont.truetype("courier.ttf", 9))
+    except OSError:
+        font = ImageFont.load_default()
+        return font, font, font
+
+
+def _bgr(rgb):
+    """Convert an RGB color tuple to a uint8 BGR vector for frame blending."""
+    r, g, b = rgb
+    return np.array((b, g, r), dtype=np.uint8)
+
+
+def _blend(region, alpha, color):
+    """Alpha-blend `color` into a uint8 `region` in place (uint8 alpha, 255 = opaque)."""
+    a = alpha[..., None].astype(np.uint16)
+    mixed = region * (255 - a) + color.astype(np.uint16) * a + 127
+    region[...] = mixed // 255
+
+
+class GlyphAtlas:
+    """
+    Pre-rasterized alpha masks for the printable ASCII range of a PIL font.
+
+    Every glyph is rendered once into a (glyph_height, glyph_width) uint8 mask;
+    text is then drawn by concatenating mask slices instead of calling PIL.
+    """
+    FIRST = 32
+    LAST = 126
+
+    def __init__(self, font):
+        probe = ImageDraw.Draw(Image.new('L', (1, 1)))
+        codes = range(self.FIRST, self.LAST + 1)
+        boxes = [probe.textbbox((0, 0), chr(c), font=font) for c in codes]
+
+        self.advances = np.array([max(1, box[2]) for box in boxes], dtype=np.int32)
+        self.advances[0] = max(1, int(probe.textlength(' ', font=font)))
+        self.glyph_width = int(self.advances.max())
+        self.glyph_height = max(1, max(box[3] for box in boxes))
+
+        self.alpha = np.zeros((len(boxes), self.glyph_height, self.glyph_width), dtype=np.uint8)
+        for i, c in enumerate(codes):
+            img = Image.new('L', (self.glyph_width, self.glyph_height), 0)
+            ImageDraw.Draw(img).text((0, 0), chr(c), fill=255, font=font)
+            self.alpha[i] = np.asarray(img, dtype=np.uint8)
+
+    def indices(self, text):
+        """Atlas indices for `text`; characters outside the atlas map to a space."""
+        codes = np.frombuffer(text.encode('ascii', 'replace'), dtype=np.uint8).astype(np.intp)
+        codes[(codes < self.FIRST) | (codes > self.LAST)] = self.FIRST
+        return codes - self.FIRST
+
+    def render(self, text):
+        """Return the (glyph_height, width) alpha mask of a single line of text."""
+        if not text:
+            return np.zeros((self.glyph_height, 0), dtype=np.uint8)
+        return np.concatenate([self.alpha[i, :, :self.advances[i]] for i in self.indices(text)], axis=1)
+
+
+class FrameRenderer:
+    """
+    Vectorized video frame renderer.
+
+    Glyph atlases, the static frame background and the per-value cell labels are
+    built once. Each frame then only copies the background into a reusable BGR
+    uint8 buffer and composes the status text, memory grid, pointer highlight and
+    code window with numpy slicing, so the result can go straight to cv2.
+    """
+
+    BACKGROUND = (25, 25, 25)
+    POINTER_COLOR = (255, 165, 0)
+    OUTLINE_COLOR = (100, 100, 100)
+    ZERO_FILL = (60, 60, 60)
+
+    CELL_WIDTH = 45
+    CELL_HEIGHT = 30
+    CELLS_PER_ROW = 25
+    CELLS_VISIBLE = 100
+    GRID_X = 20
+    GRID_Y = 134
+    CODE_Y = 274
+    CODE_COMMANDS = '+-<>[].,'
+    CODE_CACHE_SCREENS = 4
+    OUTPUT_TAIL = 80
+
+    def __init__(self, width, height, program="", fonts=None):
+        self.width = width
+        self.height = height
+        font, font_large, font_small = fonts if fonts is not None else load_export_fonts()
+
+        self.atlas = GlyphAtlas(font)
+        self.atlas_small = GlyphAtlas(font_small)
+        self.frame = np.empty((height, width, 3), dtype=np.uint8)
+
+        self._colors = {
+            'title': _bgr((255, 255, 255)),
+            'status': _bgr((200, 200, 200)),
+            'label': _bgr((180, 180, 180)),
+            'pointer': _bgr(self.POINTER_COLOR),
+            'pointer_text': _bgr((0, 0, 0)),
+            'value_text': _bgr((255, 255, 255)),
+            'zero_text': _bgr((120, 120, 120)),
+            'outline': _bgr(self.OUTLINE_COLOR),
+            'zero_fill': _bgr(self.ZERO_FILL),
+            'code': _bgr((170, 170, 170)),
+        }
+
+        self._build_background(GlyphAtlas(font_large))
+        self._build_value_tiles()
+        self._build_code_window(program)
+
+    # ----- One-time setup -----
+
+    def _build_background(self, atlas_large):
+        self._base = np.empty_like(self.frame)
+        self._base[...] = _bgr(self.BACKGROUND)
+        self._draw_text(self._base, 20, 15, "BrainFuck Execution Visualizer", self._colors['title'], atlas_large)
+        self._draw_text(self._base, 20, self.GRID_Y - 25, "Memory Visualization:", self._colors['label'])
+        self._draw_text(self._base, 20, self.CODE_Y, "Program:", self._colors['label'])
+
+    def _build_value_tiles(self):
+        # One centered alpha tile per byte value, sized like a memory cell.
+        ch, cw = self.CELL_HEIGHT, self.CELL_WIDTH
+        self._value_tiles = np.zeros((256, ch, cw), dtype=np.uint8)
+        for v in range(256):
+            mask = self.atlas_small.render(str(v))
+            h, w = min(mask.shape[0], ch - 1), min(mask.shape[1], cw - 1)
+            y = (ch - 1 - h) // 2
+            x = (cw - 1 - w) // 2
+            self._value_tiles[v, y:y + h, x:x + w] = mask[:h, :w]
+
+    def _build_code_window(self, program):
+        # The program is kept as one glyph index per cell. Rows are rasterized
+        # onto the background color into a cache of CODE_CACHE_SCREENS screens
+        # around the PC, so memory does not grow with the program; each frame
+        # copies the visible rows and redraws only the PC cell.
+        atlas = self.atlas
+        self._code_cell_w = int(max(atlas.advances[ord(c) - atlas.FIRST] for c in self.CODE_COMMANDS)) + 1
+        self._code_line_h = atlas.glyph_height + 4
+        self._code_cols = max(1, (self.width - 40) // self._code_cell_w)
+        self._code_rows = max(0, (self.height - self.CODE_Y - 40) // self._code_line_h)
+
+        self._code_tiles = np.zeros((len(self.CODE_COMMANDS) + 1, self._code_line_h, self._code_cell_w), dtype=np.uint8)
+        lut = np.zeros(256, dtype=np.uint8)
+        for i, c in enumerate(self.CODE_COMMANDS, start=1):
+            glyph = atlas.alpha[ord(c) - atlas.FIRST]
+            w = min(glyph.shape[1], self._code_cell_w)
+            self._code_tiles[i, 2:2 + atlas.glyph_height, :w] = glyph[:, :w]
+            lut[ord(c)] = i
+
+        codes = lut[np.frombuffer(program.encode('ascii', 'replace'), dtype=np.uint8)]
+        lines = -(-len(codes) // self._code_cols)
+        self._code_grid = np.zeros(lines * self._code_cols, dtype=np.uint8)
+        self._code_grid[:len(codes)] = codes
+        self._code_grid = self._code_grid.reshape(lines, self._code_cols)
+        self._program_len = len(codes)
+
+        rows = min(lines, self._code_rows * self.CODE_CACHE_SCREENS)
+        self._code_image = np.empty((rows * self._code_line_h, self._code_cols * self._code_cell_w, 3), dtype=np.uint8)
+        self._code_image_first = -1
+
+    # ----- Drawing primitives -----
+
+    def _draw_text(self, frame, x, y, text, color, atlas=None):
+        mask = (atlas or self.atlas).render(text)
+        h = min(mask.shape[0], self.height - y)
+        w = min(mask.shape[1], self.width - x)
+        if h > 0 and w > 0:
+            _blend(frame[y:y + h, x:x + w], mask[:h, :w], color)
+
+    # ----- Per-frame composition -----
+
+    @classmethod
+    def memory_bounds(cls, pointer, mem_len):
+        """The [start, stop) range of tape cells a frame shows around `pointer`."""
+        half = cls.CELLS_VISIBLE // 2
+        return max(0, pointer - half), min(mem_len, pointer + half)
+
+    def render(self, runner_state):
+        """
+        Compose one frame for `runner_state` and return the reusable BGR buffer.
+
+        The state is shaped like `BrainFuckRunner.copy_state`, optionally with
+        a sixth element: the tape address of memory[0] when only the cells in
+        `memory_bounds` are passed.
+        """
+        pc, pointer, memory, step_count, output_buffer = runner_state[:5]
+        base = runner_state[5] if len(runner_state) > 5 else 0
+        frame = self.frame
+        np.copyto(frame, self._base)
+
+        val = int(memory[pointer - base])
+        ascii_char = chr(val) if 32 <= val <= 126 else '.'
+        self._draw_text(frame, 20, 50,
+                        f"Step: {step_count:,}  |  PC: {pc}  |  Pointer: {pointer}  |  Value: {val} ('{ascii_char}')",
+                        self._colors['status'])
+        self._draw_text(frame, 20, 72, f"Output: {''.join(output_buffer[-self.OUTPUT_TAIL:])}", self._colors['status'])
+
+        self._render_memory_grid(frame, memory, pointer, base)
+        self._render_code_window(frame, pc)
+        return frame
+
+    def _render_memory_grid(self, frame, memory, pointer, base=0):
+        mem_start, mem_end = self.memory_bounds(pointer, base + len(memory))
+        count = mem_end - mem_start
+        if count <= 0:
+            return
+
+        cols = self.CELLS_PER_ROW
+        rows = -(-count // cols)
+        ch, cw = self.CELL_HEIGHT, self.CELL_WIDTH
+        c = self._colors
+
+        values = np.zeros(rows * cols, dtype=np.intp)
+        values[:count] = memory[mem_start - base:mem_end - base]
+        nonzero = values > 0
+
+        # Per-cell fill and text colors, (rows * cols, 3) in BGR.
+        fills = np.empty((rows * cols, 3), dtype=np.uint8)
+        fills[:] = c['zero_fill']
+        fills[nonzero, 0] = 40
+        fills[nonzero, 1] = np.minimum(255, 80 + values[nonzero])
+        fills[nonzero, 2] = 40
+        text = np.empty_like(fills)
+        text[:] = c['zero_text']
+        text[nonzero] = c['value_text']
+        ptr_idx = pointer - mem_start
+        fills[ptr_idx] = c['pointer']
+        text[ptr_idx] = c['pointer_text']
+
+        # View the grid area as (rows, cell_h, cols, cell_w, 3) so every cell is
+        # filled by a single broadcast assignment.
+        y0, x0 = self.GRID_Y, self.GRID_X
+        grid = frame[y0:y0 + rows * ch, x0:x0 + cols * cw].reshape(rows, ch, cols, cw, 3)
+        grid[:, :ch - 1, :, :cw - 1] = c['outline']
+        grid[:, 1:ch - 2, :, 1:cw - 2] = fills.reshape(rows, 1, cols, 1, 3)
+
+        alpha = self._value_tiles[values].reshape(rows, cols, ch, cw).transpose(0, 2, 1, 3)
+        _blend(grid, alpha, text.reshape(rows, 1, cols, 1, 3))
+
+        # Cells past the end of memory in the last row are left as background.
+        if count < rows * cols:
+            tail = frame[y0 + (rows - 1) * ch:y0 + rows * ch, x0 + (count % cols) * cw:x0 + cols * cw]
+            tail[...] = self._base[y0 + (rows - 1) * ch:y0 + rows * ch, x0 + (count % cols) * cw:x0 + cols * cw]
+
+        row, col = divmod(ptr_idx, cols)
+        self._draw_text(frame, x0 + col * cw, y0 + row * ch - 15, f"@{pointer}", c['pointer'], self.atlas_small)
+
+    def _render_code_window(self, frame, pc):
+        if self._code_rows == 0 or self._code_grid.shape[0] == 0:
+            return
+
+        lines, cols = self._code_grid.shape
+        visible = min(self._code_rows, lines)
+        pc_line = min(pc, max(0, self._program_len - 1)) // cols
+        first = min(max(0, pc_line - visible // 2), lines - visible)
+
+        lh, cw = self._code_line_h, self._code_cell_w
+        cached = self._code_image.shape[0] // lh
+        start = self._code_image_first
+        if start < 0 or first < start or first + visible > start + cached:
+            # Re-center the cache on the visible rows
+            start = min(max(0, first - (cached - visible) // 2), lines - cached)
+            self._render_code_rows(start)
+        y0, x0 = self.CODE_Y + 22, 20
+        region = frame[y0:y0 + visible * lh, x0:x0 + cols * cw]
+        region[...] = self._code_image[(first - start) * lh:(first - start + visible) * lh]
+
+        if pc < self._program_len:
+            row, col = divmod(pc, cols)
+            cell = region[(row - first) * lh:(row - first + 1) * lh, col * cw:(col + 1) * cw]
+            cell[...] = self._colors['pointer']
+            _blend(cell, self._code_tiles[self._code_grid[row, col]], self._colors['code'])
+
+
+    def _render_code_rows(self, start):
+        """Rasterize the program rows from `start` into the code image cache."""
+        image = self._code_image
+        lh = self._code_line_h
+        rows = image.shape[0] // lh
+        image[...] = _bgr(self.BACKGROUND)
+        alpha = self._code_tiles[self._code_grid[start:start + rows]].transpose(0, 2, 1, 3)
+        _blend(image, alpha.reshape(image.shape[:2]), self._colors['code'])
+        self._code_image_first = start
+
+
+# Per-process renderer for the export pool, built once by the pool initializer
+_worker_renderer = None
+
+
+def _init_frame_worker(width, height, program):
+    global _worker_renderer
+    _worker_renderer = FrameRenderer(width, height, program)
+
+
+def _render_frame_worker(runner_state):
+    return _worker_renderer.render(runner_state)
+
+
 class VideoExportThread(QThread):
     """Highly optimized video export thread."""
     progress_update = pyqtSignal(int)
@@ -150,10 +485,15 @@ class VideoExportThread(QThread):
         self.duration = duration
         self.cancelled = False
 
-        # Pre-allocate frame buffer for better memory management
         self.frame_width = 1200
         self.frame_height = 800
-        self.frame_buffer = None
+        # One record per exported frame while exporting, cleared afterwards
+        self.snapshots = TapeSnapshots(keyframe_interval=fps)
+
+        # Rendering runs in worker processes; the QThread only steps the runner,
+        # snapshots state and writes finished frames in submission order.
+        self.workers = max(1, (os.cpu_count() or 2) - 1)
+        self.max_pending_frames = self.workers * 2
 
     def run(self):
         try:
@@ -172,22 +512,34 @@ class VideoExportThread(QThread):
 
             self.status_update.emit("Initializing video export...")
 
-            # Pre-compile font for better performance
-            try:
-                self.font = ImageFont.truetype("courier.ttf", 11)
-                self.font_large = ImageFont.truetype("courier.ttf", 13)
-                self.font_small = ImageFont.truetype("courier.ttf", 9)
-            except:
-                self.font = ImageFont.load_default()
-                self.font_large = self.font
-                self.font_small = self.font
+            # Each worker builds its own glyph atlases and background once
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_frame_worker,
+                initargs=(self.frame_width, self.frame_height, runner.program),
+            )
 
+            # Bounded reorder buffer: futures are kept in submission order and the
+            # oldest one is always written first, so a slow frame stalls the writer
+            # rather than being overtaken by later ones.
+            pending = deque()
             frames_generated = 0
+            snapshots = self.snapshots
+            snapshots.clear()
+
+            def write_oldest():
+                nonlocal frames_generated
+                video_writer.write(pending.popleft().result())
+                frames_generated += 1
+
+                progress = min(99, int(frames_generated * 100 / total_frames))
+                self.progress_update.emit(progress)
 
-            # Use ThreadPoolExecutor for parallel frame generation
-            with ThreadPoolExecutor(max_workers=2) as executor:
-                frame_futures = []
+                if frames_generated % 30 == 0:
+                    self.status_update.emit(f"Generated {frames_generated}/{total_frames} frames...")
 
+            try:
                 for frame_idx in range(total_frames):
                     if self.cancelled:
                         break
@@ -208,32 +560,25 @@ class VideoExportThread(QThread):
                                     break
                                 runner.step()
 
-                    # Submit frame generation to thread pool
-                    if len(frame_futures) < 4:  # Limit concurrent frames
-                        future = executor.submit(self._create_frame_optimized, runner.copy_state())
-                        frame_futures.append(future)
-
-                    # Process completed frames
-                    completed_futures = [f for f in frame_futures if f.done()]
-                    for future in completed_futures:
-                        frame = future.result()
-                        video_writer.write(frame)
-                        frames_generated += 1
-                        frame_futures.remove(future)
-
-                    # Update progress
-                    progress = min(99, int(frames_generated * 100 / total_frames))
-                    self.progress_update.emit(progress)
-
-                    if frames_generated % 30 == 0:
-                        self.status_update.emit(f"Generated {frames_generated}/{total_frames} frames...")
-
-                # Process remaining frames
-                for future in frame_futures:
-                    if not self.cancelled:
-                        frame = future.result()
-                        video_writer.write(frame)
-                        frames_generated += 1
+                    # The runner keeps mutating, so workers get a snapshot; recording
+                    # keeps only changed cells, and only the visible cells and
+                    # output tail are sent
+                    snapshots.record(runner)
+                    pending.append(pool.submit(
+                        _render_frame_worker,
+                        snapshots.get(frame_idx, output_limit=FrameRenderer.OUTPUT_TAIL,
+                                      cells=FrameRenderer.memory_bounds(runner.pointer, len(runner.memory)))
+                    ))
+                    if len(pending) >= self.max_pending_frames:
+                        write_oldest()
+
+                while pending and not self.cancelled:
+                    write_oldest()
+            finally:
+                for future in pending:
+                    future.cancel()
+                pool.shutdown(wait=True)
+                snapshots.clear()
 
             video_writer.release()
 
@@ -245,103 +590,174 @@ class VideoExportThread(QThread):
         except Exception as e:
             self.finished_signal.emit(False, f"Error during export: {str(e)}")
 
-    def _create_frame_optimized(self, runner_state):
-        """Optimized frame generation with better layout and performance."""
-        # Create image with better color scheme
-        img = Image.new('RGB', (self.frame_width, self.frame_height), color=(25, 25, 25))
-        draw = ImageDraw.Draw(img)
+    def cancel(self):
+        self.cancelled = True
+
 
-        pc, pointer, memory, step_count, output_buffer = runner_state
-        y_offset = 15
+class TapeSnapshots:
+    """
+    Compact snapshot store for runner states.
 
-        # Title with better styling
-        draw.text((20, y_offset), "BrainFuck Execution Visualizer",
-                  fill=(255, 255, 255), font=self.font_large)
-        y_offset += 35
+    Every `keyframe_interval`-th record keeps a full copy of the tape; records in
+    between keep only the (addresses, values) of cells that changed since the
+    previous record. Output is kept once in an append-only list and each record
+    only stores its length, so recording never copies the whole output buffer.
+    States are rebuilt on demand from the nearest keyframe at or before them.
+    """
 
-        # Status information in a more compact layout
-        val = memory[pointer]
-        ascii_char = chr(val) if 32 <= val <= 126 else '.'
+    def __init__(self, keyframe_interval=32):
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.clear()
 
-        status_lines = [
-            f"Step: {step_count:,}  |  PC: {pc}  |  Pointer: {pointer}  |  Value: {val} ('{ascii_char}')",
-            f"Output: {''.join(output_buffer[-80:])}"  # Show more output
-        ]
-
-        for line in status_lines:
-            draw.text((20, y_offset), line, fill=(200, 200, 200), font=self.font)
-            y_offset += 22
-
-        y_offset += 15
-
-        # Memory visualization with improved layout
-        draw.text((20, y_offset), "Memory Visualization:", fill=(180, 180, 180), font=self.font)
-        y_offset += 25
-
-        # Show more memory cells in a grid
-        mem_start = max(0, pointer - 50)
-        mem_end = min(len(memory), pointer + 50)
-
-        x_start = 20
-        y_start = y_offset
-        cell_width = 45
-        cell_height = 30
-        cells_per_row = 25
-
-        for i, addr in enumerate(range(mem_start, mem_end)):
-            row = i // cells_per_row
-            col = i % cells_per_row
-
-            x = x_start + col * cell_width
-            y = y_start + row * cell_height
-
-            val = memory[addr]
-
-            # Choose colors based on cell state
-            if addr == pointer:
-                # Pointer position - bright orange
-                fill_color = (255, 165, 0)
-                text_color = (0, 0, 0)
-            elif val > 0:
-                # Non-zero value - green gradient based on value
-                intensity = min(255, 80 + val)
-                fill_color = (40, intensity, 40)
-                text_color = (255, 255, 255)
-            else:
-                # Zero value - dark gray
-                fill_color = (60, 60, 60)
-                text_color = (120, 120, 120)
+    def clear(self):
+        self._records = []    # (pc, pointer, step_count, output_len, input_buffer)
+        self._keyframes = {}  # record index -> full tape copy
+        self._deltas = {}     # record index -> (changed addresses, new values)
+        self._output = []
+        self._tape = None     # tape as of the latest record
 
-            # Draw cell
-            draw.rectangle([x, y, x + cell_width - 2, y + cell_height - 2],
-                           fill=fill_color, outline=(100, 100, 100))
+    def __len__(self):
+        return len(self._records)
 
-            # Draw value
-            text = str(val)
-            text_bbox = draw.textbbox((0, 0), text, font=self.font_small)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            text_x = x + (cell_width - text_width) // 2
-            text_y = y + (cell_height - text_height) // 2
+    def record(self, runner):
+        """Append the current state of `runner` and return its index."""
+        index = len(self._records)
+        memory = runner.memory
 
-            draw.text((text_x, text_y), text, fill=text_color, font=self.font_small)
+        if self._tape is None or index % self.keyframe_interval == 0:
+            self._keyframes[index] = memory.copy()
+            self._tape = memory.copy()
+        else:
+            changed = np.flatnonzero(memory != self._tape)
+            values = memory[changed]
+            self._tape[changed] = values
+            self._deltas[index] = (changed, values)
+
+        # Output only ever grows, so only the new tail is copied in
+        output = runner.output_buffer
+        if len(output) > len(self._output):
+            self._output.extend(output[len(self._output):])
+
+        # The input buffer rarely changes; share the previous tuple when it hasn't
+        inputs = tuple(runner.input_buffer)
+        if self._records and self._records[-1][4] == inputs:
+            inputs = self._records[-1][4]
+
+        self._records.append((runner.pc, runner.pointer, runner.step_count, len(output), inputs))
+        return index
+
+    def get_step(self, index):
+        """Step count of record `index`."""
+        return self._records[index][2]
+
+    def find_step(self, step_count):
+        """Index of the latest record taken at or before `step_count` (records are in step order)."""
+        lo, hi = 0, len(self._records)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._records[mid][2] <= step_count:
+                lo = mid + 1
+            else:
+                hi = mid
+        return max(0, lo - 1)
 
-            # Draw address for pointer position
-            if addr == pointer:
-                addr_text = f"@{addr}"
-                draw.text((x, y - 15), addr_text, fill=(255, 165, 0), font=self.font_small)
+    def memory_at(self, index):
+        """
+        Rebuild the full tape for record `index`.
 
-        # Convert PIL image to OpenCV format
-        img_array = np.array(img)
-        return cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+        The latest record's tape is returned as a read-only view, valid until
+        the next record() or truncate().
+        """
+        if index < 0:
+            index += len(self._records)
+        if not 0 <= index < len(self._records):
+            raise IndexError("snapshot index out of range")
+        if index == len(self._records) - 1:
+            view = self._tape.view()
+            view.flags.writeable = False
+            return view
+
+        start = index - index % self.keyframe_interval
+        while start not in self._keyframes:
+            start -= self.keyframe_interval
+        memory = self._keyframes[start].copy()
+        for i in range(start + 1, index + 1):
+            changed, values = self._deltas[i]
+            memory[changed] = values
+        return memory
+
+    def get(self, index, output_limit=None, cells=None):
+        """
+        Return record `index` in the same shape as `BrainFuckRunner.copy_state`.
+
+        With `output_limit`, only the last `output_limit` output characters are
+        returned (the frame renderer never shows more than that). With a
+        (start, stop) `cells` range, memory is a copy of just those cells and
+        `start` is appended as a sixth element, as `FrameRenderer.render`
+        accepts; otherwise the latest record's memory is a read-only view (see
+        memory_at).
+        """
+        memory = self.memory_at(index)
+        pc, pointer, step_count, output_len, _ = self._records[index]
+        start = 0 if output_limit is None else max(0, output_len - output_limit)
+        output = self._output[start:output_len]
+        if cells is None:
+            return pc, pointer, memory, step_count, output
+        return pc, pointer, memory[cells[0]:cells[1]].copy(), step_count, output, cells[0]
+
+    def restore(self, runner, index):
+        """Rewind `runner` to record `index` and drop every later record."""
+        if index < 0:
+            index += len(self._records)
+        pc, pointer, memory, step_count, output = self.get(index)
+        runner.pc = pc
+        runner.pointer = pointer
+        runner.memory[:] = memory
+        runner.step_count = step_count
+        runner.output_buffer = output
+        runner.input_buffer = list(self._records[index][4])
+        runner.history = [h for h in runner.history if h[0] <= step_count]
+        self.truncate(index + 1)
+
+    def drop_oldest(self, count):
+        """Forget the first `count` records, rounded down to whole keyframe intervals."""
+        count = min(count, len(self._records) - 1)
+        count -= count % self.keyframe_interval
+        if count <= 0:
+            return
+        del self._records[:count]
+        self._keyframes = {i - count: m for i, m in self._keyframes.items() if i >= count}
+        self._deltas = {i - count: d for i, d in self._deltas.items() if i > count}
 
-    def cancel(self):
-        self.cancelled = True
+    def truncate(self, length):
+        """Forget every record from `length` onwards."""
+        if length >= len(self._records):
+            return
+        if length <= 0:
+            self.clear()
+            return
+        last = length - 1
+        self._tape = self.memory_at(last)
+        del self._records[length:]
+        self._keyframes = {i: m for i, m in self._keyframes.items() if i < length}
+        self._deltas = {i: d for i, d in self._deltas.items() if i < length}
+        del self._output[self._records[last][3]:]
 
 
 class BrainFuckRunner:
     """Enhanced BrainFuck runner with fixed overflow issues."""
 
+    # Reverse execution: every single step is logged into ring buffers that
+    # grow on demand up to UNDO_LIMIT entries, and a checkpoint is taken every
+    # CHECKPOINT_INTERVAL steps and before every JIT batch. Stepping back pops
+    # the log in O(1); steps that are no longer logged are replayed from the
+    # nearest earlier checkpoint. Past CHECKPOINT_LIMIT checkpoints the oldest
+    # half is dropped, so history reaches back a bounded distance.
+    UNDO_LIMIT = 1 << 20
+    UNDO_INITIAL = 1 << 12
+    CHECKPOINT_INTERVAL = 4096
+    CHECKPOINT_LIMIT = 256
+
     def __init__(self):
         self.reset()
 
@@ -358,12 +774,35 @@ class BrainFuckRunner:
         self.step_count = 0
         self.history = []
 
+        # Undo log ring buffer: entry i undoes step _undo_step[i]. The arrays
+        # are allocated by the first logged step (see _grow_undo)
+        self._undo_step = None
+        self._undo_pc = None
+        self._undo_pointer = None
+        self._undo_addr = None  # -1: no memory write
+        self._undo_old = None
+        self._undo_cap = 0
+        self._undo_top = 0
+        self._undo_len = 0
+        self.checkpoints = TapeSnapshots(keyframe_interval=16)
+
+        # Debugging: PC breakpoints and {addr: value or None} watchpoints,
+        # mirrored into arrays for the JIT kernel when they change
+        self.breakpoints = set()
+        self.watchpoints = {}
+        self.last_watch_addr = -1
+        self._resume_pc = -1
+        self._debug_arrays = None
+
         # Arrays for Numba
         self.program_arr = np.array([], dtype=np.int32)
         self.bracket_map_arr = np.array([], dtype=np.int32)
 
     def load_program(self, program_text):
+        # Breakpoints and watchpoints are user settings and survive a reload
+        breakpoints, watchpoints = self.breakpoints, self.watchpoints
         self.reset()
+        self.breakpoints, self.watchpoints = breakpoints, watchpoints
         # Filter out non-BrainFuck characters
         self.program = "".join(filter(lambda x: x in ['.', ',', '[', ']', '<', '>', '+', '-'], program_text))
         self.program_arr = np.array([ord(c) for c in self.program], dtype=np.int32)
@@ -399,7 +838,11 @@ class BrainFuckRunner:
             return False, self.pointer, self.pointer, -1
 
         command = self.program[self.pc]
+        self._resume_pc = -1
+        if self.step_count % self.CHECKPOINT_INTERVAL == 0:
+            self._checkpoint()
         self.step_count += 1
+        self._log_undo(command)
 
         # Only store history periodically to save memory
         if self.step_count % 10 == 0:
@@ -448,6 +891,9 @@ class BrainFuckRunner:
         # Create a copy for change detection
         mem_before = self.memory.copy()
 
+        # Batches bypass the undo log, so stepping back into one replays it
+        self._checkpoint()
+
         # Dynamic step calculation based on program complexity
         base_steps = 10000
         if self.running:
@@ -456,10 +902,13 @@ class BrainFuckRunner:
         else:
             max_steps = base_steps
 
+        break_mask, watch_addrs, watch_values = self._get_debug_arrays()
         new_pc, new_pointer, stop_reason, steps = jit_loop_optimized(
             self.program_arr, self.memory, self.pc, self.pointer,
-            self.bracket_map_arr, max_steps
+            self.bracket_map_arr, break_mask, watch_addrs, watch_values,
+            self._resume_pc, max_steps
         )
+        self._resume_pc = -1
 
         # Efficiently find changed memory locations
         changed_indices = np.where(mem_before != self.memory)[0]
@@ -472,20 +921,182 @@ class BrainFuckRunner:
         if steps > 0:
             self.history.append((self.step_count, self.pc))
 
+        # The I/O instruction counts as a step, matching step()
         if stop_reason == 1:  # Output
             self.output_buffer.append(chr(self.memory[self.pointer]))
             self.pc += 1
+            self.step_count += 1
         elif stop_reason == 2:  # Input
             if self.input_buffer:
                 input_char = self.input_buffer.pop(0)
                 self.memory[self.pointer] = np.uint8(ord(input_char))
                 changed_indices = np.append(changed_indices, self.pointer)
                 self.pc += 1
+                self.step_count += 1
+                # The kernel only watches '+' and '-'
+                if self.watch_triggered(self.pointer):
+                    stop_reason = 7
+                    self.last_watch_addr = self.pointer
             else:
                 stop_reason = 5  # Paused for input
+        elif stop_reason == 6:  # Breakpoint, resumable from this pc
+            self.acknowledge_stop()
+        elif stop_reason == 7:  # Watchpoint, the write was at the pointer
+            self.last_watch_addr = self.pointer
 
         return stop_reason, changed_indices, steps
 
+    # ----- Breakpoints and watchpoints -----
+
+    def add_breakpoint(self, pc):
+        self.breakpoints.add(pc)
+        self._debug_arrays = None
+
+    def remove_breakpoint(self, pc):
+        self.breakpoints.discard(pc)
+        self._debug_arrays = None
+
+    def add_watchpoint(self, addr, value=None):
+        """Stop after a write to `addr` (only when it becomes `value`, if given)."""
+        self.watchpoints[addr] = value
+        self._debug_arrays = None
+
+    def remove_watchpoint(self, addr):
+        self.watchpoints.pop(addr, None)
+        self._debug_arrays = None
+
+    def clear_debug_points(self):
+        self.breakpoints.clear()
+        self.watchpoints.clear()
+        self._debug_arrays = None
+
+    def watch_triggered(self, addr):
+        """Whether a write to `addr` that just happened trips a watchpoint."""
+        if addr not in self.watchpoints:
+            return False
+        value = self.watchpoints[addr]
+        return value is None or int(self.memory[addr]) == value
+
+    def acknowledge_stop(self):
+        """Mark a breakpoint at the current pc as reported, so the next run executes it."""
+        if self.pc in self.breakpoints:
+            self._resume_pc = self.pc
+
+    def _get_debug_arrays(self):
+        if self._debug_arrays is None or self._debug_arrays[0] != len(self.program_arr):
+            # An empty mask tells the kernel there is nothing to test per step
+            size = len(self.program_arr) if self.breakpoints else 0
+            break_mask = np.zeros(size, dtype=np.uint8)
+            for pc in self.breakpoints:
+                if 0 <= pc < len(break_mask):
+                    break_mask[pc] = 1
+            watch_addrs = np.array(list(self.watchpoints), dtype=np.int32)
+            watch_values = np.array([-1 if v is None else v for v in self.watchpoints.values()], dtype=np.int32)
+            self._debug_arrays = (len(self.program_arr), break_mask, watch_addrs, watch_values)
+        return self._debug_arrays[1:]
+
+    # ----- Reverse execution -----
+
+    def _checkpoint(self):
+        """Record a checkpoint unless one already exists for this step count."""
+        cps = self.checkpoints
+        if not len(cps) or cps.get_step(-1) != self.step_count:
+            cps.record(self)
+            if len(cps) > self.CHECKPOINT_LIMIT:
+                cps.drop_oldest(len(cps) - self.CHECKPOINT_LIMIT // 2)
+
+    def _grow_undo(self):
+        """Double the undo log; it is full and has never wrapped, so its entries start at 0."""
+        cap = min(self.UNDO_LIMIT, max(self.UNDO_INITIAL, self._undo_cap * 2))
+        for name, dtype in (('_undo_step', np.int64), ('_undo_pc', np.int32), ('_undo_pointer', np.int32),
+                            ('_undo_addr', np.int32), ('_undo_old', np.uint8)):
+            grown = np.zeros(cap, dtype=dtype)
+            if self._undo_cap:
+                grown[:self._undo_cap] = getattr(self, name)
+            setattr(self, name, grown)
+        self._undo_top = self._undo_cap
+        self._undo_cap = cap
+
+    def _log_undo(self, command):
+        """Log how to undo the step about to be executed at `self.pc`."""
+        if self._undo_len == self._undo_cap < self.UNDO_LIMIT:
+            self._grow_undo()
+        i = self._undo_top
+        self._undo_step[i] = self.step_count
+        self._undo_pc[i] = self.pc
+        self._undo_pointer[i] = self.pointer
+        if command in '+-' or (command == ',' and self.input_buffer):
+            self._undo_addr[i] = self.pointer
+            self._undo_old[i] = self.memory[self.pointer]
+        else:
+            self._undo_addr[i] = -1
+        self._undo_top = (i + 1) % self._undo_cap
+        self._undo_len = min(self._undo_len + 1, self._undo_cap)
+
+    def step_back(self):
+        """
+        Undo the most recent step.
+
+        Returns False when already at the start of the program, or at the
+        oldest step still reachable from the log and checkpoints.
+        """
+        if self.step_count == 0:
+            return False
+
+        last = (self._undo_top - 1) % max(1, self._undo_cap)
+        if self._undo_len and self._undo_step[last] == self.step_count:
+            self._undo_top = last
+            self._undo_len -= 1
+            self.pc = int(self._undo_pc[last])
+            self.pointer = int(self._undo_pointer[last])
+            addr = int(self._undo_addr[last])
+            command = self.program[self.pc]
+            if command == '.':
+                self.output_buffer.pop()
+            elif command == ',' and addr != -1:
+                self.input_buffer.insert(0, chr(self.memory[addr]))
+            if addr != -1:
+                self.memory[addr] = self._undo_old[last]
+            self.step_count -= 1
+
+            # Checkpoints ahead of us may not match the path taken next
+            cps = self.checkpoints
+            if len(cps) and cps.get_step(-1) > self.step_count:
+                cps.truncate(cps.find_step(self.step_count) + 1)
+        elif self.checkpoints.get_step(0) < self.step_count:
+            self._replay_to(self.step_count - 1)
+        else:
+            return False
+
+        while self.history and self.history[-1][0] > self.step_count:
+            self.history.pop()
+        return True
+
+    def _replay_to(self, target_step):
+        """Restore the latest checkpoint at or before `target_step` and re-run up to it."""
+        cps = self.checkpoints
+        cps.restore(self, cps.find_step(target_step))
+        self._undo_top = 0
+        self._undo_len = 0
+
+        running = self.running
+        self.running = True
+        while self.step_count < target_step and self.pc < len(self.program):
+            self.step()
+        self.running = running
+
+    def run_back_to(self, pc):
+        """
+        Step backwards until the program counter equals `pc`.
+
+        Returns True if such a point was found, otherwise False with the runner
+        rewound as far as history reaches.
+        """
+        while self.step_back():
+            if self.pc == pc:
+                return True
+        return False
+
     def copy_state(self):
         """Create a lightweight copy of the current state for video generation."""
         return (self.pc, self.pointer, self.memory.copy(),
@@ -531,12 +1142,14 @@ class BrainFuckVisualizer(QMainWindow):
         control_layout = QVBoxLayout(control_group)
 
         self.step_button = QPushButton("Step (F5)")
+        self.step_back_button = QPushButton("Step Back (F4)")
         self.run_button = QPushButton("Run/Pause (F6)")
         self.stop_button = QPushButton("Stop (F7)")
         self.reset_button = QPushButton("Reset (F8)")
         self.export_video_button = QPushButton("Export HD Video")
 
         self.step_button.clicked.connect(self.step_execution)
+        self.step_back_button.clicked.connect(self.step_back_execution)
         self.run_button.clicked.connect(self.toggle_execution)
         self.stop_button.clicked.connect(self.stop_execution)
         self.reset_button.clicked.connect(self.reset_execution)
@@ -545,6 +1158,13 @@ class BrainFuckVisualizer(QMainWindow):
             self.export_video_button.setEnabled(False)
             self.export_video_button.setToolTip("Please install opencv-python to enable video export.")
 
+        self.breakpoints_edit = QLineEdit()
+        self.breakpoints_edit.setPlaceholderText("Breakpoints (PC), e.g. 12, 40")
+        self.breakpoints_edit.editingFinished.connect(self.update_debug_points)
+        self.watchpoints_edit = QLineEdit()
+        self.watchpoints_edit.setPlaceholderText("Watch addr[=value], e.g. 3, 5=0")
+        self.watchpoints_edit.editingFinished.connect(self.update_debug_points)
+
         speed_layout = QHBoxLayout()
         speed_layout.addWidget(QLabel("Speed:"))
         self.speed_slider = QSlider(Qt.Horizontal)
@@ -556,10 +1176,13 @@ class BrainFuckVisualizer(QMainWindow):
         speed_layout.addWidget(self.speed_label)
 
         control_layout.addWidget(self.step_button)
+        control_layout.addWidget(self.step_back_button)
         control_layout.addWidget(self.run_button)
         control_layout.addWidget(self.stop_button)
         control_layout.addWidget(self.reset_button)
         control_layout.addWidget(self.export_video_button)
+        control_layout.addWidget(self.breakpoints_edit)
+        control_layout.addWidget(self.watchpoints_edit)
         control_layout.addLayout(speed_layout)
         control_layout.addStretch()
 
@@ -612,6 +1235,7 @@ class BrainFuckVisualizer(QMainWindow):
         self.status_bar.addPermanentWidget(self.performance_info)
 
         # --- Shortcuts ---
+        QShortcut(QKeySequence("F4"), self, self.step_back_execution)
         QShortcut(QKeySequence("F5"), self, self.step_execution)
         QShortcut(QKeySequence("F6"), self, self.toggle_execution)
         QShortcut(QKeySequence("Space"), self, self.toggle_execution)
@@ -794,6 +1418,23 @@ class BrainFuckVisualizer(QMainWindow):
             QMessageBox.critical(self, "Execution Error", f"Error during execution: {str(e)}")
             self.stop_execution()
 
+    def step_back_execution(self):
+        """Undo the last executed instruction."""
+        if self.runner.running:
+            self.stop_execution()
+
+        if not self.runner.step_back():
+            self.status_info.setText("Already at the start of the program.")
+            return
+
+        # A replayed step can touch any cell, so refresh the visible table
+        for addr in range(min(len(self.runner.memory), self.memory_table.rowCount() * 16)):
+            self.update_memory_cell(addr)
+
+        self.update_code_highlight()
+        self.update_status_info()
+        self.update_output_display()
+
     def execute_step(self):
         """Enhanced execution step with performance monitoring and error handling."""
         if not self.runner.running:
@@ -830,6 +1471,13 @@ class BrainFuckVisualizer(QMainWindow):
                     self.stop_execution()
                     self.status_info.setText("Execution paused, waiting for input...")
                     return
+                elif stop_reason == 6:
+                    self.stop_at_debug_point(f"Breakpoint hit at PC {self.runner.pc}.")
+                    return
+                elif stop_reason == 7:
+                    addr = self.runner.last_watch_addr
+                    self.stop_at_debug_point(f"Watchpoint: memory[{addr}] = {int(self.runner.memory[addr])}.")
+                    return
             else:
                 # Single-step mode
                 continues, old_ptr, new_ptr, mem_addr = self.runner.step()
@@ -844,6 +1492,12 @@ class BrainFuckVisualizer(QMainWindow):
                     self.stop_execution()
                     self.status_info.setText("Program finished.")
                     return
+                if mem_addr != -1 and self.runner.watch_triggered(mem_addr):
+                    self.stop_at_debug_point(f"Watchpoint: memory[{mem_addr}] = {int(self.runner.memory[mem_addr])}.")
+                    return
+                if self.runner.pc in self.runner.breakpoints:
+                    self.stop_at_debug_point(f"Breakpoint hit at PC {self.runner.pc}.")
+                    return
 
             # Update performance counter
             self.performance_counter += steps_executed
@@ -868,6 +1522,28 @@ class BrainFuckVisualizer(QMainWindow):
             QMessageBox.critical(self, "Execution Error", f"Error during execution: {str(e)}")
             self.stop_execution()
 
+    def stop_at_debug_point(self, message):
+        self.runner.acknowledge_stop()
+        self.stop_execution()
+        self.update_code_highlight()
+        self.update_output_display()
+        self.status_info.setText(message)
+
+    def update_debug_points(self):
+        """Parse the breakpoint / watchpoint fields into the runner."""
+        self.runner.clear_debug_points()
+        try:
+            for part in self.breakpoints_edit.text().split(','):
+                if part.strip():
+                    self.runner.add_breakpoint(int(part))
+            for part in self.watchpoints_edit.text().split(','):
+                if not part.strip():
+                    continue
+                addr, _, value = part.partition('=')
+                self.runner.add_watchpoint(int(addr), int(value) & 255 if value.strip() else None)
+        except ValueError:
+            self.status_info.setText("Invalid breakpoint or watchpoint list.")
+
     def toggle_execution(self):
         if self.runner.running:
             self.stop_execution()
@@ -7,7 +7,9 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from bfpp import BrainFuckPlusPlusCompiler
+from bfpp import BrainFuckPlusPlusCompiler, CompileSession, compile_string, tokenize, tokenize_with_columns
+from bfpp.core.blocks import build_block_table
+from bfpp.core.parser import Binary, If, Literal, Parser
 from compiler import generate_code
 import subprocess
 import tempfile
@@ -186,6 +188,288 @@ def test_int_dec_borrow():
         return False
 
 
+def test_int_add_carry_chain():
+    """Test that int addition carries across several bytes and wraps negatives."""
+    print("\nTesting int add carry chain...")
+
+    code = """
+    declare int a
+    declare int b
+    set 16777215 on a
+    set 1 on b
+    set $a + $b on a
+    set -1 on b
+    set $b + $b on b
+    if (a == 16777216) {
+        print string "YES "
+    } else {
+        print string "NO "
+    }
+    if (b == -2) {
+        print string "YES"
+    } else {
+        print string "NO"
+    }
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code)
+
+    if output.strip() == "YES YES":
+        print("✓ int add carry chain works")
+        return True
+    else:
+        print(f"✗ int add carry chain failed. Output: {output}, Error: {error}")
+        return False
+
+
+def test_int_multiplication():
+    """Test signed int multiplication, including wide products and literal operands."""
+    print("\nTesting int multiplication...")
+
+    code = """
+    declare int a
+    declare int b
+    declare int c
+    set -123 on a
+    set 4567 on b
+    set $a * $b on c
+    if (c == -561741) {
+        print string "A"
+    }
+    set 70000 on a
+    set $a * $a on c
+    if (c == 4900000000) {
+        print string "B"
+    }
+    set $b * 1000 on c
+    if (c == 4567000) {
+        print string "C"
+    }
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code)
+
+    if output.strip() == "ABC":
+        print("✓ int multiplication works")
+        return True
+    else:
+        print(f"✗ int multiplication failed. Output: {output}, Error: {error}")
+        return False
+
+
+def test_constant_folding():
+    """Test that known-value expressions fold and that loops invalidate known values."""
+    print("\nTesting constant folding...")
+
+    code = """
+    declare int a
+    declare int b
+    declare byte i
+    set 100 on a
+    set $a * 3 on b
+    set $b - 7 on a
+    varout a
+    print string " "
+    set 3 on i
+    while (i) {
+        set $a + 1 on a
+        dec on i
+    }
+    varout a
+    print string " "
+    set $a % 7 on b
+    varout b
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code)
+
+    # The two leading expressions must not emit a runtime multiply/subtract
+    straight = BrainFuckPlusPlusCompiler().compile("declare int a\ndeclare int b\nset 100 on a\nset $a * 3 on b")
+    if output.strip() == "293 296 2" and len(straight) < 1000:
+        print("✓ constant folding works")
+        return True
+    else:
+        print(f"✗ constant folding failed. Output: {output}, Error: {error}, Straight-line size: {len(straight)}")
+        return False
+
+
+def test_int_constant_operands():
+    """Test multiply/divide/modulo by constants on values only known at runtime."""
+    print("\nTesting int constant operands...")
+
+    code = """
+    declare int a
+    declare int c
+    declare byte i
+    set 2 on i
+    while (i) {
+        set $a + 61728 on a
+        dec on i
+    }
+    set $a / 10 on c
+    if (c == 12345) {
+        print string "A"
+    }
+    set $a % 256 on c
+    if (c == 64) {
+        print string "B"
+    }
+    set $a * 8 on c
+    if (c == 987648) {
+        print string "C"
+    }
+    set 0 - $a on a
+    set $a / 100 on c
+    if (c == -1234) {
+        print string "D"
+    }
+    set $a % 10 on c
+    if (c == -6) {
+        print string "E"
+    }
+    set 3 * $a on c
+    varout c
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code)
+
+    if output.strip() == "ABCDE-370368":
+        print("✓ int constant operands work")
+        return True
+    else:
+        print(f"✗ int constant operands failed. Output: {output}, Error: {error}")
+        return False
+
+
+def test_temp_cell_reuse():
+    """Test that variables declared inside blocks do not overlap freed temp cells."""
+    print("\nTesting temp cell reuse...")
+
+    code = """
+    declare int a
+    set 5 on a
+    if (a == 5) {
+        declare byte z
+        set 65 on z
+    }
+    declare int c
+    set 66 on c
+    set $c + 1 on c
+    varout z
+    varout c
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code)
+
+    if output.strip() == "A67" and compiler.state.peak_ptr >= compiler.max_ptr and not compiler.temp_cells:
+        print("✓ temp cell reuse works")
+        return True
+    else:
+        print(f"✗ temp cell reuse failed. Output: {output}, Error: {error}")
+        return False
+
+
+def test_temp_cells_near_operands():
+    """Test that arithmetic temps go into a free hole next to the operands, not near the pointer."""
+    print("\nTesting temp cells near operands...")
+
+    def _add(near_hole):
+        compiler = BrainFuckPlusPlusCompiler()
+        compiler.state.reset()
+        compiler.max_ptr = 100
+        compiler._generate_set_value(250, 0)
+        compiler._generate_set_value(10, 30)
+        compiler._generate_set_value(1, 31)
+        compiler.state.free_temps = [(10, 12)] if near_hole else []
+        compiler._move_pointer(90)
+        compiler._perform_add(0, 30, 22, size=2)
+        compiler._move_pointer(22)
+        compiler.bf_code.append('.>.')
+        output, _ = execute_bf_code_inprocess(''.join(compiler.bf_code))
+        return [ord(ch) for ch in output], compiler.state.peak_ptr, len(''.join(compiler.bf_code))
+
+    near, near_peak, near_len = _add(True)
+    bump, bump_peak, bump_len = _add(False)
+
+    if near == bump == [4, 2] and near_peak <= 91 < bump_peak and near_len < bump_len:
+        print("✓ temp cells near operands work")
+        return True
+    else:
+        print(f"✗ temp cells near operands failed: {near}, {bump}, {near_peak}, {bump_peak}, {near_len}, {bump_len}")
+        return False
+
+
+def test_known_zero_clears():
+    """Test that provably zero cells are not cleared again, including around loops."""
+    print("\nTesting known-zero clears...")
+
+    code = """
+    declare byte i
+    declare byte t
+    set 3 on i
+    while (i) {
+        set 48 on t
+        inc on t
+        varout t
+        dec on i
+    }
+    set 0 on i
+    varout t
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code)
+
+    fresh = BrainFuckPlusPlusCompiler().compile("declare int a\ndeclare byte b\nset 0 on b")
+    if output.strip() == "1111" and '[-]' not in fresh and '[-][-]' not in bf_code:
+        print("✓ known-zero clears work")
+        return True
+    else:
+        print(f"✗ known-zero clears failed. Output: {output}, Error: {error}, Fresh code: {fresh}")
+        return False
+
+
+def test_known_zero_raw_moves():
+    """Test that raw chunks moving the pointer invalidate known-zero cells."""
+    print("\nTesting known-zero facts after raw moves...")
+
+    compiler = BrainFuckPlusPlusCompiler()
+    compiler.state.reset()
+    compiler.max_ptr = 8
+    compiler._generate_clear(5)
+    compiler._move_pointer(4)
+    compiler.bf_code.append('>+<')
+    start = len(compiler.bf_code)
+    compiler._generate_clear(5)
+    after_write = compiler.bf_code[start:]
+
+    compiler._generate_clear(7)
+    compiler._move_pointer(6)
+    compiler.bf_code.append('[->+<]>[<')
+    compiler.bf_code.append('+>-]')
+    start = len(compiler.bf_code)
+    compiler._generate_clear(7)
+    after_loop = compiler.bf_code[start:]
+
+    if after_write[-1] == '[-]' and after_loop[-1] == '[-]':
+        print("✓ raw moves drop known-zero facts")
+        return True
+    else:
+        print(f"✗ known-zero facts after raw moves failed: {after_write}, {after_loop}")
+        return False
+
+
 def test_runtime_subscript_condition_int():
     print("\nTesting runtime-subscript condition (int)...")
 
@@ -406,6 +690,552 @@ def test_inputint_on_int():
     return False
 
 
+def test_sub_into_operand():
+    """Test subtraction whose destination is one of its operands, with negative input."""
+    print("\nTesting subtraction into an operand...")
+
+    code = """
+    declare int a
+    declare int b
+    inputint on a
+    set 100 on b
+    set $b - $a on a
+    varout a
+    print string " "
+    set $a - $b on b
+    varout b
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="-42\n")
+
+    if output.strip() == "142 42":
+        print("✓ subtraction into an operand works")
+        return True
+    print(f"✗ subtraction into an operand failed. Output: {output}, Error: {error}")
+    return False
+
+
+def test_runtime_index_walk():
+    """Test runtime subscripts on a large array, including an out-of-range index."""
+    print("\nTesting runtime index walk...")
+
+    code = """
+    declare int a[200]
+    declare byte i
+    set 150 on i
+    set 40 on a[$i]
+    inc on a[$i]
+    inc on a[$i]
+    varout a[$i]
+    print string " "
+    varout a[150]
+    set 230 on i
+    inc on a[$i]
+    varout a[$i]
+    print string " "
+    varout a[199]
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="")
+
+    if output.strip() == "42 42 0" and len(bf_code) < 3000000:
+        print("✓ runtime index walk works")
+        return True
+    print(f"✗ runtime index walk failed. Output: {output}, Error: {error}, Size: {len(bf_code)}")
+    return False
+
+
+def test_runtime_index_walk_strings():
+    """Test runtime string input and output through an index frame."""
+    print("\nTesting runtime index walk on strings...")
+
+    code = """
+    declare string 8 names[6]
+    declare byte i
+    set 4 on i
+    input on names[$i]
+    set "bob" on names[1]
+    varout names[$i]
+    print string "|"
+    set 1 on i
+    varout names[$i]
+    print string "|"
+    set 9 on i
+    input on names[$i]
+    varout names[$i]
+    print string "|"
+    varout names[4]
+    """
+
+    bf_code = BrainFuckPlusPlusCompiler().compile(code)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="alice\nzed\n")
+
+    if output.strip() == "alice|bob||alice":
+        print("✓ runtime index walk on strings works")
+        return True
+    print(f"✗ runtime index walk on strings failed. Output: {output}, Error: {error}")
+    return False
+
+
+def test_match_decision_tree():
+    """Test an int match with many cases, a negative case and a body that changes the subject."""
+    print("\nTesting match decision tree...")
+
+    code = """
+    declare int x
+    set -300 on x
+    match (x) {
+        case 1:
+            print string "A"
+        case 300:
+            print string "B"
+        case -300:
+            print string "C"
+            set 1 on x
+        case -300:
+            print string "D"
+        case 65836:
+            print string "E"
+        default:
+            print string "F"
+    }
+    match (x) {
+        case 0:
+            print string "G"
+        case 1:
+            print string "H"
+    }
+    set 44 on x
+    match (x) {
+        case 300:
+            print string "I"
+        default:
+            print string "J"
+    }
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="")
+
+    if output.strip() == "CHJ":
+        print("✓ match decision tree works")
+        return True
+    print(f"✗ match decision tree failed. Output: {output}, Error: {error}")
+    return False
+
+
+def test_while_loop_lowering():
+    """Test byte-variable loops, break in a flag-driven loop and code after a loop with an if body."""
+    print("\nTesting while loop lowering...")
+
+    code = """
+    declare byte x
+    declare int n
+    set 3 on x
+    while (x) {
+        print string "a"
+        dec on x
+    }
+    while (n < 10) {
+        inc on n
+        if (n == 3) {
+            break
+        }
+    }
+    varout n
+    print string "!"
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="")
+
+    if output.strip() == "aaa3!":
+        print("✓ while loop lowering works")
+        return True
+    print(f"✗ while loop lowering failed. Output: {output}, Error: {error}")
+    return False
+
+
+def test_tokenize_with_columns():
+    """Test the tokenizer's column offsets and its handling of numbers, strings and operators."""
+    print("\nTesting tokenizer columns...")
+
+    line = 'set $a[$i] + 1.5e3 on x != "a b" ;y'
+    pairs = tokenize_with_columns(line)
+    expected = ['set', '$a', '[', '$i', ']', '+', '1.5e3', 'on', 'x', '!=', '"a b"', ';', 'y']
+
+    if [t for t, _ in pairs] == expected and tokenize(line) == expected and all(
+        line[col:col + len(tok)] == tok for tok, col in pairs
+    ):
+        print("✓ tokenizer columns work")
+        return True
+    print(f"✗ tokenizer columns failed. Tokens: {pairs}")
+    return False
+
+
+def test_nested_keyword_blocks():
+    """Test nested endif/else/endwhile/endmatch blocks found through the block table."""
+    print("\nTesting nested keyword blocks...")
+
+    code = """
+    declare int n
+    declare int k
+    set 2 on n
+    while (n > 0) do
+        if (n == 2) then
+            if (k == 5) then
+                print string "X"
+            else
+                print string "a"
+            endif
+        else
+            print string "b"
+        endif
+        match (n)
+            case 1:
+                print string "1"
+            default:
+                print string "?"
+        endmatch
+        dec on n
+    endwhile
+    print string "."
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="")
+
+    if output.strip() == "a?b1.":
+        print("✓ nested keyword blocks work")
+        return True
+    print(f"✗ nested keyword blocks failed. Output: {output}, Error: {error}")
+    return False
+
+
+def test_brace_block_table_else():
+    """Test that a `} else {` line closes the then-block and opens the else-block."""
+    print("\nTesting brace block table with else...")
+
+    lines = ["if (a) {", "inc on a", "} else {", "dec on a", "}", "match (a) {", "case 1: { inc on a }", "}"]
+    ends = build_block_table(lines, tokenize).brace_end
+
+    if ends == {0: 2, 2: 4, 5: 7, 6: 6}:
+        print("✓ brace block table with else works")
+        return True
+    print(f"✗ brace block table with else failed. Ends: {ends}")
+    return False
+
+
+def test_parse_program_ast():
+    """Test the statement tree and source spans produced before code generation."""
+    print("\nTesting program AST...")
+
+    code = """declare int n
+set 3 on n
+while (n > 0) {
+    if (n == 2) {
+        print string "b"
+    } else {
+        print string "a"; print string "."
+    }
+    dec on n
+}"""
+
+    compiler = BrainFuckPlusPlusCompiler()
+    program = Parser(code.split('\n'), compiler._tokenize).parse_program()
+    loop = program.body[2]
+    branch = loop.body[0]
+    ok = (
+        [type(n).__name__ for n in program.body] == ['Declare', 'Assign', 'While']
+        and isinstance(program.body[1].value, Literal) and program.body[1].target == 'n'
+        and (loop.span.line, loop.span.end_line) == (3, 10)
+        and isinstance(branch, If) and isinstance(branch.cond, Binary) and branch.cond.op == '=='
+        and [n.span.column for n in branch.else_body] == [8, 26]
+    )
+
+    bf_code = compiler.compile(code)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="")
+
+    # Errors in inline case bodies report the case line itself
+    try:
+        compiler.compile("declare int a\nmatch (a) {\ncase 0: set 5 on nosuch\ncase 1: inc on a\n}")
+        case_error = ""
+    except Exception as e:
+        case_error = str(e)
+
+    if ok and output.strip() == "a.ba." and "(line 3)" in case_error:
+        print("✓ program AST works")
+        return True
+    print(f"✗ program AST failed. Tree ok: {ok}, Output: {output}, Error: {error}, Case error: {case_error}")
+    return False
+
+
+def test_incremental_recompile():
+    """Test that recompiling an edited source reuses the unchanged prefix."""
+    print("\nTesting incremental recompile...")
+
+    head = """declare int a
+set 40 on a
+inc on a
+while (a > 40) {
+    dec on a
+}
+varout a
+"""
+    session = CompileSession()
+    session.compile(head + 'print string "!"')
+    first = session._compiler._checkpoints[:4]
+
+    edited = head + 'inc on a\nvarout a'
+    result = session.compile(edited)
+    reused = all(a is b for a, b in zip(first, session._compiler._checkpoints))
+    output, error = execute_bf_code_inprocess(result.bf_code, input_data="")
+
+    if reused and result.bf_code == compile_string(edited).bf_code and output.strip() == "4041":
+        print("✓ incremental recompile works")
+        return True
+    print(f"✗ incremental recompile failed. Reused: {reused}, Output: {output}, Error: {error}")
+    return False
+
+
+def test_compile_caches_are_bounded():
+    """Test that the token and snippet caches stop growing at their limit."""
+    print("\nTesting compile cache limits...")
+
+    lines = ["declare int a", "declare int b", "set 7 on b"]
+    for i in range(40):
+        lines.append(f"set {i + 20} on a")
+        lines.append("set $a / $b on a")
+        lines.append("varout a")
+    code = "\n".join(lines)
+
+    compiler = BrainFuckPlusPlusCompiler()
+    compiler.state.cache_limit = 8
+    bf_code = compiler.compile(code)
+    sizes = (len(compiler.state.token_cache), len(compiler.state.snippet_cache))
+    expected = "".join(str((i + 20) // 7) for i in range(40))
+    output, error = execute_bf_code_inprocess(bf_code, input_data="")
+
+    if max(sizes) <= 8 and output.strip() == expected and bf_code == BrainFuckPlusPlusCompiler().compile(code):
+        print("✓ compile caches are bounded")
+        return True
+    print(f"✗ compile cache limits failed. Sizes: {sizes}, Output: {output}, Error: {error}")
+    return False
+
+
+def test_snippet_cache():
+    """Test that repeated arithmetic primitives are replayed from the snippet cache."""
+    print("\nTesting snippet cache...")
+
+    code = """
+    declare int a
+    declare int b
+    declare int q
+    declare int r
+    set 100 on a
+    set 7 on b
+    set 2 on r
+    while (r > 0) {
+        set $a / $b on q
+        set $a % $b on r
+        varout q
+        print string " "
+        varout r
+        print string " "
+        dec on a
+        set $a - $a on r
+    }
+    """
+
+    compiler = BrainFuckPlusPlusCompiler()
+    bf_code = compiler.compile(code)
+    cached = len(compiler.state.snippet_cache)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="")
+
+    if cached and output.strip() == "14 2":
+        print("✓ snippet cache works")
+        return True
+    print(f"✗ snippet cache failed. Entries: {cached}, Output: {output}, Error: {error}")
+    return False
+
+
+def test_shared_routines():
+    """Test that shared routines keep output and shrink repeated division and varout."""
+    print("\nTesting shared routines...")
+
+    code = """
+    declare int a
+    declare int b
+    declare int64 d
+    set 100 on a
+    set 7 on b
+    set $a / $b on d
+    varout d
+    print string " "
+    set $a % $b on d
+    varout d
+    print string " "
+    set $d * $b on a
+    set $a / $b on d
+    varout d
+    """
+
+    inline_code = BrainFuckPlusPlusCompiler().compile(code)
+    shared_code = BrainFuckPlusPlusCompiler(shared_routines=True).compile(code)
+    output, error = execute_bf_code_inprocess(shared_code, input_data="")
+
+    if output.strip() == "14 2 2" and len(shared_code) < len(inline_code):
+        print("✓ shared routines work")
+        return True
+    print(f"✗ shared routines failed. Sizes: {len(inline_code)} -> {len(shared_code)}, Output: {output}, Error: {error}")
+    return False
+
+
+def test_shared_routines_many_calls():
+    """Test that shared routines dispatch correctly across many call sites."""
+    print("\nTesting shared routines with many calls...")
+
+    lines = ["declare int a"]
+    expected = []
+    for i in range(40):
+        lines.append(f"set {i * 37} on a")
+        lines.append("varout a")
+        lines.append('print string " "')
+        expected.append(str(i * 37))
+    code = "\n".join(lines)
+
+    shared_code = BrainFuckPlusPlusCompiler(shared_routines=True).compile(code)
+    output, error = execute_bf_code_inprocess(shared_code, input_data="")
+
+    if output.split() == expected:
+        print("✓ shared routines dispatch many calls")
+        return True
+    print(f"✗ shared routines with many calls failed. Output: {output}, Error: {error}")
+    return False
+
+
+def test_decimal_output_algorithms():
+    """Test that both integer varout algorithms print the same decimals."""
+    print("\nTesting decimal output algorithms...")
+
+    code = """
+    declare int16 a
+    declare int b
+    declare int64 c
+    set -32768 on a
+    varout a
+    print string " "
+    set 0 on b
+    varout b
+    print string " "
+    set 2147483647 on b
+    varout b
+    print string " "
+    set -9223372036854775808 on c
+    varout c
+    """
+    expected = "-32768 0 2147483647 -9223372036854775808"
+
+    outputs = {}
+    for algorithm in ("dabble", "divmod"):
+        bf_code = BrainFuckPlusPlusCompiler(decimal_output=algorithm).compile(code)
+        outputs[algorithm], error = execute_bf_code_inprocess(bf_code, input_data="")
+
+    if all(out.strip() == expected for out in outputs.values()):
+        print("✓ decimal output algorithms work")
+        return True
+    print(f"✗ decimal output algorithms failed. Outputs: {outputs}")
+    return False
+
+
+def test_range_comparison_sign_checks():
+    """Test float printing and signed comparisons built on byte range checks."""
+    print("\nTesting range comparison sign checks...")
+
+    code = """
+    declare float x
+    declare int a
+    declare int b
+    set -32.768 on x
+    varout x
+    print string " "
+    set -5 on a
+    set 3 on b
+    if (a < b) {
+        print string "lt"
+    }
+    """
+
+    bf_code = BrainFuckPlusPlusCompiler().compile(code)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="")
+
+    if output.strip() == "-32.768 lt" and len(bf_code) < 100000:
+        print("✓ range comparison sign checks work")
+        return True
+    print(f"✗ range comparison sign checks failed. Size: {len(bf_code)}, Output: {output}, Error: {error}")
+    return False
+
+
+def test_literal_delta_output():
+    """Test string literals printed as deltas from seeded working cells."""
+    print("\nTesting literal delta output...")
+
+    text = "The quick brown fox jumps over the lazy dog. 0123456789"
+    code = f"""
+    print string "{text}\\n"
+    print string ""
+    declare int b
+    set 7 on b
+    varout b end "\\n"
+    """
+
+    bf_code = BrainFuckPlusPlusCompiler().compile(code)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="")
+    literal_size = len(BrainFuckPlusPlusCompiler().compile(f'print string "{text}"'))
+
+    if output == text + "\n7\n" and literal_size < sum(map(ord, text)) // 4:
+        print("✓ literal delta output works")
+        return True
+    print(f"✗ literal delta output failed. Size: {literal_size}, Output: {output!r}, Error: {error}")
+    return False
+
+
+def test_multiplicative_constants():
+    """Test large constants loaded through multiplication loops."""
+    print("\nTesting multiplicative constants...")
+
+    code = """
+    declare byte a[16]
+    declare byte i
+    declare int64 big
+    set 100 on a
+    set 3 on i
+    set 120 on a[$i]
+    set 9000000000 on big
+    varout a[0]
+    varout a[$i]
+    varout a[15] end "\\n"
+    varout big end "\\n"
+    """
+
+    bf_code = BrainFuckPlusPlusCompiler().compile(code)
+    output, error = execute_bf_code_inprocess(bf_code, input_data="")
+    fill_size = len(BrainFuckPlusPlusCompiler().compile("declare byte a[16]\nset 100 on a"))
+
+    if output == "dxd\n9000000000\n" and fill_size < 16 * 100 // 2:
+        print("✓ multiplicative constants work")
+        return True
+    print(f"✗ multiplicative constants failed. Size: {fill_size}, Output: {output!r}, Error: {error}")
+    return False
+
+
 def test_inputfloat_on_float():
     print("\nTesting inputfloat on float...")
 
@@ -544,6 +1374,14 @@ def main():
         test_arithmetic_result,
         test_int_inc_carry,
         test_int_dec_borrow,
+        test_int_add_carry_chain,
+        test_int_multiplication,
+        test_constant_folding,
+        test_int_constant_operands,
+        test_temp_cell_reuse,
+        test_temp_cells_near_operands,
+        test_known_zero_clears,
+        test_known_zero_raw_moves,
         test_runtime_subscript_condition_int,
         test_runtime_subscript_expression_operand,
         test_input_on_byte,
@@ -553,6 +1391,24 @@ def main():
         test_macros,
         test_semicolon_statements,
         test_inputint_on_int,
+        test_sub_into_operand,
+        test_runtime_index_walk,
+        test_runtime_index_walk_strings,
+        test_match_decision_tree,
+        test_while_loop_lowering,
+        test_tokenize_with_columns,
+        test_nested_keyword_blocks,
+        test_brace_block_table_else,
+        test_parse_program_ast,
+        test_incremental_recompile,
+        test_snippet_cache,
+        test_compile_caches_are_bounded,
+        test_shared_routines,
+        test_shared_routines_many_calls,
+        test_decimal_output_algorithms,
+        test_range_comparison_sign_checks,
+        test_literal_delta_output,
+        test_multiplicative_constants,
         test_inputfloat_on_float,
         test_varout_float_format,
         test_float_add_sub_and_conversion,
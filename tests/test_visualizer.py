@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Headless tests for the visualizer's runner, debugger and frame renderer.
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+from visualizer import BrainFuckRunner, FrameRenderer, TapeSnapshots, load_export_fonts
+
+HELLO = "++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]>>.>---.+++++++..+++.>>.<-.<.+++.------.--------.>>+.>++."
+
+
+def _runner(program, input_data=""):
+    runner = BrainFuckRunner()
+    runner.load_program(program)
+    runner.input_buffer = list(input_data)
+    runner.running = True
+    return runner
+
+
+def _run_jit(runner):
+    """Run JIT batches until a breakpoint, watchpoint, missing input or the end stops them."""
+    while True:
+        stop_reason, _, _ = runner.run_jit_step()
+        if stop_reason not in (1, 2, 4):
+            return stop_reason
+
+
+def test_jit_breakpoint_resume():
+    """Test that a JIT breakpoint stops once and resumes past itself."""
+    print("Testing JIT breakpoint resume...")
+
+    runner = _runner(HELLO)
+    first_dot = HELLO.index('.')
+    runner.add_breakpoint(first_dot)
+
+    hit = _run_jit(runner)
+    hit_pc = runner.pc
+    runner.add_breakpoint(first_dot + 1)
+    again = _run_jit(runner)
+    again_pc, output = runner.pc, ''.join(runner.output_buffer)
+    runner.clear_debug_points()
+    done = _run_jit(runner)
+
+    if (hit, hit_pc, again, again_pc, output, done) == (6, first_dot, 6, first_dot + 1, "H", 3) \
+            and ''.join(runner.output_buffer) == "Hello World!\n":
+        print("✓ JIT breakpoints resume")
+        return True
+    print(f"✗ JIT breakpoint resume failed: {hit}, {hit_pc}, {again}, {again_pc}, {done}, {runner.output_buffer}")
+    return False
+
+
+def test_single_step_breakpoint_resume():
+    """Test that a breakpoint reported in single-step mode is not reported again by the JIT."""
+    print("Testing single-step breakpoint resume...")
+
+    from PyQt5.QtWidgets import QApplication
+    from visualizer import BrainFuckVisualizer
+
+    app = QApplication.instance() or QApplication([])
+    window = BrainFuckVisualizer()
+    runner = window.runner
+    runner.running = True
+    target = HELLO.index('[') + 1  # runs once per outer loop iteration
+    runner.add_breakpoint(target)
+    while runner.pc != target:
+        runner.step()
+    window.stop_at_debug_point("Breakpoint")
+
+    runner.running = True
+    stop_reason = _run_jit(runner)
+    window.close()
+
+    # Without the window: an unacknowledged stop is reported again in place
+    bare = _runner(HELLO)
+    bare.add_breakpoint(target)
+    while bare.pc != target:
+        bare.step()
+    repeated = _run_jit(bare)
+    repeated_step = bare.step_count
+    bare.acknowledge_stop()
+    resumed = _run_jit(bare)
+
+    if stop_reason == 6 and runner.step_count > target + 1 \
+            and (repeated, repeated_step, resumed) == (6, target, 6) and bare.step_count > target + 1:
+        print("✓ single-step breakpoints resume in JIT mode")
+        return True
+    print(f"✗ single-step breakpoint resume failed: {stop_reason}, {runner.step_count}, "
+          f"{repeated}, {repeated_step}, {resumed}, {bare.step_count}")
+    return False
+
+
+def test_jit_watchpoints():
+    """Test that JIT watchpoints trip on '+', '-' and ',' writes."""
+    print("Testing JIT watchpoints...")
+
+    runner = _runner(HELLO)
+    runner.add_watchpoint(3, 105)
+    arith = _run_jit(runner)
+    arith_value = int(runner.memory[3])
+
+    reader = _runner(">,>,", input_data="ab")
+    reader.add_watchpoint(2)
+    read = _run_jit(reader)
+    read_addr, read_value, read_pc = reader.last_watch_addr, int(reader.memory[2]), reader.pc
+
+    if arith == 7 and arith_value == 105 and read == 7 and (read_addr, read_value, read_pc) == (2, 98, 4):
+        print("✓ JIT watchpoints work")
+        return True
+    print(f"✗ JIT watchpoints failed: {arith}, {arith_value}, {read}, {read_addr}, {read_value}, {read_pc}")
+    return False
+
+
+def _state(runner):
+    return runner.pc, runner.pointer, runner.memory.tobytes(), runner.step_count, ''.join(runner.output_buffer)
+
+
+def test_step_back():
+    """Test that stepping back retraces single steps and JIT batches exactly."""
+    print("Testing step back...")
+
+    runner = _runner(HELLO)
+    states = [_state(runner)]
+    while runner.step()[0]:
+        states.append(_state(runner))
+    states.append(_state(runner))
+
+    retraced = True
+    for expected in reversed(states[:-1]):
+        runner.step_back()
+        retraced = retraced and _state(runner) == expected
+    at_start = not runner.step_back()
+
+    jit = _runner(HELLO)
+    jit.run_jit_step()
+    batch_end = jit.step_count
+    jit.step_back()
+    after_batch = _state(jit) == states[batch_end - 1]
+
+    if retraced and at_start and after_batch:
+        print("✓ step back works")
+        return True
+    print(f"✗ step back failed: {retraced}, {at_start}, {after_batch}")
+    return False
+
+
+def test_run_back_to():
+    """Test that run_back_to stops at the latest earlier visit of a pc."""
+    print("Testing run back to...")
+
+    runner = _runner(HELLO)
+    visits = []
+    while runner.step()[0]:
+        visits.append((runner.pc, runner.step_count))
+    loop_pc = HELLO.index('>')
+    found = runner.run_back_to(loop_pc)
+    found_step = runner.step_count
+    expected_step = max(step for pc, step in visits if pc == loop_pc)
+    missing = runner.run_back_to(len(HELLO) + 5)
+
+    if found and found_step == expected_step and not missing and runner.step_count == 0:
+        print("✓ run back to works")
+        return True
+    print(f"✗ run back to failed: {found}, {found_step}, {expected_step}, {missing}, {runner.step_count}")
+    return False
+
+
+def test_reverse_history_is_bounded():
+    """Test that undo storage starts small and old checkpoints are dropped."""
+    print("Testing bounded reverse history...")
+
+    runner = _runner("-[>+>+<<-]")
+    lazy = runner._undo_step is None
+    runner.CHECKPOINT_INTERVAL = 8
+    runner.CHECKPOINT_LIMIT = 32
+    runner.checkpoints.keyframe_interval = 4
+    while runner.step()[0]:
+        pass
+    checkpoints = len(runner.checkpoints)
+    undo_cap = runner._undo_cap
+    oldest = runner.checkpoints.get_step(0)
+    runner._undo_len = 0  # force stepping back to replay from checkpoints
+    while runner.step_back():
+        pass
+
+    if lazy and checkpoints <= 32 and undo_cap < runner.UNDO_LIMIT and runner.step_count == oldest > 0:
+        print("✓ reverse history is bounded")
+        return True
+    print(f"✗ bounded reverse history failed: {lazy}, {checkpoints}, {undo_cap}, {oldest}, {runner.step_count}")
+    return False
+
+
+def test_frame_renderer_code_window():
+    """Test that the code window renders the same rows wherever its cache was centered."""
+    print("Testing frame renderer code window...")
+
+    fonts = load_export_fonts()
+    program = "+>-<[.]," * 16000
+    memory = np.zeros(64, dtype=np.uint8)
+    memory[3] = 200
+    scrolling = FrameRenderer(1200, 800, program, fonts)
+
+    same = True
+    for pc in (len(program) - 1, 0, len(program) // 2, 5, len(program) // 2 + 700):
+        state = (pc, 3, memory, pc, list("out"))
+        fresh = FrameRenderer(1200, 800, program, fonts).render(state).copy()
+        same = same and np.array_equal(scrolling.render(state), fresh)
+
+    screen_rows = scrolling._code_rows
+    cached_rows = scrolling._code_image.shape[0] // scrolling._code_line_h
+    code_area = scrolling.frame[FrameRenderer.CODE_Y + 22:, 20:-20]
+    drawn = (code_area != code_area[-1, -1]).any()
+
+    if same and drawn and cached_rows <= screen_rows * FrameRenderer.CODE_CACHE_SCREENS:
+        print("✓ frame renderer code window works")
+        return True
+    print(f"✗ frame renderer code window failed: {same}, {drawn}, {cached_rows}, {screen_rows}")
+    return False
+
+
+def test_frame_renderer_memory_grid():
+    """Test that memory cells are filled by value and the pointer cell is highlighted."""
+    print("Testing frame renderer memory grid...")
+
+    renderer = FrameRenderer(1200, 800, "+", load_export_fonts())
+    memory = np.zeros(64, dtype=np.uint8)
+    memory[1] = 100
+    frame = renderer.render((0, 2, memory, 0, []))
+
+    def fill(index):
+        row, col = divmod(index, FrameRenderer.CELLS_PER_ROW)
+        return tuple(frame[FrameRenderer.GRID_Y + row * FrameRenderer.CELL_HEIGHT + 2,
+                           FrameRenderer.GRID_X + col * FrameRenderer.CELL_WIDTH + 2])
+
+    # Colors are BGR
+    cells = (fill(0), fill(1), fill(2))
+    if cells == ((60, 60, 60), (40, 180, 40), (0, 165, 255)):
+        print("✓ frame renderer memory grid works")
+        return True
+    print(f"✗ frame renderer memory grid failed: {cells}")
+    return False
+
+
+def test_tape_snapshots():
+    """Test that snapshots rebuild every record and hand out the latest tape without copying."""
+    print("Testing tape snapshots...")
+
+    runner = _runner(HELLO)
+    snapshots = TapeSnapshots(keyframe_interval=4)
+    tapes = []
+    for _ in range(30):
+        for _ in range(25):
+            runner.step()
+        snapshots.record(runner)
+        tapes.append(runner.memory.copy())
+
+    rebuilt = all(np.array_equal(snapshots.memory_at(i), tape) for i, tape in enumerate(tapes))
+    latest = snapshots.get(len(tapes) - 1)[2]
+    shared = np.shares_memory(latest, snapshots._tape) and not latest.flags.writeable
+
+    fonts = load_export_fonts()
+    bounds = FrameRenderer.memory_bounds(runner.pointer, len(runner.memory))
+    windowed = snapshots.get(len(tapes) - 1, cells=bounds)
+    full_frame = FrameRenderer(1200, 800, runner.program, fonts).render(snapshots.get(len(tapes) - 1)).copy()
+    window_frame = FrameRenderer(1200, 800, runner.program, fonts).render(windowed)
+
+    tape = (np.arange(1000) % 256).astype(np.uint8)
+    start, stop = FrameRenderer.memory_bounds(300, len(tape))
+    renderer = FrameRenderer(1200, 800, runner.program, fonts)
+    far_full = renderer.render((0, 300, tape, 0, [])).copy()
+    far_window = renderer.render((0, 300, tape[start:stop].copy(), 0, [], start))
+
+    if rebuilt and shared and len(windowed[2]) <= FrameRenderer.CELLS_VISIBLE \
+            and np.array_equal(full_frame, window_frame) and np.array_equal(far_full, far_window):
+        print("✓ tape snapshots work")
+        return True
+    print(f"✗ tape snapshots failed: {rebuilt}, {shared}, {len(windowed[2])}")
+    return False
+
+
+def main():
+    print("=== Visualizer Tests ===\n")
+
+    tests = [
+        test_jit_breakpoint_resume,
+        test_single_step_breakpoint_resume,
+        test_jit_watchpoints,
+        test_step_back,
+        test_run_back_to,
+        test_reverse_history_is_bounded,
+        test_frame_renderer_code_window,
+        test_frame_renderer_memory_grid,
+        test_tape_snapshots,
+    ]
+
+    passed = 0
+    for test in tests:
+        if test():
+            passed += 1
+        print()
+
+    print(f"Results: {passed}/{len(tests)} tests passed")
+    if passed == len(tests):
+        print("✓ All visualizer tests passed")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())